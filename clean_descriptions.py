@@ -8,8 +8,9 @@ import sys
 sys.path.insert(0, os.path.dirname(__file__))
 
 from scraper.config import LISTINGS_FILE
+from scraper.llm_cache import print_llm_cache_stats
 from scraper.models import Listing
-from scraper.description_cleaner import clean_all_descriptions
+from scraper.description_cleaner import clean_all_descriptions, cleaning_fingerprint
 
 
 def main():
@@ -28,7 +29,8 @@ def main():
     listings = [Listing(**item) for item in data]
     print(f"Loaded {len(listings)} listings")
 
-    # Clean all descriptions (force=True to clean everything)
+    # Clean all descriptions (force=True to ignore the garbage heuristic;
+    # descriptions already cleaned with the current prompt are still skipped)
     cleaned = clean_all_descriptions(listings, force=True)
 
     if not cleaned:
@@ -39,7 +41,9 @@ def main():
     listings_by_id = {item["id"]: item for item in data}
     for listing_id, clean_desc in cleaned.items():
         if listing_id in listings_by_id:
-            listings_by_id[listing_id]["description"] = clean_desc
+            item = listings_by_id[listing_id]
+            item["description"] = clean_desc
+            item["clean_fingerprint"] = cleaning_fingerprint(item["title"], clean_desc)
 
     # Save back
     updated_data = list(listings_by_id.values())
@@ -48,6 +52,7 @@ def main():
 
     print(f"\nDone! Cleaned {len(cleaned)}/{len(listings)} descriptions")
     print(f"Saved to {LISTINGS_FILE}")
+    print_llm_cache_stats()
 
 
 if __name__ == "__main__":
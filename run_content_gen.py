@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 """Standalone script to generate AI titles and descriptions for existing listings."""
 
+import argparse
 import json
 import os
 import sys
@@ -8,11 +9,21 @@ import sys
 sys.path.insert(0, os.path.dirname(__file__))
 
 from scraper.config import LISTINGS_FILE, EVALUATIONS_FILE
+from scraper.prompt_compaction import print_compaction_stats
+from scraper.llm_cache import print_llm_cache_stats
+from scraper.llm_executor import set_batch_mode
 from scraper.models import Listing, Evaluation
-from scraper.content_generator import generate_all_content
+from scraper.content_generator import generate_all_content, plan_content
 
 
 def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--batch", action="store_true",
+                        help="Submit requests as Message Batches jobs (slower, cheaper; resumable)")
+    args = parser.parse_args()
+    if args.batch:
+        set_batch_mode(True)
+
     # Load listings
     with open(LISTINGS_FILE, "r", encoding="utf-8") as f:
         listings_data = json.load(f)
@@ -25,16 +36,16 @@ def main():
     evaluations = {item["listing_id"]: Evaluation(**item) for item in evals_data}
     print(f"Loaded {len(evaluations)} evaluations")
 
-    # Count how many need generation
-    need_gen = sum(1 for e in evaluations.values() if not e.ai_title)
+    # Count how many need generation (missing or generated from different inputs)
+    listings_list = [l for l in listings.values() if l.id in evaluations]
+    need_gen = len(plan_content(listings_list, evaluations)[0])
     print(f"Listings needing AI content: {need_gen}")
 
     if need_gen == 0:
-        print("All listings already have AI content. Nothing to do.")
+        print("All listings already have up-to-date AI content. Nothing to do.")
         return
 
     # Generate content
-    listings_list = [l for l in listings.values() if l.id in evaluations]
     ai_content = generate_all_content(listings_list, evaluations)
 
     # Apply to evaluations
@@ -42,6 +53,7 @@ def main():
         if listing_id in evaluations:
             evaluations[listing_id].ai_title = content["ai_title"]
             evaluations[listing_id].ai_description = content["ai_description"]
+            evaluations[listing_id].content_fingerprint = content["content_fingerprint"]
 
     # Save evaluations
     data = [e.model_dump() for e in evaluations.values()]
@@ -50,6 +62,8 @@ def main():
         json.dump(data, f, ensure_ascii=False, indent=2)
     print(f"\nSaved {len(data)} evaluations to {EVALUATIONS_FILE}")
     print(f"Generated AI content for {len(ai_content)} listings")
+    print_llm_cache_stats()
+    print_compaction_stats()
 
 
 if __name__ == "__main__":
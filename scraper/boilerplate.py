@@ -0,0 +1,167 @@
+"""Per-source boilerplate learner for listing descriptions.
+
+Most web garbage in descriptions comes from a handful of site templates:
+share buttons, comment widgets, login prompts and footers that are the same
+on every page of a source. Instead of sending those descriptions to the LLM,
+the model counts, per source, in how many listings each (normalized) line
+appears. Lines found in at least BOILERPLATE_MIN_SHARE of a source's
+listings, once the source has BOILERPLATE_MIN_LISTINGS of them, are template
+text and are dropped deterministically; a template block is simply a run of
+such lines.
+
+Lines are normalized (case, whitespace) and the numbers of widget counters
+are folded, so "3 commentaires" and "12 commentaires" count as the same line.
+Other numbers are listing data ("Surface: 45m²", "650 €", dates) and are kept
+as they are, so such lines never look like template text.
+
+The model learns and strips the text as scraped: the kept original of a
+translated listing (see scraper/translator.py), never the French translation,
+whose "Traduit de ..." marker would otherwise look like template text. The
+translator strips the source text before translating it, so translations
+come without the template, and strip() leaves them untouched afterwards.
+
+Every listing is learned once, the first time it is seen, so the model is
+refreshed incrementally as new listings arrive. It is persisted as JSON in
+BOILERPLATE_MODEL_FILE.
+"""
+
+import json
+import os
+import re
+import threading
+from typing import Dict, Iterable, Optional, Set
+
+from scraper.config import BOILERPLATE_MIN_LISTINGS, BOILERPLATE_MIN_SHARE, BOILERPLATE_MODEL_FILE
+from scraper.models import Listing
+from scraper.translator import source_text
+
+# Lines longer than this are listing content, never template text
+MAX_LINE_CHARS = 300
+# Past this many listings, lines seen only once are dropped from the saved model
+PRUNE_AFTER_LISTINGS = 50
+# Saved models of another version were learned with other rules and are relearned
+MODEL_VERSION = 2
+
+# Widget counters whose number changes on every page ("3 commentaires", "12 likes")
+COUNTER_LINE_RE = re.compile(
+    r"^\d+\s+(commentaires?|réponses?|j'aime|vues?|partages?|comments?|replies|likes?|views?|shares?"
+    r"|reacties|reactie|weergaven|comentarios?|respuestas?|vistas?)$"
+)
+# Prefix added by the translator ("🇬🇧 Traduit de l'anglais")
+TRANSLATION_MARKER_RE = re.compile(r"^\W*traduit de ")
+
+
+def normalize_line(line: str) -> str:
+    line = re.sub(r"\s+", " ", line).strip().lower()
+    if COUNTER_LINE_RE.match(line):
+        return re.sub(r"\d+", "0", line)
+    return line
+
+
+def _distinct_lines(text: str) -> Set[str]:
+    lines = set()
+    for line in (text or "").splitlines():
+        key = normalize_line(line)
+        if key and len(key) <= MAX_LINE_CHARS and not TRANSLATION_MARKER_RE.match(key):
+            lines.add(key)
+    return lines
+
+
+def _is_translation(text: str) -> bool:
+    first_line = text.lstrip().split("\n", 1)[0]
+    return bool(TRANSLATION_MARKER_RE.match(normalize_line(first_line)))
+
+
+class BoilerplateModel:
+    """Line frequencies per source, persisted as {"version", "sources": {source: {"listings", "seen", "lines"}}}."""
+
+    def __init__(self, path: str = BOILERPLATE_MODEL_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self.sources: Dict[str, dict] = {}
+        self._boilerplate: Dict[str, Set[str]] = {}
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") == MODEL_VERSION:
+                self.sources = data["sources"]
+
+    def save(self):
+        with self._lock:
+            for model in self.sources.values():
+                if model["listings"] >= PRUNE_AFTER_LISTINGS:
+                    model["lines"] = {line: n for line, n in model["lines"].items() if n > 1}
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp = self.path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"version": MODEL_VERSION, "sources": self.sources}, f, ensure_ascii=False)
+            os.replace(tmp, self.path)
+
+    def learn(self, listings: Iterable[Listing]) -> int:
+        """Count the lines of listings not seen before. Returns how many were new."""
+        learned = 0
+        with self._lock:
+            seen = {source: set(model["seen"]) for source, model in self.sources.items()}
+            for listing in listings:
+                if listing.id in seen.setdefault(listing.source, set()):
+                    continue
+                source = source_text(listing)
+                if source is None:
+                    # Translated before originals were kept: the scraped text is gone
+                    continue
+                model = self.sources.setdefault(listing.source, {"listings": 0, "seen": [], "lines": {}})
+                seen[listing.source].add(listing.id)
+                model["seen"].append(listing.id)
+                model["listings"] += 1
+                for line in _distinct_lines(source[1]):
+                    model["lines"][line] = model["lines"].get(line, 0) + 1
+                self._boilerplate.pop(listing.source, None)
+                learned += 1
+        return learned
+
+    def boilerplate(self, source: str) -> Set[str]:
+        """Normalized lines treated as template text for `source`."""
+        with self._lock:
+            if source not in self._boilerplate:
+                model = self.sources.get(source)
+                lines = set()
+                if model and model["listings"] >= BOILERPLATE_MIN_LISTINGS:
+                    threshold = model["listings"] * BOILERPLATE_MIN_SHARE
+                    lines = {line for line, n in model["lines"].items() if n >= threshold}
+                self._boilerplate[source] = lines
+            return self._boilerplate[source]
+
+    def strip(self, source: str, text: Optional[str]) -> Optional[str]:
+        """`text` without the learned template lines of `source` (unchanged if nothing matches).
+
+        Text that would lose more than 80% of its length is kept as is: that
+        is a listing that mostly repeats the template, better left to the LLM.
+        So is a translation: it was made from the stripped source text.
+        """
+        lines = self.boilerplate(source)
+        if not text or not lines or _is_translation(text):
+            return text
+        original = text.splitlines()
+        kept = [line for line in original if normalize_line(line) not in lines]
+        if len(kept) == len(original):
+            return text
+        stripped = re.sub(r"\n{3,}", "\n\n", "\n".join(kept)).strip()
+        if len(stripped) < len(text) * 0.2:
+            return text
+        return stripped
+
+    def stats(self) -> Dict[str, int]:
+        """Number of boilerplate lines per source."""
+        return {source: len(self.boilerplate(source)) for source in self.sources}
+
+
+_model: Optional[BoilerplateModel] = None
+_model_lock = threading.Lock()
+
+
+def get_boilerplate_model() -> BoilerplateModel:
+    global _model
+    with _model_lock:
+        if _model is None:
+            _model = BoilerplateModel()
+        return _model
@@ -1,17 +1,114 @@
 import os
 
 ANTHROPIC_API_KEY = os.environ.get("ANTHROPIC_API_KEY", "")
+# Point the Anthropic clients elsewhere, e.g. at scripts/fake-batch-server.py
+ANTHROPIC_BASE_URL = os.environ.get("ANTHROPIC_BASE_URL") or None
 
 # Scraping settings
 REQUEST_DELAY = 2  # seconds between requests to same domain
 USER_AGENT = "CohabitatEurope/1.0 (collaborative housing search project)"
 REQUEST_TIMEOUT = 15  # seconds
 
+# Per-host token buckets (see scraper/rate_limiter.py).
+# per_minute = sustained rate, burst = requests allowed back to back.
+# Subdomains share their parent's bucket; unknown hosts use DEFAULT_RATE_LIMIT.
+DEFAULT_RATE_LIMIT = {"per_minute": 60 / REQUEST_DELAY, "burst": 1}
+DOMAIN_RATE_LIMITS = {
+    "habitat-groupe.be": {"per_minute": 30, "burst": 2},
+    "samenhuizen.be": {"per_minute": 30, "burst": 2},
+    "findacohouse.be": {"per_minute": 40, "burst": 3},
+    "ecovillageglobal.fr": {"per_minute": 30, "burst": 2},
+    "ecovillage.org": {"per_minute": 30, "burst": 2},
+    "ic.org": {"per_minute": 30, "burst": 2},
+    "ecohousing.es": {"per_minute": 30, "burst": 2},
+    "ecohousing.carto.com": {"per_minute": 30, "burst": 2},
+    # Nominatim usage policy: absolute maximum of 1 request per second
+    "nominatim.openstreetmap.org": {"per_minute": 50, "burst": 1},
+}
+RATE_LIMIT_MAX_RETRIES = 3  # retries on 429/503 before giving up
+MAX_CONCURRENCY_PER_HOST = 4  # detail pages in flight per host in fetch_many()
+
+# Incremental crawl (--incremental): known listings are only re-fetched once
+# they are older than INCREMENTAL_REFRESH_DAYS, plus a random sample of the rest.
+INCREMENTAL_REFRESH_DAYS = 14
+INCREMENTAL_REFRESH_SAMPLE = 0.05
+
+# Worker processes for HTML parsing (scrapers with parse_in_processes); 0 parses inline
+PARSE_WORKERS = int(os.environ.get("SCRAPER_PARSE_WORKERS", max(1, (os.cpu_count() or 2) - 1)))
+
 # Output paths
 DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data")
 LISTINGS_FILE = os.path.join(DATA_DIR, "listings.json")
 EVALUATIONS_FILE = os.path.join(DATA_DIR, "evaluations.json")
 TAGS_FILE = os.path.join(DATA_DIR, "tags.json")
+CACHE_DIR = os.path.join(DATA_DIR, "cache")
+
+# Stage DAG bookkeeping for main.py (see scraper/pipeline.py)
+PIPELINE_DIR = os.path.join(DATA_DIR, "pipeline")
+PIPELINE_STATE_FILE = os.path.join(PIPELINE_DIR, "state.json")
+PRE_FILTER_FILE = os.path.join(PIPELINE_DIR, "pre_filter.json")
+
+# Conditional-GET page cache (see scraper/http_cache.py). Set SCRAPER_HTTP_CACHE=0 to disable.
+HTTP_CACHE_FILE = os.path.join(CACHE_DIR, "http_cache.sqlite")
+HTTP_CACHE_ENABLED = os.environ.get("SCRAPER_HTTP_CACHE", "1") != "0"
+
+# Anthropic response cache (see scraper/llm_cache.py). LLM_CACHE=0 bypasses lookups.
+LLM_CACHE_FILE = os.path.join(CACHE_DIR, "llm_cache.sqlite")
+LLM_CACHE_ENABLED = os.environ.get("LLM_CACHE", "1") != "0"
+LLM_CACHE_MAX_AGE_DAYS = 90
+LLM_CACHE_MAX_MB = 512
+
+# Translation memory (see scraper/translation_memory.py): never re-translate unchanged source text
+TRANSLATION_MEMORY_FILE = os.path.join(CACHE_DIR, "translation_memory.sqlite")
+# Longer descriptions are translated in paragraph-aligned parts of at most this many characters
+TRANSLATION_CHUNK_CHARS = 2500
+
+# Boilerplate learner (see scraper/boilerplate.py): template lines removed before LLM cleaning
+BOILERPLATE_MODEL_FILE = os.path.join(CACHE_DIR, "boilerplate.json")
+BOILERPLATE_MIN_LISTINGS = 20  # listings of a source before any line is treated as template
+BOILERPLATE_MIN_SHARE = 0.3  # share of a source's listings a line must appear in
+
+# Shared Anthropic executor (see scraper/llm_executor.py): AIMD concurrency between 1 and the max
+LLM_INITIAL_CONCURRENCY = int(os.environ.get("LLM_CONCURRENCY", "4"))
+LLM_MAX_CONCURRENCY = 16
+LLM_MAX_RETRIES = 5
+LLM_BACKOFF_BASE = 2.0  # seconds, doubled per attempt (full jitter)
+LLM_BACKOFF_MAX = 60.0
+
+# Message Batches mode (--batch, see scraper/llm_batch.py): in-flight batch ids survive interruptions
+LLM_BATCH_STATE_FILE = os.path.join(CACHE_DIR, "llm_batches.json")
+LLM_BATCH_MAX_REQUESTS = 10000
+LLM_BATCH_POLL_SECONDS = float(os.environ.get("LLM_BATCH_POLL_SECONDS", "30"))
+
+# Prompt compaction (see scraper/prompt_compaction.py): description budget in every LLM prompt
+PROMPT_DESCRIPTION_TOKENS = 600
+
+# Items whose answers stay invalid after a repair request (see scraper/llm_quarantine.py)
+LLM_QUARANTINE_FILE = os.path.join(CACHE_DIR, "llm_quarantine.json")
+LLM_QUARANTINE_BACKOFF_HOURS = 12  # doubled after every failed run
+LLM_QUARANTINE_MAX_DAYS = 30
+
+# Local quality pre-scorer (--prescore, see scraper/prescorer.py); the model ships with the package
+PRESCORER_MODEL_FILE = os.path.join(os.path.dirname(__file__), "prescorer_model.json")
+PRESCORE_MAX_ERROR = 8.0  # listings whose predicted score is typically further off go to the LLM
+PRESCORE_THRESHOLD_MARGIN = 5  # ... as do those this close to MIN_SCORE_THRESHOLD (plus the expected error)
+
+# Near-duplicate listings across sources (see scraper/near_duplicates.py)
+NEAR_DUPLICATE_FILE = os.path.join(CACHE_DIR, "near_duplicates.json")
+NEAR_DUPLICATE_THRESHOLD = 0.8  # estimated Jaccard similarity of word 3-shingles
+MINHASH_PERMUTATIONS = 64
+MINHASH_BANDS = 16  # LSH bands of MINHASH_PERMUTATIONS / MINHASH_BANDS rows each
+
+# Rule-based tag extraction (see scraper/tag_rules.py): weaker matches are left to the LLM
+TAG_RULE_MIN_CONFIDENCE = 0.7
+
+# Request packing (--pack, see scraper/llm_packing.py): listings per request for evaluator/tags
+LLM_PACK_TOKEN_BUDGET = 12000  # estimated input tokens of listing text per request
+LLM_PACK_MAX_ITEMS = 10
+
+# Raw response archive for offline --replay (see scraper/response_archive.py). Set SCRAPER_ARCHIVE=0 to disable.
+ARCHIVE_DIR = os.path.join(DATA_DIR, "archive")
+ARCHIVE_ENABLED = os.environ.get("SCRAPER_ARCHIVE", "1") != "0"
 
 # Target countries for scraping
 TARGET_COUNTRIES = ["BE", "FR", "ES", "PT", "NL", "CH", "LU"]
@@ -10,14 +10,15 @@ Pour les venues qui ont un site web mais pas d'email :
 """
 
 import re
-import time
 from typing import Optional
 from urllib.parse import urljoin, urlparse
 
 import requests
 
 from scraper.retreat_scrapers.retreat_models import RetreatVenueListing
-from scraper.retreat_config import ANTHROPIC_API_KEY, USER_AGENT, REQUEST_TIMEOUT
+from scraper.retreat_config import ANTHROPIC_API_KEY, USER_AGENT
+from scraper.rate_limiter import limited_request
+from scraper.llm_cache import cached_create
 
 try:
     import anthropic
@@ -99,9 +100,9 @@ def _is_valid_phone(phone: str) -> bool:
 
 
 def _fetch_page(url: str, session: requests.Session) -> Optional[str]:
-    """Récupère le contenu HTML d'une page."""
+    """Récupère le contenu HTML d'une page via le limiteur partagé par hôte."""
     try:
-        response = session.get(url, timeout=REQUEST_TIMEOUT)
+        response = limited_request(session, "GET", url)
         response.raise_for_status()
         return response.text
     except Exception:
@@ -246,7 +247,8 @@ Règles:
 - Pour le téléphone, inclus l'indicatif pays si disponible"""
 
     try:
-        response = client.messages.create(
+        response = cached_create(
+            client, "contact_extractor",
             model="claude-haiku-4-5-20251001",
             max_tokens=256,
             messages=[{"role": "user", "content": prompt}],
@@ -319,8 +321,6 @@ def extract_contacts_for_venue(
         if all_emails:
             break
 
-        time.sleep(0.5)
-
     # Fallback AI si pas d'email trouvé et AI activé
     if not all_emails and use_ai:
         html = _fetch_page(base_url, session)
@@ -425,10 +425,6 @@ def extract_contacts(
             print(f"    Erreur: {e}")
             results[venue.id] = {"contact_extraction_status": "failed"}
 
-        # Rate limiting
-        if i < len(to_extract) - 1:
-            time.sleep(1)
-
     extracted = sum(1 for r in results.values() if r.get("contact_extraction_status") == "extracted")
     print(f"  [contact_extractor] Terminé: {extracted}/{len(to_extract)} contacts extraits")
     return results
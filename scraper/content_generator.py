@@ -1,16 +1,19 @@
 """Generate personalized AI titles and descriptions for listings using Claude API."""
 
-import json
-import time
-from typing import Optional, Dict, List
+from typing import Optional, Dict, List, Tuple
 from scraper.models import Listing, Evaluation
 from scraper.config import ANTHROPIC_API_KEY
+from scraper.fingerprint import StalenessReport, make_fingerprint, stale_reason
+from scraper.llm_executor import get_llm_executor
+from scraper.prompt_compaction import COMPACTION_VERSION, compact, compact_description
+from scraper.structured_output import CONTENT_SCHEMA, output_tool, read_content, with_output_tool
 
 try:
     import anthropic
 except ImportError:
     anthropic = None
 
+MODEL = "claude-haiku-4-5-20251001"
 
 CONTENT_GENERATION_SYSTEM = """Tu es un redacteur expert en habitat collaboratif en Europe.
 Tu rediges des titres et descriptions clairs et informatifs pour des annonces de logement communautaire (cohousing, ecovillages, habitat participatif).
@@ -63,23 +66,20 @@ REGLES POUR LA DESCRIPTION:
 - Ne pas repeter le titre"""
 
 
-def generate_content(listing: Listing, evaluation: Optional[Evaluation] = None) -> Optional[dict]:
-    """Generate AI title and description for a single listing."""
-    if not anthropic or not ANTHROPIC_API_KEY:
-        print("  [content_generator] Anthropic API not available, skipping")
-        return None
+CONTENT_TOOL = output_tool("record_content", "Enregistre le titre et la description rédigés.", CONTENT_SCHEMA)
 
-    client = anthropic.Anthropic(api_key=ANTHROPIC_API_KEY)
 
+def _prompt_fields(listing: Listing, evaluation: Optional[Evaluation]) -> dict:
     evaluation_context = ""
-    if evaluation:
+    # A local pre-scorer estimate has no AI summary to build on
+    if evaluation and evaluation.score_source != "prescorer":
         evaluation_context = f"""EVALUATION IA EXISTANTE:
 Score qualite: {evaluation.quality_score}/100
 Resume: {evaluation.quality_summary}
 Points forts: {', '.join(evaluation.highlights)}
 Points negatifs: {', '.join(evaluation.concerns)}"""
 
-    prompt = CONTENT_GENERATION_PROMPT.format(
+    return dict(
         title=listing.title,
         source=listing.source,
         location=listing.location or "Non spécifié",
@@ -87,74 +87,116 @@ Points negatifs: {', '.join(evaluation.concerns)}"""
         price=listing.price or "Non spécifié",
         listing_type=listing.listing_type or "Non spécifié",
         date_published=listing.date_published or "Non spécifié",
-        description=listing.description[:3000],
+        description=compact(listing.description),
         evaluation_context=evaluation_context,
     )
 
-    try:
-        response = client.messages.create(
-            model="claude-haiku-4-5-20251001",
-            max_tokens=512,
-            system=CONTENT_GENERATION_SYSTEM,
-            messages=[{"role": "user", "content": prompt}],
-        )
-
-        text = response.content[0].text.strip()
-
-        # Handle potential markdown code blocks
-        if text.startswith("```"):
-            text = text.split("\n", 1)[1]
-            if text.endswith("```"):
-                text = text[:-3]
-            text = text.strip()
-
-        result = json.loads(text)
-        return {
-            "ai_title": result.get("ai_title", ""),
-            "ai_description": result.get("ai_description", ""),
-        }
-
-    except json.JSONDecodeError as e:
-        print(f"  [content_generator] JSON parse error for {listing.id}: {e}")
+
+def _request_fields(listing: Listing, evaluation: Optional[Evaluation]) -> dict:
+    """_prompt_fields(), recording the description's compaction for the stage report."""
+    fields = _prompt_fields(listing, evaluation)
+    fields["description"] = compact_description("content_generator", listing.description)
+    return fields
+
+
+def content_fingerprint(listing: Listing, evaluation: Optional[Evaluation]) -> str:
+    return make_fingerprint(
+        _prompt_fields(listing, evaluation),
+        CONTENT_GENERATION_SYSTEM + CONTENT_GENERATION_PROMPT + COMPACTION_VERSION,
+        MODEL,
+    )
+
+
+def _build_request(listing: Listing, evaluation: Optional[Evaluation]) -> dict:
+    return with_output_tool(dict(
+        model=MODEL,
+        max_tokens=512,
+        system=CONTENT_GENERATION_SYSTEM,
+        messages=[{"role": "user", "content": CONTENT_GENERATION_PROMPT.format(**_request_fields(listing, evaluation))}],
+    ), CONTENT_TOOL)
+
+
+def _parse_content(listing: Listing, evaluation: Optional[Evaluation], response) -> dict:
+    content = read_content(response)
+    content["content_fingerprint"] = content_fingerprint(listing, evaluation)
+    return content
+
+
+def generate_content(listing: Listing, evaluation: Optional[Evaluation] = None) -> Optional[dict]:
+    """Generate AI title and description for a single listing."""
+    if not anthropic or not ANTHROPIC_API_KEY:
+        print("  [content_generator] Anthropic API not available, skipping")
         return None
+
+    try:
+        response = get_llm_executor().create("content_generator", _build_request(listing, evaluation))
+        return _parse_content(listing, evaluation, response)
     except Exception as e:
         print(f"  [content_generator] Error for {listing.id}: {e}")
         return None
 
 
+def plan_content(
+    listings: List[Listing],
+    evaluations: Dict[str, Evaluation],
+    fused_template: Optional[str] = None,
+) -> Tuple[List[Listing], StalenessReport]:
+    """Select evaluated listings whose AI content is missing or was generated from different inputs
+    (`fused_template`: see plan_evaluations)."""
+    report = StalenessReport("content_generator")
+    to_generate = []
+    for listing in listings:
+        evaluation = evaluations.get(listing.id)
+        if not evaluation:
+            continue
+        current = content_fingerprint(listing, evaluation)
+        if evaluation.ai_title and not evaluation.content_fingerprint:
+            # Generated before fingerprints existed: stamp instead of re-running
+            evaluation.content_fingerprint = current
+            report.adopted += 1
+        stored = evaluation.content_fingerprint if evaluation.ai_title else None
+        reason = stale_reason(stored, current, fused_template)
+        report.add(listing.id, reason)
+        if reason:
+            to_generate.append(listing)
+    return to_generate, report
+
+
 def generate_all_content(
     listings: List[Listing],
     evaluations: Dict[str, Evaluation],
+    fused_template: Optional[str] = None,
 ) -> Dict[str, dict]:
-    """Generate AI content for listings that don't have it yet.
+    """Generate AI content for listings that don't have it yet or whose inputs changed.
 
-    Returns a dict mapping listing_id -> {"ai_title": ..., "ai_description": ...}
+    `fused_template`: content written by that fused prompt counts as up to date.
+
+    Returns a dict mapping listing_id -> {"ai_title": ..., "ai_description": ..., "content_fingerprint": ...}
     """
     results = {}
-    to_generate = [
-        l for l in listings
-        if l.id in evaluations and not evaluations[l.id].ai_title
-    ]
+    to_generate, report = plan_content(listings, evaluations, fused_template)
+    report.print()
 
     if not to_generate:
         print("  [content_generator] No new listings to generate content for")
         return results
 
+    if not anthropic or not ANTHROPIC_API_KEY:
+        print("  [content_generator] Anthropic API not available, skipping")
+        return results
+
     print(f"  [content_generator] Generating content for {len(to_generate)} listings...")
 
-    for i, listing in enumerate(to_generate):
-        print(f"  [content_generator] {i+1}/{len(to_generate)}: {listing.title[:60]}...")
-        evaluation = evaluations.get(listing.id)
-        content = generate_content(listing, evaluation)
+    contents = get_llm_executor().map(
+        "content_generator", to_generate,
+        lambda listing: _build_request(listing, evaluations.get(listing.id)),
+        lambda listing, response: _parse_content(listing, evaluations.get(listing.id), response),
+    )
+    for listing, content in zip(to_generate, contents):
         if content:
             results[listing.id] = content
-            print(f"    Title: {content['ai_title'][:60]}...")
         else:
-            print(f"    Skipped (generation failed)")
-
-        # Rate limiting
-        if i < len(to_generate) - 1:
-            time.sleep(0.5)
+            print(f"    Skipped {listing.id} (generation failed)")
 
     print(f"  [content_generator] Completed: {len(results)} content generations")
     return results
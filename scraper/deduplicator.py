@@ -5,15 +5,23 @@ Stratégies de détection de doublons :
 2. Proximité géographique (<500m) + similarité de nom (Levenshtein < 3) → merge
 3. Même email ou téléphone → merge
 
+La stratégie 2 ne compare pas toutes les paires : les venues sont rangées
+dans une grille de cellules d'au moins 500 m de côté, et chaque venue n'est
+comparée qu'aux venues de sa cellule et des cellules voisines. Les noms des
+paires proches passent ensuite par NameMatcher (scraper/name_matching.py) :
+normalisés une fois, filtres de longueur et de caractères, puis distance
+d'édition bornée.
+
 La fusion garde l'enregistrement le plus complet et comble les champs nuls
 depuis l'enregistrement secondaire.
 """
 
 import math
 import re
-from typing import Optional
+from typing import Iterator, List, Optional, Tuple
 from urllib.parse import urlparse
 
+from scraper.name_matching import NameMatcher
 from scraper.retreat_scrapers.retreat_models import RetreatVenueListing
 
 
@@ -72,6 +80,64 @@ def haversine_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> fl
     return R * c
 
 
+# === Index spatial (grille) ===
+
+EARTH_RADIUS_M = 6371000  # le même que haversine_distance, sinon les cellules sont trop étroites
+# Marge sur la taille des cellules contre les arrondis flottants aux limites
+GRID_MARGIN = 1.001
+
+
+def nearby_pairs(
+    points: List[Tuple[int, float, float]],
+    max_meters: float,
+) -> Iterator[Tuple[int, int, float]]:
+    """Paires (i, j, distance en mètres) de points (id, lat, lon) à moins de `max_meters`.
+
+    Les points sont rangés dans une grille dont les cellules mesurent au
+    moins `max_meters` de côté (la largeur en longitude est calculée à la
+    latitude la plus haute des points). Deux points assez proches sont donc
+    toujours dans la même cellule ou dans deux cellules voisines : seules ces
+    cellules sont comparées, par lots, avec sinus et cosinus précalculés.
+    """
+    if not points:
+        return
+
+    # À moins de `max_meters`, deux points ont un écart de latitude d'au plus max_meters / R radians,
+    # et un écart de longitude d'au plus 2·asin(sin(max_meters / 2R) / cos(latitude)) radians
+    angle = max_meters / EARTH_RADIUS_M
+    cell_lat = math.degrees(angle) * GRID_MARGIN
+    max_abs_lat = min(max(abs(lat) for _, lat, _ in points) + cell_lat, 89.0)
+    cell_lon = math.degrees(2 * math.asin(min(1.0, math.sin(angle / 2) / math.cos(math.radians(max_abs_lat)))))
+    cell_lon *= GRID_MARGIN
+
+    cells: dict[tuple[int, int], list[tuple]] = {}
+    for key, lat, lon in points:
+        phi = math.radians(lat)
+        cell = (math.floor(lat / cell_lat), math.floor(lon / cell_lon))
+        cells.setdefault(cell, []).append((key, phi, math.radians(lon), math.cos(phi)))
+
+    # Cellule elle-même + la moitié des voisines : chaque paire de cellules n'est vue qu'une fois
+    half_neighbours = ((0, 1), (1, -1), (1, 0), (1, 1))
+    for (row, col), members in cells.items():
+        for a in range(len(members)):
+            yield from _pairs_within(members[a], members[a + 1:], max_meters)
+        for d_row, d_col in half_neighbours:
+            others = cells.get((row + d_row, col + d_col))
+            if others:
+                for member in members:
+                    yield from _pairs_within(member, others, max_meters)
+
+
+def _pairs_within(origin: tuple, others: list, max_meters: float) -> Iterator[Tuple[int, int, float]]:
+    """Haversine de `origin` vers tous les `others` (valeurs précalculées)."""
+    key, phi1, lam1, cos1 = origin
+    for other_key, phi2, lam2, cos2 in others:
+        a = math.sin((phi2 - phi1) / 2) ** 2 + cos1 * cos2 * math.sin((lam2 - lam1) / 2) ** 2
+        dist = 2 * EARTH_RADIUS_M * math.asin(min(1.0, math.sqrt(a)))
+        if dist < max_meters:
+            yield key, other_key, dist
+
+
 # === Extraction de domaine ===
 
 def extract_domain(url: Optional[str]) -> Optional[str]:
@@ -216,30 +282,24 @@ def deduplicate(venues: list[RetreatVenueListing]) -> list[RetreatVenueListing]:
                 union(indices[0], indices[i])
                 print(f"  [dedup] Même domaine '{domain}': '{venues[indices[0]].name}' + '{venues[indices[i]].name}'")
 
-    # Stratégie 2 : Proximité géo (<500m) + nom similaire (Levenshtein < 3)
-    for i in range(n):
-        if venues[i].latitude is None or venues[i].longitude is None:
+    # Stratégie 2 : Proximité géo (<500m) + nom similaire (Levenshtein < 3), via la grille spatiale
+    located = [
+        (i, venue.latitude, venue.longitude)
+        for i, venue in enumerate(venues)
+        if venue.latitude is not None and venue.longitude is not None
+    ]
+    # Noms normalisés une seule fois, accents ignorés ; distance bornée à 2 (Levenshtein < 3)
+    names = NameMatcher(max_distance=2, normalize=normalize_name)
+    for i, j, dist in nearby_pairs(located, 500):  # < 500 mètres
+        if find(i) == find(j):
             continue
-        for j in range(i + 1, n):
-            if find(i) == find(j):
-                continue
-            if venues[j].latitude is None or venues[j].longitude is None:
-                continue
-
-            dist = haversine_distance(
-                venues[i].latitude, venues[i].longitude,
-                venues[j].latitude, venues[j].longitude,
+        lev_dist = names.distance(venues[i].name, venues[j].name)
+        if lev_dist is not None:
+            union(i, j)
+            print(
+                f"  [dedup] Proximité ({dist:.0f}m) + nom similaire "
+                f"(lev={lev_dist}): '{venues[i].name}' + '{venues[j].name}'"
             )
-            if dist < 500:  # < 500 mètres
-                name_i = normalize_name(venues[i].name)
-                name_j = normalize_name(venues[j].name)
-                lev_dist = levenshtein_distance(name_i, name_j)
-                if lev_dist < 3:
-                    union(i, j)
-                    print(
-                        f"  [dedup] Proximité ({dist:.0f}m) + nom similaire "
-                        f"(lev={lev_dist}): '{venues[i].name}' + '{venues[j].name}'"
-                    )
 
     # Stratégie 3 : Même email ou téléphone → merge
     for email, indices in email_index.items():
@@ -1,17 +1,24 @@
-"""Clean listing descriptions using Claude LLM to remove web page garbage."""
+"""Clean listing descriptions to remove web page garbage.
+
+Template text learned per source (see scraper/boilerplate.py) is removed
+locally first; only descriptions that still look dirty go to Claude.
+"""
 
-import asyncio
 import json
 import time
-from typing import Optional, List, Dict
+from typing import Optional, List, Dict, Tuple
 from scraper.models import Listing
 from scraper.config import ANTHROPIC_API_KEY
+from scraper.boilerplate import get_boilerplate_model
+from scraper.fingerprint import StalenessReport, make_fingerprint, stale_reason
+from scraper.llm_executor import get_llm_executor
 
 try:
     import anthropic
 except ImportError:
     anthropic = None
 
+MODEL = "claude-haiku-4-5-20251001"
 
 CLEANING_SYSTEM = """Tu es un assistant spécialisé dans le nettoyage de textes d'annonces immobilières extraites de sites web.
 
@@ -73,21 +80,8 @@ def clean_description(listing: Listing) -> Optional[str]:
     if not listing.description or len(listing.description.strip()) < 50:
         return listing.description
 
-    client = anthropic.Anthropic(api_key=ANTHROPIC_API_KEY)
-
-    prompt = CLEANING_PROMPT.format(
-        title=listing.title,
-        description=listing.description,
-    )
-
     try:
-        response = client.messages.create(
-            model="claude-haiku-4-5-20251001",
-            max_tokens=4096,
-            system=CLEANING_SYSTEM,
-            messages=[{"role": "user", "content": prompt}],
-        )
-
+        response = get_llm_executor().create("description_cleaner", _build_request(listing))
         cleaned = response.content[0].text.strip()
 
         if len(cleaned) < len(listing.description) * 0.2:
@@ -102,59 +96,80 @@ def clean_description(listing: Listing) -> Optional[str]:
         return None
 
 
-async def _clean_one_async(client, listing: Listing) -> tuple:
-    """Clean one listing asynchronously. Returns (listing_id, cleaned_text or None)."""
-    if not listing.description or len(listing.description.strip()) < 50:
-        return (listing.id, listing.description)
-
-    prompt = CLEANING_PROMPT.format(
-        title=listing.title,
-        description=listing.description,
+def _build_request(listing: Listing) -> dict:
+    return dict(
+        model=MODEL,
+        max_tokens=4096,
+        system=CLEANING_SYSTEM,
+        messages=[{"role": "user", "content": CLEANING_PROMPT.format(title=listing.title, description=listing.description)}],
     )
 
-    try:
-        response = await client.messages.create(
-            model="claude-haiku-4-5-20251001",
-            max_tokens=4096,
-            system=CLEANING_SYSTEM,
-            messages=[{"role": "user", "content": prompt}],
-        )
 
-        cleaned = response.content[0].text.strip()
+def _parse_cleaned(listing: Listing, response) -> Optional[str]:
+    cleaned = response.content[0].text.strip()
 
-        if len(cleaned) < len(listing.description) * 0.2:
-            print(f"  [description_cleaner] WARNING: suspiciously short for {listing.id}, keeping original")
-            return (listing.id, None)
+    if len(cleaned) < len(listing.description) * 0.2:
+        print(f"  [description_cleaner] WARNING: suspiciously short for {listing.id}, keeping original")
+        return None
 
-        removed = len(listing.description) - len(cleaned)
-        pct = (removed / len(listing.description)) * 100
-        print(f"    {listing.id}: removed {removed} chars ({pct:.0f}%)")
-        return (listing.id, cleaned)
+    removed = len(listing.description) - len(cleaned)
+    pct = (removed / len(listing.description)) * 100
+    print(f"    {listing.id}: removed {removed} chars ({pct:.0f}%)")
+    return cleaned
 
-    except Exception as e:
-        print(f"  [description_cleaner] Error for {listing.id}: {e}")
-        return (listing.id, None)
 
+def cleaning_fingerprint(title: str, description: str) -> str:
+    """Fingerprint of a description as produced by the cleaner (current prompt and model)."""
+    return make_fingerprint({"title": title, "description": description}, CLEANING_SYSTEM + CLEANING_PROMPT, MODEL)
 
-async def _clean_batch_async(listings: List[Listing], batch_size: int = 10) -> Dict[str, str]:
-    """Clean listings in concurrent batches using async API."""
-    client = anthropic.AsyncAnthropic(api_key=ANTHROPIC_API_KEY)
-    results = {}
-    total = len(listings)
 
-    for batch_start in range(0, total, batch_size):
-        batch = listings[batch_start:batch_start + batch_size]
-        batch_end = min(batch_start + batch_size, total)
-        print(f"  [description_cleaner] Batch {batch_start+1}-{batch_end}/{total}...")
+def apply_cleaned(listing: Listing, cleaned: str):
+    """Store a cleaned description and stamp it so it is not sent again."""
+    listing.description = cleaned
+    listing.clean_fingerprint = cleaning_fingerprint(listing.title, cleaned)
 
-        tasks = [_clean_one_async(client, listing) for listing in batch]
-        batch_results = await asyncio.gather(*tasks)
 
-        for listing_id, cleaned in batch_results:
-            if cleaned:
-                results[listing_id] = cleaned
+def plan_cleaning(
+    listings: List[Listing],
+    force: bool = False,
+) -> Tuple[List[Listing], StalenessReport]:
+    """Select listings to clean.
+
+    A listing is cleaned when it looks like it has web garbage (or `force`)
+    and its current description is not the output of a previous cleaning
+    with the same prompt and model.
+    """
+    report = StalenessReport("description_cleaner")
+    to_clean = []
+    for listing in listings:
+        if not force and not _has_web_garbage(listing.description):
+            report.add(listing.id, None)
+            continue
+        current = cleaning_fingerprint(listing.title, listing.description)
+        reason = stale_reason(listing.clean_fingerprint, current)
+        report.add(listing.id, reason)
+        if reason:
+            to_clean.append(listing)
+    return to_clean, report
 
-    return results
+
+def strip_boilerplate(listings: List[Listing], learn: bool = True) -> Tuple[List[Listing], Dict[str, str]]:
+    """Remove learned template lines from descriptions.
+
+    Returns the listings with their stripped description (copies, only for
+    listings that changed) and {listing_id: stripped description}. With
+    `learn`, listings not seen before are added to the model first.
+    """
+    model = get_boilerplate_model()
+    if learn and model.learn(listings):
+        model.save()
+
+    stripped = {}
+    for listing in listings:
+        text = model.strip(listing.source, listing.description)
+        if text != listing.description:
+            stripped[listing.id] = text
+    return [l.model_copy(update={"description": stripped[l.id]}) if l.id in stripped else l for l in listings], stripped
 
 
 def clean_all_descriptions(
@@ -165,30 +180,51 @@ def clean_all_descriptions(
 
     Args:
         listings: List of listings to clean
-        force: If True, clean all listings. If False, only clean listings
-               that appear to have web garbage (heuristic detection).
+        force: If True, send all listings to the LLM. If False, only listings
+               that still appear to have web garbage (heuristic detection)
+               once the learned boilerplate is removed. Either way,
+               descriptions already cleaned with the current prompt and
+               model are skipped (see plan_cleaning).
 
     Returns:
-        Dict mapping listing_id -> cleaned_description
+        Dict mapping listing_id -> cleaned_description; apply with apply_cleaned()
     """
-    if not anthropic or not ANTHROPIC_API_KEY:
-        print("  [description_cleaner] Anthropic API not available, skipping all")
-        return {}
+    listings, stripped = strip_boilerplate(listings)
+    lines = sum(get_boilerplate_model().stats().values())
+    print(f"  [description_cleaner] Boilerplate ({lines} learned lines) removed from {len(stripped)} descriptions")
 
-    to_clean = []
-    for listing in listings:
-        if force or _has_web_garbage(listing.description):
-            to_clean.append(listing)
+    to_clean, report = plan_cleaning(listings, force)
+    report.print()
+
+    # Stripped descriptions that still need the LLM are only stored once it has cleaned them
+    planned = {l.id for l in to_clean}
+    results = {listing_id: text for listing_id, text in stripped.items() if listing_id not in planned}
 
     if not to_clean:
-        print("  [description_cleaner] No descriptions need cleaning")
-        return {}
+        print("  [description_cleaner] No descriptions need LLM cleaning")
+        return results
+
+    if not anthropic or not ANTHROPIC_API_KEY:
+        print("  [description_cleaner] Anthropic API not available, skipping LLM cleaning")
+        return results
+
+    # Short descriptions are kept as they are (and stamped, so they are not planned again)
+    short = {l.id: l.description for l in to_clean if not l.description or len(l.description.strip()) < 50}
+    results.update(short)
+    to_clean = [l for l in to_clean if l.id not in short]
+    print(f"  [description_cleaner] Cleaning {len(to_clean)} descriptions...")
+
+    cleaned = 0
 
-    print(f"  [description_cleaner] Cleaning {len(to_clean)} descriptions (async batches of 10)...")
+    def collect(listing: Listing, text: Optional[str]):
+        nonlocal cleaned
+        if text:
+            results[listing.id] = text
+            cleaned += 1
 
-    results = asyncio.run(_clean_batch_async(to_clean, batch_size=10))
+    get_llm_executor().map("description_cleaner", to_clean, _build_request, _parse_cleaned, on_result=collect)
 
-    print(f"  [description_cleaner] Completed: {len(results)} descriptions cleaned")
+    print(f"  [description_cleaner] Completed: {len(stripped)} by boilerplate removal, {cleaned} by the LLM")
     return results
 
 
@@ -1,22 +1,40 @@
-import json
-import time
-from typing import Optional, Dict, List
+from typing import Optional, Dict, List, Tuple
 from scraper.models import Listing, Evaluation
 from scraper.config import ANTHROPIC_API_KEY
+from scraper.fingerprint import StalenessReport, make_fingerprint, stale_reason
+from scraper.llm_executor import get_llm_executor
+from scraper.prescorer import Prediction, PreScorer, get_prescorer
+from scraper.prompt_compaction import COMPACTION_VERSION, compact, compact_description
+from scraper.structured_output import (
+    InvalidOutput,
+    keyed_results_schema,
+    output_schema,
+    output_tool,
+    response_object,
+    with_output_tool,
+)
+from scraper.llm_packing import (
+    cached_system,
+    estimate_tokens,
+    map_packed,
+    packed_listing_block,
+    packed_max_tokens,
+    packing_enabled,
+    unescape_template,
+)
 
 try:
     import anthropic
 except ImportError:
     anthropic = None
 
+MODEL = "claude-haiku-4-5-20251001"
 
 QUALITY_SYSTEM_PROMPT = """Tu es un évaluateur expert en habitat collaboratif en Europe (cohousing, écovillages, habitat participatif, coopératives d'habitation).
 Tu évalues la qualité et la complétude des annonces de manière objective et neutre — sans biais vers un profil d'utilisateur spécifique.
 Réponds TOUJOURS en français."""
 
-QUALITY_EVALUATION_PROMPT = """Évalue la qualité et la complétude de cette annonce d'habitat collaboratif.
-
-ANNONCE:
+QUALITY_LISTING_TEMPLATE = """ANNONCE:
 Titre: {title}
 Source: {source}
 Lieu: {location}
@@ -28,9 +46,9 @@ Date de publication: {date_published}
 Description:
 {description}
 
-URL: {source_url}
+URL: {source_url}"""
 
-Réponds UNIQUEMENT en JSON valide (pas de texte avant ou après):
+QUALITY_RUBRIC = """Réponds UNIQUEMENT en JSON valide (pas de texte avant ou après):
 {{
     "quality_score": <nombre entier de 0 à 100>,
     "quality_summary": "<résumé objectif de 2-3 phrases décrivant ce que propose ce projet>",
@@ -64,15 +82,31 @@ QUALITÉ DES DONNÉES (data_quality_score, 0-10):
 - 4-6: description correcte mais manque des infos importantes
 - 7-10: description détaillée, prix indiqué, contact disponible, localisation précise"""
 
+QUALITY_EVALUATION_PROMPT = (
+    "Évalue la qualité et la complétude de cette annonce d'habitat collaboratif.\n\n"
+    + QUALITY_LISTING_TEMPLATE + "\n\n" + QUALITY_RUBRIC
+)
 
-def evaluate_listing(listing: Listing) -> Optional[Evaluation]:
-    if not anthropic or not ANTHROPIC_API_KEY:
-        print("  [evaluator] Anthropic API not available, skipping evaluation")
-        return None
+# Packing mode (--pack): the rubric moves to a cached system prompt, listings follow in the user turn
+PACKED_QUALITY_SYSTEM = QUALITY_SYSTEM_PROMPT + """
+
+Tu reçois plusieurs annonces, chacune précédée de son identifiant ("=== listing_id: ... ===").
+Évalue chaque annonce indépendamment selon les consignes ci-dessous.
+Réponds UNIQUEMENT avec un tableau JSON contenant un objet par annonce, chaque objet reprenant son "listing_id" exact en plus des champs décrits.
+
+""" + unescape_template(QUALITY_RUBRIC)
 
-    client = anthropic.Anthropic(api_key=ANTHROPIC_API_KEY)
 
-    prompt = QUALITY_EVALUATION_PROMPT.format(
+# The answer is forced through a tool whose schema comes from the Evaluation model
+EVALUATION_SCHEMA = output_schema(Evaluation)
+EVALUATION_TOOL = output_tool("record_evaluation", "Enregistre l'évaluation de l'annonce.", EVALUATION_SCHEMA)
+PACKED_EVALUATION_TOOL = output_tool(
+    "record_evaluations", "Enregistre l'évaluation de chaque annonce.", keyed_results_schema(EVALUATION_SCHEMA)
+)
+
+
+def _prompt_fields(listing: Listing) -> dict:
+    return dict(
         title=listing.title,
         source=listing.source,
         location=listing.location or "Non spécifié",
@@ -81,29 +115,44 @@ def evaluate_listing(listing: Listing) -> Optional[Evaluation]:
         price=listing.price or "Non spécifié",
         listing_type=listing.listing_type or "Non spécifié",
         date_published=listing.date_published or "Non spécifié",
-        description=listing.description[:3000],
+        description=compact(listing.description),
         source_url=listing.source_url,
     )
 
-    try:
-        response = client.messages.create(
-            model="claude-haiku-4-5-20251001",
-            max_tokens=1024,
-            system=QUALITY_SYSTEM_PROMPT,
-            messages=[{"role": "user", "content": prompt}],
-        )
 
-        text = response.content[0].text.strip()
+def _request_fields(listing: Listing) -> dict:
+    """_prompt_fields(), recording the description's compaction for the stage report."""
+    fields = _prompt_fields(listing)
+    fields["description"] = compact_description("evaluator", listing.description)
+    return fields
+
 
-        # Handle potential markdown code blocks
-        if text.startswith("```"):
-            text = text.split("\n", 1)[1]
-            if text.endswith("```"):
-                text = text[:-3]
-            text = text.strip()
+def evaluation_fingerprint(listing: Listing) -> str:
+    return make_fingerprint(
+        _prompt_fields(listing), QUALITY_SYSTEM_PROMPT + QUALITY_EVALUATION_PROMPT + COMPACTION_VERSION, MODEL
+    )
 
-        result = json.loads(text)
 
+def prescore_fingerprint(listing: Listing, scorer: PreScorer) -> str:
+    """Fingerprint of a local estimate: same inputs, but the pre-scorer model instead of the LLM."""
+    return make_fingerprint(_prompt_fields(listing), ",".join(scorer.data["features"]), scorer.model_name)
+
+
+def _build_request(listing: Listing) -> dict:
+    return with_output_tool(dict(
+        model=MODEL,
+        max_tokens=1024,
+        system=QUALITY_SYSTEM_PROMPT,
+        messages=[{"role": "user", "content": QUALITY_EVALUATION_PROMPT.format(**_request_fields(listing))}],
+    ), EVALUATION_TOOL)
+
+
+def _parse_evaluation(listing: Listing, response) -> Evaluation:
+    return _evaluation_from_result(listing, response_object(response))
+
+
+def _evaluation_from_result(listing: Listing, result: dict) -> Evaluation:
+    try:
         return Evaluation(
             listing_id=listing.id,
             quality_score=max(0, min(100, result["quality_score"])),
@@ -112,42 +161,150 @@ def evaluate_listing(listing: Listing) -> Optional[Evaluation]:
             concerns=result.get("concerns", []),
             availability_status=result.get("availability_status", "unknown"),
             data_quality_score=max(0, min(10, result.get("data_quality_score", 5))),
+            input_fingerprint=evaluation_fingerprint(listing),
         )
+    except (KeyError, TypeError, ValueError) as e:
+        raise InvalidOutput(f"{type(e).__name__}: {e}")
+
+
+def _local_evaluation(listing: Listing, prediction: Prediction, scorer: PreScorer) -> Evaluation:
+    """Evaluation from the pre-scorer: scores only, with the missing basics as concerns."""
+    missing = [
+        label for label, present in (
+            ("Prix non indiqué", listing.price or listing.price_amount),
+            ("Lieu non précisé", listing.location),
+            ("Date de publication inconnue", listing.date_published),
+            ("Pas de photos", listing.images),
+        ) if not present
+    ]
+    return Evaluation(
+        listing_id=listing.id,
+        quality_score=prediction.quality_score,
+        quality_summary=f"Score estimé localement d'après la complétude de l'annonce "
+                        f"(confiance {prediction.confidence:.0%}), sans évaluation IA.",
+        concerns=missing,
+        data_quality_score=prediction.data_quality_score,
+        input_fingerprint=prescore_fingerprint(listing, scorer),
+        score_source="prescorer",
+    )
+
+
+def _build_packed_request(group: List[Listing]) -> dict:
+    listings = "\n\n".join(
+        packed_listing_block(listing.id, QUALITY_LISTING_TEMPLATE.format(**_request_fields(listing)))
+        for listing in group
+    )
+    return with_output_tool(dict(
+        model=MODEL,
+        max_tokens=packed_max_tokens(group, 600),
+        system=cached_system(PACKED_QUALITY_SYSTEM, MODEL),
+        messages=[{"role": "user", "content": listings}],
+    ), PACKED_EVALUATION_TOOL)
+
+
+def _packed_cost(listing: Listing) -> int:
+    return estimate_tokens(QUALITY_LISTING_TEMPLATE.format(**_request_fields(listing)))
+
 
-    except json.JSONDecodeError as e:
-        print(f"  [evaluator] JSON parse error for {listing.id}: {e}")
-        print(f"  [evaluator] Raw response: {text[:200]}")
+def evaluate_listing(listing: Listing) -> Optional[Evaluation]:
+    if not anthropic or not ANTHROPIC_API_KEY:
+        print("  [evaluator] Anthropic API not available, skipping evaluation")
         return None
+
+    try:
+        response = get_llm_executor().create("evaluator", _build_request(listing))
+        return _parse_evaluation(listing, response)
     except Exception as e:
         print(f"  [evaluator] Error evaluating {listing.id}: {e}")
         return None
 
 
+def plan_evaluations(
+    listings: List[Listing],
+    existing_evaluations: Dict[str, Evaluation],
+    fused_template: Optional[str] = None,
+) -> Tuple[List[Listing], StalenessReport]:
+    """Select listings whose evaluation is missing or was made from different inputs.
+
+    `fused_template` is the fused prompt evaluations are produced with, if any
+    (see stale_reason).
+
+    Local estimates (score_source="prescorer") only stay current while
+    prescoring is on with the same pre-scorer model; otherwise they are
+    re-evaluated like missing ones.
+    """
+    report = StalenessReport("evaluator")
+    to_evaluate = []
+    scorer = get_prescorer()
+    for listing in listings:
+        current = evaluation_fingerprint(listing)
+        evaluation = existing_evaluations.get(listing.id)
+        if evaluation and evaluation.score_source == "prescorer":
+            if scorer:
+                reason = stale_reason(evaluation.input_fingerprint, prescore_fingerprint(listing, scorer))
+            else:
+                reason = "estimated locally"
+            report.add(listing.id, reason)
+            if reason:
+                to_evaluate.append(listing)
+            continue
+        if evaluation and not evaluation.input_fingerprint:
+            # Evaluated before fingerprints existed: stamp it instead of paying for a re-run
+            evaluation.input_fingerprint = current
+            report.adopted += 1
+        reason = stale_reason(evaluation.input_fingerprint if evaluation else None, current, fused_template)
+        report.add(listing.id, reason)
+        if reason:
+            to_evaluate.append(listing)
+    return to_evaluate, report
+
+
+def prescore(listings: List[Listing]) -> Tuple[List[Listing], List[Evaluation]]:
+    """(listings the LLM must evaluate, local evaluations of the others) with --prescore; else all go to the LLM."""
+    scorer = get_prescorer()
+    if not scorer or not listings:
+        return listings, []
+    to_llm, local = scorer.split(listings)
+    return to_llm, [_local_evaluation(listing, prediction, scorer) for listing, prediction in local]
+
+
 def evaluate_all(
     listings: List[Listing],
     existing_evaluations: Dict[str, Evaluation],
 ) -> List[Evaluation]:
     new_evaluations = []
-    to_evaluate = [l for l in listings if l.id not in existing_evaluations]
+    to_evaluate, report = plan_evaluations(listings, existing_evaluations)
+    report.print()
 
     if not to_evaluate:
         print("  [evaluator] No new listings to evaluate")
         return new_evaluations
 
-    print(f"  [evaluator] Evaluating {len(to_evaluate)} new listings...")
+    to_evaluate, local = prescore(to_evaluate)
+    new_evaluations.extend(local)
+    if not to_evaluate:
+        return new_evaluations
+
+    if not anthropic or not ANTHROPIC_API_KEY:
+        print("  [evaluator] Anthropic API not available, skipping evaluation")
+        return new_evaluations
+
+    print(f"  [evaluator] Evaluating {len(to_evaluate)} new or stale listings...")
 
-    for i, listing in enumerate(to_evaluate):
-        print(f"  [evaluator] {i+1}/{len(to_evaluate)}: {listing.title[:60]}...")
-        evaluation = evaluate_listing(listing)
+    if packing_enabled():
+        results = map_packed("evaluator", to_evaluate, _build_packed_request, _evaluation_from_result, _packed_cost)
+        # Listings the packed answers never covered go one per request
+        unpacked = [listing for listing, evaluation in zip(to_evaluate, results) if evaluation is None]
+        if unpacked:
+            retried = iter(get_llm_executor().map("evaluator", unpacked, _build_request, _parse_evaluation))
+            results = [evaluation or next(retried) for evaluation in results]
+    else:
+        results = get_llm_executor().map("evaluator", to_evaluate, _build_request, _parse_evaluation)
+    for listing, evaluation in zip(to_evaluate, results):
         if evaluation:
             new_evaluations.append(evaluation)
-            print(f"    Score: {evaluation.quality_score}/100 - {evaluation.quality_summary[:80]}...")
         else:
-            print(f"    Skipped (evaluation failed)")
-
-        # Rate limiting
-        if i < len(to_evaluate) - 1:
-            time.sleep(1)
+            print(f"    Skipped {listing.id} (evaluation failed)")
 
     print(f"  [evaluator] Completed: {len(new_evaluations)} evaluations")
     return new_evaluations
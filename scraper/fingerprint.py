@@ -0,0 +1,89 @@
+"""Content fingerprints for memoizing per-listing LLM stages.
+
+A fingerprint has three parts: a hash of the exact listing fields a stage
+sends to the model, a hash of the prompt templates, and the model name.
+Stage outputs store the fingerprint they were produced from; a stage only
+re-runs for a listing when the current fingerprint differs, and the differing
+parts say why. Outputs of a fused prompt (see scraper/listing_analyzer.py)
+hash that prompt along with the stage's own.
+"""
+
+import hashlib
+import json
+from collections import Counter
+from typing import Dict, List, Optional
+
+
+def _short_hash(value) -> str:
+    data = json.dumps(value, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()[:16]
+
+
+def make_fingerprint(inputs: dict, template: str, model: str) -> str:
+    return f"{_short_hash(inputs)}:{_short_hash(template)}:{model}"
+
+
+def fused_fingerprint(fingerprint: str, template: str) -> str:
+    """`fingerprint` of a stage, for its output produced by a fused prompt `template` instead."""
+    inputs, stage_template, model = fingerprint.split(":", 2)
+    return f"{inputs}:{_short_hash([stage_template, template])}:{model}"
+
+
+def stale_reason(stored: Optional[str], current: str, fused_template: Optional[str] = None) -> Optional[str]:
+    """Why an output stamped `stored` is out of date, or None if it is current.
+
+    With `fused_template` the output is produced by that fused prompt: it must
+    carry fused_fingerprint(current, fused_template), though an output of the
+    stage's own prompt is current as well.
+    """
+    if not stored:
+        return "new"
+    if fused_template is not None:
+        if stored == current:
+            return None
+        current = fused_fingerprint(current, fused_template)
+    if stored == current:
+        return None
+    old = stored.split(":", 2)
+    new = current.split(":", 2)
+    if len(old) != 3:
+        return "unknown fingerprint"
+    reasons = [
+        label for label, a, b in zip(("input changed", "prompt changed", "model changed"), old, new)
+        if a != b
+    ]
+    return ", ".join(reasons)
+
+
+class StalenessReport:
+    """Per-stage tally of stale items by reason, with a few example IDs."""
+
+    def __init__(self, stage: str):
+        self.stage = stage
+        self.reasons: Counter = Counter()
+        self.examples: Dict[str, List[str]] = {}
+        self.current = 0
+        self.adopted = 0
+
+    def add(self, item_id: str, reason: Optional[str]):
+        if reason is None:
+            self.current += 1
+            return
+        self.reasons[reason] += 1
+        examples = self.examples.setdefault(reason, [])
+        if len(examples) < 5:
+            examples.append(item_id)
+
+    @property
+    def stale(self) -> int:
+        return sum(self.reasons.values())
+
+    def print(self, verbose: bool = False):
+        detail = ", ".join(f"{reason}: {n}" for reason, n in self.reasons.most_common())
+        line = f"  [{self.stage}] {self.stale} stale ({detail or 'none'}), {self.current} up to date"
+        if self.adopted:
+            line += f", {self.adopted} stamped without re-running"
+        print(line)
+        if verbose:
+            for reason, ids in self.examples.items():
+                print(f"      {reason}: {', '.join(ids)}{' ...' if self.reasons[reason] > len(ids) else ''}")
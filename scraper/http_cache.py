@@ -0,0 +1,133 @@
+"""Persistent on-disk HTTP cache with conditional GET revalidation.
+
+Pages served with an ETag or Last-Modified header are stored (body
+zlib-compressed) in a small SQLite database. On the next visit the scraper
+sends If-None-Match / If-Modified-Since; a 304 answer is turned back into a
+full response built from the stored body, flagged with `from_cache = True`
+so callers can skip re-parsing pages that have not changed.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Dict, NamedTuple, Optional
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from scraper.config import HTTP_CACHE_ENABLED, HTTP_CACHE_FILE
+
+
+class CachedPage(NamedTuple):
+    url: str
+    etag: Optional[str]
+    last_modified: Optional[str]
+    content_type: Optional[str]
+    encoding: Optional[str]
+    body: bytes
+    fetched_at: float
+
+    def conditional_headers(self) -> Dict[str, str]:
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+    def to_response(self) -> requests.Response:
+        """Rebuild a 200 response from the stored body."""
+        response = requests.Response()
+        response.status_code = 200
+        response.url = self.url
+        response._content = self.body
+        response.encoding = self.encoding
+        response.headers = CaseInsensitiveDict()
+        if self.content_type:
+            response.headers["Content-Type"] = self.content_type
+        if self.etag:
+            response.headers["ETag"] = self.etag
+        if self.last_modified:
+            response.headers["Last-Modified"] = self.last_modified
+        response.from_cache = True
+        return response
+
+
+class HttpCache:
+    """Thread-safe SQLite store of validators and bodies keyed by URL."""
+
+    def __init__(self, path: str = HTTP_CACHE_FILE):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS pages (
+                url TEXT PRIMARY KEY,
+                etag TEXT,
+                last_modified TEXT,
+                content_type TEXT,
+                encoding TEXT,
+                body BLOB NOT NULL,
+                fetched_at REAL NOT NULL,
+                validated_at REAL NOT NULL
+            )"""
+        )
+        self._conn.commit()
+
+    def get(self, url: str) -> Optional[CachedPage]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT url, etag, last_modified, content_type, encoding, body, fetched_at "
+                "FROM pages WHERE url = ?",
+                (url,),
+            ).fetchone()
+        if not row:
+            return None
+        return CachedPage(*row[:5], zlib.decompress(row[5]), row[6])
+
+    def put(self, url: str, response: requests.Response) -> bool:
+        """Store a response if it carries a validator. Returns True if stored."""
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        if not etag and not last_modified:
+            return False
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    url,
+                    etag,
+                    last_modified,
+                    response.headers.get("Content-Type"),
+                    response.encoding,
+                    zlib.compress(response.content),
+                    now,
+                    now,
+                ),
+            )
+            self._conn.commit()
+        return True
+
+    def touch(self, url: str):
+        """Record a successful revalidation (304)."""
+        with self._lock:
+            self._conn.execute("UPDATE pages SET validated_at = ? WHERE url = ?", (time.time(), url))
+            self._conn.commit()
+
+
+_cache: Optional[HttpCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_http_cache() -> Optional[HttpCache]:
+    """Return the process-wide cache, or None when disabled."""
+    global _cache
+    if not HTTP_CACHE_ENABLED:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = HttpCache()
+        return _cache
@@ -17,6 +17,7 @@ from urllib.parse import urlparse
 import requests
 
 from scraper.config import ANTHROPIC_API_KEY, REQUEST_TIMEOUT, USER_AGENT
+from scraper.llm_cache import acached_create
 
 try:
     from PIL import Image
@@ -237,7 +238,8 @@ async def _classify_batch_vision(
     content.append({"type": "text", "text": VISION_PROMPT})
 
     try:
-        response = await client.messages.create(
+        response = await acached_create(
+            client, "image_filter",
             model=config.vision_model,
             max_tokens=256,
             system=VISION_SYSTEM,
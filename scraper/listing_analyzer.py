@@ -0,0 +1,293 @@
+"""Fused listing analysis: evaluation, tags and AI content from one Claude call.
+
+The evaluator, tag extractor and content generator each send the same
+description to the model. With --fused, main.py replaces those three stages
+by a single "analyze" stage that asks for all three sections at once and
+validates each one against the existing pydantic models (Evaluation,
+ListingTags) on its own.
+
+A section that fails validation is redone by its regular per-part stage, so
+a bad tags block never costs the evaluation. Listings that only miss one
+part (e.g. tags after a tag prompt change) skip the fused call and go to
+that part's stage directly.
+
+Results are stamped with the per-stage fingerprints combined with the fused
+prompt (fused_fingerprint): editing ANALYSIS_PROMPT re-runs them, and a run
+without --fused redoes them with the per-part stages. Outputs of those stages
+(fallbacks, or earlier runs without --fused) stay up to date under --fused.
+"""
+
+from typing import Dict, List, Tuple
+
+from pydantic import ValidationError
+
+from scraper.config import ANTHROPIC_API_KEY
+from scraper.content_generator import content_fingerprint, generate_all_content, plan_content
+from scraper.evaluator import evaluate_all, evaluation_fingerprint, plan_evaluations, prescore
+from scraper.fingerprint import fused_fingerprint
+from scraper.llm_executor import get_llm_executor
+from scraper.models import Evaluation, Listing, ListingTags
+from scraper.prompt_compaction import compact_description
+from scraper.structured_output import (
+    CONTENT_SCHEMA,
+    InvalidOutput,
+    content_from,
+    output_schema,
+    output_tool,
+    response_object,
+    validate,
+    with_output_tool,
+)
+from scraper.tag_extractor import TAG_FIELDS, extract_all_tags, plan_tags, tags_fingerprint
+from scraper.tag_rules import apply_rule_tags, extract_rule_tags, record_llm_provenance
+
+try:
+    import anthropic
+except ImportError:
+    anthropic = None
+
+MODEL = "claude-haiku-4-5-20251001"
+
+ANALYSIS_SYSTEM = """Tu es un expert en habitat collaboratif en Europe (cohousing, écovillages, habitat participatif, coopératives d'habitation).
+Pour chaque annonce, tu fais en une seule fois trois choses: une évaluation objective de sa qualité, une extraction de métadonnées structurées, et la rédaction d'un titre et d'une description courts.
+Ton style est factuel et neutre, sans marketing ni adresse directe au lecteur.
+Réponds TOUJOURS en français et UNIQUEMENT en JSON valide, sans aucun texte avant ou après."""
+
+ANALYSIS_PROMPT = """Analyse cette annonce d'habitat collaboratif.
+
+ANNONCE:
+Titre: {title}
+Source: {source}
+Lieu: {location}
+Pays: {country}
+Province/Région: {province}
+Prix: {price}
+Type: {listing_type}
+Date de publication: {date_published}
+Description:
+{description}
+
+URL: {source_url}
+
+Réponds UNIQUEMENT en JSON valide avec exactement ces trois sections:
+{{
+    "evaluation": {{
+        "quality_score": <nombre entier de 0 à 100>,
+        "quality_summary": "<résumé objectif de 2-3 phrases décrivant ce que propose ce projet>",
+        "highlights": ["<point fort objectif>", ...],
+        "concerns": ["<faiblesse ou info manquante>", ...],
+        "availability_status": "<likely_available | possibly_expired | unknown>",
+        "data_quality_score": <0-10>
+    }},
+    "tags": {{
+        "group_size": <nombre de personnes/ménages ou null>,
+        "age_range": [<parmi: "intergenerational", "seniors", "families", "young_adults">],
+        "has_children": <true/false/null>,
+        "family_types": [<parmi: "singles", "couples", "families", "retirees">],
+        "project_types": [<parmi: "habitat_groupe", "ecolieu", "cooperative", "habitat_leger", "colocation", "intergenerational", "community_creation">],
+        "pets_allowed": <true/false/null>,
+        "pet_details": [<parmi: "dogs", "cats", "poultry", "horses", "farm_animals">],
+        "surface_m2": <nombre ou null>,
+        "num_bedrooms": <nombre ou null>,
+        "unit_type": <"studio"|"apartment"|"house"|"room"|"tiny_house"|"other"|null>,
+        "furnished": <true/false/null>,
+        "accessible_pmr": <true/false/null>,
+        "shared_spaces": [<parmi: "garden", "vegetable_garden", "kitchen", "common_room", "laundry", "workshop", "parking", "coworking", "play_area">],
+        "values": [<parmi: "ecological", "permaculture", "spiritual", "solidarity", "artistic", "self_sufficiency", "biodanza", "meditation", "organic">],
+        "shared_meals": <"daily"|"weekly"|"occasional"|null>,
+        "has_charter": <true/false/null>,
+        "governance": <"consensus"|"sociocracy"|"association"|null>,
+        "environment": <"rural"|"urban"|"suburban"|null>,
+        "near_nature": <true/false/null>,
+        "near_transport": <true/false/null>
+    }},
+    "content": {{
+        "ai_title": "<titre, max 80 caractères, qui décrit clairement l'offre>",
+        "ai_description": "<description factuelle de 2-3 phrases>"
+    }}
+}}
+
+ÉVALUATION:
+- quality_score: 80-100 annonce complète (description détaillée, lieu précis, prix, contact, projet actif); 60-79 manque un élément clé; 40-59 information modérée; 20-39 vague; 0-19 quasi rien d'utile
+- Valorise: description du projet, vie communautaire, espaces partagés, gouvernance, valeurs, prix clair, contact
+- availability_status: "likely_available" si récente (< 6 mois) et langage actif; "possibly_expired" si ancienne (> 12 mois) ou projet complet; sinon "unknown"
+- data_quality_score: 0-3 vague; 4-6 correcte mais incomplète; 7-10 détaillée avec prix, contact et lieu précis
+
+TAGS:
+- Uniquement ce qui est explicitement mentionné ou très fortement impliqué; sinon null ou []
+- "animaux bienvenus" => pets_allowed true; "pas d'animaux" => false
+- village/campagne => "rural"; centre-ville => "urban"; périphérie => "suburban"
+- "potager" => "vegetable_garden"; "jardin" sans précision => "garden"
+
+CONTENU:
+- Titre court, style "[Type de lieu] à [Lieu] - [caractéristique clé]", lieu et taille du groupe si connus, pas d'emojis
+- Description: "Ce projet propose...", aspects concrets (personnes, espaces partagés, prix), limites honnêtes, sans répéter le titre"""
+
+
+# What fused outputs were produced with, on top of each stage's own prompt
+ANALYSIS_TEMPLATE = ANALYSIS_SYSTEM + ANALYSIS_PROMPT
+
+# The three sections are forced through one tool, built from the per-stage schemas
+ANALYSIS_TOOL = output_tool(
+    "record_analysis",
+    "Enregistre l'évaluation, les tags et le contenu rédigé de l'annonce.",
+    {
+        "type": "object",
+        "properties": {
+            "evaluation": output_schema(Evaluation),
+            "tags": output_schema(ListingTags),
+            "content": CONTENT_SCHEMA,
+        },
+        "required": ["evaluation", "tags", "content"],
+    },
+)
+
+
+def _prompt_fields(listing: Listing) -> dict:
+    return dict(
+        title=listing.title,
+        source=listing.source,
+        location=listing.location or "Non spécifié",
+        country=listing.country or "Non spécifié",
+        province=listing.province or "Non spécifié",
+        price=listing.price or "Non spécifié",
+        listing_type=listing.listing_type or "Non spécifié",
+        date_published=listing.date_published or "Non spécifié",
+        description=compact_description("listing_analyzer", listing.description),
+        source_url=listing.source_url,
+    )
+
+
+def _build_request(listing: Listing) -> dict:
+    return with_output_tool(dict(
+        model=MODEL,
+        max_tokens=2048,
+        system=ANALYSIS_SYSTEM,
+        messages=[{"role": "user", "content": ANALYSIS_PROMPT.format(**_prompt_fields(listing))}],
+    ), ANALYSIS_TOOL)
+
+
+def _parse_analysis(listing: Listing, response) -> Dict[str, object]:
+    """Validate each section independently; a failed section comes back as None.
+
+    Only an answer with no usable section at all raises InvalidOutput.
+    """
+    result = response_object(response)
+    parts = {"evaluation": None, "tags": None, "content": None}
+
+    try:
+        data = result["evaluation"]
+        parts["evaluation"] = Evaluation(
+            listing_id=listing.id,
+            quality_score=max(0, min(100, data["quality_score"])),
+            quality_summary=data["quality_summary"],
+            highlights=data.get("highlights", []),
+            concerns=data.get("concerns", []),
+            availability_status=data.get("availability_status", "unknown"),
+            data_quality_score=max(0, min(10, data.get("data_quality_score", 5))),
+            input_fingerprint=fused_fingerprint(evaluation_fingerprint(listing), ANALYSIS_TEMPLATE),
+        )
+    except (KeyError, TypeError, ValidationError) as e:
+        print(f"  [listing_analyzer] Invalid evaluation for {listing.id}: {e}")
+
+    try:
+        data = result.get("tags")
+        if not isinstance(data, dict):
+            raise InvalidOutput("missing tags")
+        tags = validate(
+            ListingTags, data, listing_id=listing.id,
+            input_fingerprint=fused_fingerprint(tags_fingerprint(listing), ANALYSIS_TEMPLATE),
+        )
+        parts["tags"] = apply_rule_tags(record_llm_provenance(tags, TAG_FIELDS), extract_rule_tags(listing))
+    except InvalidOutput as e:
+        print(f"  [listing_analyzer] Invalid tags for {listing.id}: {e}")
+
+    try:
+        parts["content"] = content_from(result.get("content"))
+    except InvalidOutput:
+        print(f"  [listing_analyzer] Invalid content for {listing.id}")
+
+    if not any(parts.values()):
+        raise InvalidOutput("no valid section in the analysis")
+    return parts
+
+
+def analyze_all(
+    listings: List[Listing],
+    evaluations: Dict[str, Evaluation],
+    tags: Dict[str, ListingTags],
+) -> Tuple[int, int]:
+    """Bring evaluations, tags and AI content of `listings` up to date, in place.
+
+    Returns (new evaluations, new tags).
+    """
+    to_evaluate, eval_report = plan_evaluations(listings, evaluations, ANALYSIS_TEMPLATE)
+    eval_report.print()
+    # --prescore: confident local estimates need no evaluation section (planned before the content)
+    to_evaluate, local = prescore(to_evaluate)
+    for evaluation in local:
+        evaluations[evaluation.listing_id] = evaluation
+    to_tag, tags_report = plan_tags(listings, tags, ANALYSIS_TEMPLATE)
+    to_write, content_report = plan_content(listings, evaluations, ANALYSIS_TEMPLATE)
+    for report in (tags_report, content_report):
+        report.print()
+
+    needs = {}
+    for part, selected in (("evaluation", to_evaluate), ("tags", to_tag), ("content", to_write)):
+        for listing in selected:
+            needs.setdefault(listing.id, set()).add(part)
+    # A new evaluation always invalidates the content, so it is requested alongside
+    fused = [l for l in listings if "evaluation" in needs.get(l.id, ()) or len(needs.get(l.id, ())) >= 2]
+    fused_ids = {l.id for l in fused}
+    retry_evaluation = []
+    retry_tags = [l for l in to_tag if l.id not in fused_ids]
+    new_evaluations, new_tags = len(local), 0
+
+    if fused and anthropic and ANTHROPIC_API_KEY:
+        print(f"  [listing_analyzer] Analyzing {len(fused)} listings in one call each...")
+        results = get_llm_executor().map("listing_analyzer", fused, _build_request, _parse_analysis)
+        for listing, parts in zip(fused, results):
+            parts = parts or {}
+            wanted = needs[listing.id]
+            evaluation = parts.get("evaluation")
+            if "evaluation" in wanted:
+                if evaluation is None:
+                    retry_evaluation.append(listing)
+                else:
+                    evaluations[listing.id] = evaluation
+                    new_evaluations += 1
+            if "tags" in wanted:
+                if parts.get("tags") is None:
+                    retry_tags.append(listing)
+                else:
+                    tags[listing.id] = parts["tags"]
+                    new_tags += 1
+            # Content written next to a rejected evaluation is regenerated below
+            content = parts.get("content")
+            if content and listing.id in evaluations and not ("evaluation" in wanted and evaluation is None):
+                current = evaluations[listing.id]
+                current.ai_title = content["ai_title"]
+                current.ai_description = content["ai_description"]
+                current.content_fingerprint = fused_fingerprint(content_fingerprint(listing, current), ANALYSIS_TEMPLATE)
+    elif fused:
+        print("  [listing_analyzer] Anthropic API not available, skipping")
+        return len(local), 0
+
+    # Per-part fallbacks: failed sections, and listings that only miss one part
+    if retry_evaluation:
+        print(f"  [listing_analyzer] Falling back to the evaluator for {len(retry_evaluation)} listings")
+        for evaluation in evaluate_all(retry_evaluation, {}):
+            evaluations[evaluation.listing_id] = evaluation
+            new_evaluations += 1
+    if retry_tags:
+        for tag in extract_all_tags(retry_tags, {}):
+            tags[tag.listing_id] = tag
+            new_tags += 1
+    # Anything still without up-to-date content (single-part, failed or re-evaluated)
+    for listing_id, content in generate_all_content(listings, evaluations, ANALYSIS_TEMPLATE).items():
+        evaluations[listing_id].ai_title = content["ai_title"]
+        evaluations[listing_id].ai_description = content["ai_description"]
+        evaluations[listing_id].content_fingerprint = content["content_fingerprint"]
+
+    print(f"  [listing_analyzer] Completed: {new_evaluations} evaluations, {new_tags} tags")
+    return new_evaluations, new_tags
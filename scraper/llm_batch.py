@@ -0,0 +1,191 @@
+"""Message Batches mode for bulk LLM stages (--batch).
+
+Instead of answering requests one by one, LLMExecutor.map() hands the whole
+work list to run_batch(), which:
+
+1. answers what it can from the LLM cache,
+2. submits the rest as Message Batches jobs (custom_id = request hash),
+3. records the batch ids in LLM_BATCH_STATE_FILE before waiting,
+4. polls until each batch has ended and stores every result in the cache,
+5. parses the answers back into the caller's objects.
+
+Batches outlive the process: an interrupted run leaves its ids in the state
+file, and the next run with the same requests waits for those batches
+instead of submitting (and paying for) them again. Results of batches whose
+requests are no longer wanted still land in the cache.
+
+Set ANTHROPIC_BASE_URL to point at a stand-in server (see
+scripts/fake-batch-server.py) to exercise the whole flow offline.
+"""
+
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from scraper.config import (
+    ANTHROPIC_API_KEY,
+    ANTHROPIC_BASE_URL,
+    LLM_BATCH_MAX_REQUESTS,
+    LLM_BATCH_POLL_SECONDS,
+    LLM_BATCH_STATE_FILE,
+)
+from scraper.llm_cache import get_llm_cache, request_key
+
+try:
+    import anthropic
+except ImportError:
+    anthropic = None
+
+
+class BatchState:
+    """In-flight batches, persisted as {batch_id: {"stage", "created_at", "keys"}}."""
+
+    def __init__(self, path: str = LLM_BATCH_STATE_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self.batches: Dict[str, dict] = {}
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                self.batches = json.load(f)
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.batches, f, indent=2)
+        os.replace(tmp, self.path)
+
+    def add(self, batch_id: str, stage: str, keys: List[str]):
+        with self._lock:
+            self.batches[batch_id] = {
+                "stage": stage,
+                "created_at": datetime.now().isoformat(),
+                "keys": keys,
+            }
+            self._save()
+
+    def remove(self, batch_id: str):
+        with self._lock:
+            self.batches.pop(batch_id, None)
+            self._save()
+
+    def in_flight(self) -> Dict[str, str]:
+        """Map request key -> batch id for every request still being processed."""
+        with self._lock:
+            return {key: batch_id for batch_id, info in self.batches.items() for key in info["keys"]}
+
+
+def _submit(client, state: BatchState, stage: str, requests: Dict[str, dict]) -> List[str]:
+    batch_ids = []
+    keys = list(requests)
+    for start in range(0, len(keys), LLM_BATCH_MAX_REQUESTS):
+        chunk = keys[start:start + LLM_BATCH_MAX_REQUESTS]
+        batch = client.messages.batches.create(
+            requests=[{"custom_id": key, "params": requests[key]} for key in chunk]
+        )
+        state.add(batch.id, stage, chunk)
+        batch_ids.append(batch.id)
+        print(f"  [batch] {stage}: submitted {batch.id} ({len(chunk)} requests)")
+    return batch_ids
+
+
+def _collect(client, state: BatchState, batch_id: str, answers: Dict[str, Any]):
+    """Store the results of an ended batch in the cache (and in `answers`)."""
+    cache = get_llm_cache()
+    stage = state.batches.get(batch_id, {}).get("stage", "batch")
+    failed = 0
+    for entry in client.messages.batches.results(batch_id):
+        if entry.result.type == "succeeded":
+            message = entry.result.message
+            cache.put(entry.custom_id, stage, message.model, message)
+            answers[entry.custom_id] = message
+        else:
+            failed += 1
+    if failed:
+        print(f"  [batch] {batch_id}: {failed} requests errored, expired or were canceled")
+    state.remove(batch_id)
+
+
+def _wait(client, state: BatchState, batch_ids: Sequence[str], answers: Dict[str, Any]):
+    pending = set(batch_ids)
+    while pending:
+        for batch_id in sorted(pending):
+            try:
+                batch = client.messages.batches.retrieve(batch_id)
+            except anthropic.NotFoundError:
+                # Expired or deleted upstream: forget it, its requests are resubmitted next run
+                print(f"  [batch] {batch_id}: not found, dropping it")
+                state.remove(batch_id)
+                pending.discard(batch_id)
+                continue
+            if batch.processing_status == "ended":
+                _collect(client, state, batch_id, answers)
+                pending.discard(batch_id)
+            else:
+                counts = batch.request_counts
+                print(f"  [batch] {batch_id}: {counts.processing} processing, "
+                      f"{counts.succeeded} succeeded, {counts.errored} errored")
+        if pending:
+            time.sleep(LLM_BATCH_POLL_SECONDS)
+
+
+_state: Optional[BatchState] = None
+_state_lock = threading.Lock()
+
+
+def get_batch_state() -> BatchState:
+    global _state
+    with _state_lock:
+        if _state is None:
+            _state = BatchState()
+        return _state
+
+
+def run_batch(
+    stage: str,
+    items: Sequence[Any],
+    build: Callable[[Any], dict],
+    parse: Callable[[Any, Any], Any],
+) -> List[Any]:
+    """Batch counterpart of LLMExecutor.map(): results aligned with `items`, None on failure."""
+    client = anthropic.Anthropic(api_key=ANTHROPIC_API_KEY, base_url=ANTHROPIC_BASE_URL)
+    cache = get_llm_cache()
+    state = get_batch_state()
+
+    keys = []
+    requests: Dict[str, dict] = {}
+    answers: Dict[str, Any] = {}
+    for item in items:
+        params = build(item)
+        key = request_key(params)
+        keys.append(key)
+        cached = cache.get(key, stage)
+        if cached is not None:
+            answers[key] = cached
+        else:
+            requests[key] = params
+
+    in_flight = state.in_flight()
+    resumed = {in_flight[key] for key in requests if key in in_flight}
+    to_submit = {key: params for key, params in requests.items() if key not in in_flight}
+    print(f"  [batch] {stage}: {len(answers)} cached, {len(requests) - len(to_submit)} in "
+          f"{len(resumed)} resumed batches, {len(to_submit)} to submit")
+
+    batch_ids = sorted(resumed)
+    if to_submit:
+        batch_ids += _submit(client, state, stage, to_submit)
+    _wait(client, state, batch_ids, answers)
+
+    results = []
+    for item, key in zip(items, keys):
+        result = None
+        if key in answers:
+            try:
+                result = parse(item, answers[key])
+            except Exception as e:
+                print(f"  [{stage}] Error for {getattr(item, 'id', item)}: {e}")
+        results.append(result)
+    return results
@@ -0,0 +1,183 @@
+"""Persistent cache for Anthropic Messages API responses.
+
+Every `client.messages.create(...)` in the pipeline goes through
+`cached_create()` / `acached_create()`. The request (model, system prompt,
+messages and all other parameters) is hashed; an identical request is
+answered from a local SQLite database instead of the API.
+
+- Only complete answers are stored (stop_reason end_turn / stop_sequence /
+  tool_use), so truncated or failed calls are retried next time.
+- Entries older than LLM_CACHE_MAX_AGE_DAYS are dropped, and the least
+  recently used ones go once the database exceeds LLM_CACHE_MAX_MB.
+- `set_bypass(True)` (--no-llm-cache, or LLM_CACHE=0) skips lookups but still
+  stores fresh answers, which refreshes the cache.
+- Hits and misses are counted per stage; see print_llm_cache_stats().
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import Counter, defaultdict
+from typing import Dict, Optional
+
+from scraper.config import (
+    LLM_CACHE_ENABLED,
+    LLM_CACHE_FILE,
+    LLM_CACHE_MAX_AGE_DAYS,
+    LLM_CACHE_MAX_MB,
+)
+
+try:
+    from anthropic.types import Message
+except ImportError:
+    Message = None
+
+CACHEABLE_STOP_REASONS = {"end_turn", "stop_sequence", "tool_use"}
+
+
+def request_key(params: dict) -> str:
+    data = json.dumps(params, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    """Thread-safe SQLite store of serialized Message responses."""
+
+    def __init__(
+        self,
+        path: str = LLM_CACHE_FILE,
+        max_age_days: float = LLM_CACHE_MAX_AGE_DAYS,
+        max_mb: float = LLM_CACHE_MAX_MB,
+    ):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.max_age = max_age_days * 86400
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.bypass = not LLM_CACHE_ENABLED
+        self.stats: Dict[str, Counter] = defaultdict(Counter)
+        self._lock = threading.Lock()
+        self._puts = 0
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                stage TEXT,
+                model TEXT,
+                response TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                used_at REAL NOT NULL
+            )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_used ON responses(used_at)")
+        self._conn.commit()
+        self.evict()
+
+    def get(self, key: str, stage: str):
+        if self.bypass or Message is None:
+            self.stats[stage]["bypass" if self.bypass else "miss"] += 1
+            return None
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row and time.time() - row[1] <= self.max_age:
+                self._conn.execute("UPDATE responses SET used_at = ? WHERE key = ?", (time.time(), key))
+                self._conn.commit()
+            else:
+                row = None
+            self.stats[stage]["hit" if row else "miss"] += 1
+        return Message.model_validate_json(row[0]) if row else None
+
+    def put(self, key: str, stage: str, model: str, response):
+        if getattr(response, "stop_reason", None) not in CACHEABLE_STOP_REASONS:
+            return
+        payload = response.model_dump_json()
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, stage, model, payload, len(payload), now, now),
+            )
+            self._conn.commit()
+            self._puts += 1
+            check_size = self._puts % 100 == 0
+        if check_size:
+            self.evict()
+
+    def discard(self, key: str):
+        """Forget one answer (e.g. one that failed validation), so the request is sent again."""
+        with self._lock:
+            self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def evict(self):
+        """Drop expired entries, then least recently used ones above the size cap."""
+        with self._lock:
+            self._conn.execute("DELETE FROM responses WHERE created_at < ?", (time.time() - self.max_age,))
+            total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+            if total > self.max_bytes:
+                excess = total - self.max_bytes
+                freed = 0
+                doomed = []
+                for key, size in self._conn.execute("SELECT key, size FROM responses ORDER BY used_at"):
+                    if freed >= excess:
+                        break
+                    doomed.append((key,))
+                    freed += size
+                self._conn.executemany("DELETE FROM responses WHERE key = ?", doomed)
+            self._conn.commit()
+
+
+_cache: Optional[LLMCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_llm_cache() -> LLMCache:
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = LLMCache()
+        return _cache
+
+
+def set_bypass(bypass: bool = True):
+    """Skip cache lookups for this process (fresh answers are still stored)."""
+    get_llm_cache().bypass = bypass
+
+
+def cached_create(client, stage: str, **params):
+    """Drop-in for client.messages.create(**params), answered from the cache when possible."""
+    cache = get_llm_cache()
+    key = request_key(params)
+    response = cache.get(key, stage)
+    if response is None:
+        response = client.messages.create(**params)
+        cache.put(key, stage, params.get("model", ""), response)
+    return response
+
+
+async def acached_create(client, stage: str, **params):
+    """Async variant of cached_create() for AsyncAnthropic clients."""
+    cache = get_llm_cache()
+    key = request_key(params)
+    response = cache.get(key, stage)
+    if response is None:
+        response = await client.messages.create(**params)
+        cache.put(key, stage, params.get("model", ""), response)
+    return response
+
+
+def print_llm_cache_stats():
+    """Per-stage hit rates for this process."""
+    if _cache is None or not _cache.stats:
+        return
+    print(f"\n  LLM cache:")
+    for stage, counts in sorted(_cache.stats.items()):
+        hits, misses, bypassed = counts["hit"], counts["miss"], counts["bypass"]
+        total = hits + misses + bypassed
+        rate = 100 * hits / total if total else 0
+        extra = f", {bypassed} bypassed" if bypassed else ""
+        print(f"    {stage:<24} {hits:5d} hit / {misses:5d} miss ({rate:.0f}%){extra}")
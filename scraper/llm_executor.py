@@ -0,0 +1,338 @@
+"""Shared asynchronous executor for Anthropic Messages API calls.
+
+One long-lived AsyncAnthropic client runs on a background event loop, so
+every stage (and every pipeline thread) shares the same connection pool and
+the same view of the account's rate limits.
+
+Concurrency adapts AIMD-style: the number of requests in flight grows by
+about one per window of successful calls, halves on 429/529, and stops
+growing when the `anthropic-ratelimit-*-remaining` headers say the budget is
+nearly spent. Failed calls are retried a bounded number of times with
+full-jitter exponential backoff; a Retry-After header pauses every request.
+
+Answers that fail validation get one repair request, then the item is
+quarantined (scraper/structured_output.py, scraper/llm_quarantine.py).
+
+Responses go through the persistent LLM cache (scraper/llm_cache.py). With
+set_batch_mode(True) (--batch), map() submits Message Batches jobs instead;
+see scraper/llm_batch.py.
+"""
+
+import asyncio
+import random
+import threading
+import time
+from typing import Any, Callable, List, Optional, Sequence
+
+from scraper.config import (
+    ANTHROPIC_API_KEY,
+    ANTHROPIC_BASE_URL,
+    LLM_BACKOFF_BASE,
+    LLM_BACKOFF_MAX,
+    LLM_INITIAL_CONCURRENCY,
+    LLM_MAX_CONCURRENCY,
+    LLM_MAX_RETRIES,
+)
+from scraper.llm_batch import run_batch
+from scraper.llm_cache import get_llm_cache, request_key
+from scraper.llm_quarantine import get_quarantine
+from scraper.rate_limiter import parse_retry_after
+from scraper.structured_output import InvalidOutput, repair_request
+
+try:
+    import anthropic
+except ImportError:
+    anthropic = None
+
+THROTTLE_STATUS_CODES = {429, 529}
+RETRY_STATUS_CODES = {408, 409, 500, 502, 503, 504} | THROTTLE_STATUS_CODES
+
+
+class AdaptiveLimiter:
+    """AIMD concurrency limit shared by every request on the executor's loop."""
+
+    def __init__(self, initial: int, maximum: int, minimum: int = 1):
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.in_flight = 0
+        self.paused_until = 0.0
+        self._cond: Optional[asyncio.Condition] = None
+
+    @property
+    def cond(self) -> asyncio.Condition:
+        if self._cond is None:
+            self._cond = asyncio.Condition()
+        return self._cond
+
+    async def acquire(self):
+        async with self.cond:
+            await self.cond.wait_for(lambda: self.in_flight < int(self.limit))
+            self.in_flight += 1
+        delay = self.paused_until - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    async def release(self):
+        async with self.cond:
+            self.in_flight -= 1
+            self.cond.notify_all()
+
+    def on_success(self, headers=None):
+        if headers is not None and _budget_nearly_spent(headers, self.in_flight):
+            return
+        self.limit = min(self.maximum, self.limit + 1.0 / max(self.limit, 1.0))
+
+    def on_throttle(self, retry_after: Optional[float]):
+        self.limit = max(self.minimum, self.limit / 2)
+        if retry_after:
+            self.paused_until = max(self.paused_until, time.monotonic() + retry_after)
+
+
+def _budget_nearly_spent(headers, in_flight: int) -> bool:
+    """True when the rate-limit headers leave no room for more parallel requests."""
+    for name in ("anthropic-ratelimit-requests-remaining",
+                 "anthropic-ratelimit-input-tokens-remaining",
+                 "anthropic-ratelimit-output-tokens-remaining"):
+        value = headers.get(name)
+        if value is None:
+            continue
+        try:
+            remaining = int(value)
+        except ValueError:
+            continue
+        if name.endswith("requests-remaining") and remaining <= in_flight:
+            return True
+        if name.endswith("tokens-remaining") and remaining < 2000 * max(in_flight, 1):
+            return True
+    return False
+
+
+class LLMExecutor:
+    def __init__(
+        self,
+        initial_concurrency: int = LLM_INITIAL_CONCURRENCY,
+        max_concurrency: int = LLM_MAX_CONCURRENCY,
+        max_retries: int = LLM_MAX_RETRIES,
+    ):
+        self.max_retries = max_retries
+        self.batch_mode = False
+        self.limiter = AdaptiveLimiter(initial_concurrency, max_concurrency)
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="llm-executor", daemon=True)
+        self._thread.start()
+        # SDK retries are disabled: backoff is handled here, across all requests
+        self.client = None
+        if anthropic:
+            self.client = anthropic.AsyncAnthropic(api_key=ANTHROPIC_API_KEY, base_url=ANTHROPIC_BASE_URL, max_retries=0)
+
+    async def _send(self, params: dict):
+        raw = await self.client.messages.with_raw_response.create(**params)
+        return raw.parse(), raw.headers
+
+    async def acreate(self, stage: str, params: dict):
+        """Cached, rate-adaptive, retried messages.create()."""
+        cache = get_llm_cache()
+        key = request_key(params)
+        cached = cache.get(key, stage)
+        if cached is not None:
+            return cached
+
+        for attempt in range(self.max_retries + 1):
+            await self.limiter.acquire()
+            try:
+                response, headers = await self._send(params)
+            except (anthropic.APIStatusError, anthropic.APIConnectionError) as e:
+                status = getattr(e, "status_code", None)
+                retryable = status is None or status in RETRY_STATUS_CODES
+                if not retryable or attempt == self.max_retries:
+                    raise
+                retry_after = None
+                if status in THROTTLE_STATUS_CODES:
+                    retry_after = parse_retry_after(e.response.headers.get("retry-after"))
+                    self.limiter.on_throttle(retry_after)
+                backoff = retry_after or random.uniform(0, min(LLM_BACKOFF_MAX, LLM_BACKOFF_BASE * 2 ** attempt))
+                print(f"  [llm] {stage}: {status or 'connection error'}, retry {attempt + 1}/{self.max_retries} "
+                      f"in {backoff:.1f}s (concurrency {int(self.limiter.limit)})")
+                await asyncio.sleep(backoff)
+                continue
+            finally:
+                await self.limiter.release()
+
+            self.limiter.on_success(headers)
+            cache.put(key, stage, params.get("model", ""), response)
+            return response
+
+    def run(self, coro):
+        """Run a coroutine on the executor's loop and wait for its result."""
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result()
+
+    def create(self, stage: str, params: dict):
+        """Blocking create() for callers outside the executor's loop."""
+        return self.run(self.acreate(stage, params))
+
+    def map(
+        self,
+        stage: str,
+        items: Sequence[Any],
+        build: Callable[[Any], dict],
+        parse: Callable[[Any, Any], Any],
+        on_result: Optional[Callable[[Any, Any], None]] = None,
+    ) -> List[Any]:
+        """Run build(item) -> request for every item concurrently, then parse(item, response).
+
+        Items form a sliding window: a new request starts as soon as any
+        in-flight one finishes, so one slow answer never holds up the rest.
+        on_result(item, result) is called as each result arrives. Returns
+        results aligned with `items`; failed requests give None.
+
+        When parse() raises InvalidOutput, one repair request is sent; an
+        item that fails again is quarantined, and quarantined items are
+        skipped (None) until their backoff expires or their request changes.
+        """
+        quarantine = get_quarantine()
+        requests = [build(item) for item in items]
+        todo = [
+            i for i, item in enumerate(items)
+            if not quarantine.blocked(stage, _item_id(item), request_key(requests[i]))
+        ]
+        results: List[Any] = [None] * len(items)
+        if len(todo) < len(items):
+            print(f"  [{stage}] Skipping {len(items) - len(todo)} quarantined items (unchanged since they failed)")
+            if on_result:
+                for i in sorted(set(range(len(items))) - set(todo)):
+                    on_result(items[i], None)
+
+        if self.batch_mode:
+            answers = {}
+
+            def hold(i, response):
+                answers[i] = response
+
+            run_batch(stage, todo, lambda i: requests[i], hold)
+            done = self.run(asyncio.gather(*(
+                self._parse_or_repair(stage, items[i], requests[i], answers[i], parse) if i in answers else _none()
+                for i in todo
+            )))
+            for i, result in zip(todo, done):
+                results[i] = result
+                if on_result:
+                    on_result(items[i], result)
+            return results
+
+        done = self.run(self._amap(stage, items, requests, todo, parse, on_result))
+        for i, result in zip(todo, done):
+            results[i] = result
+        return results
+
+    async def _amap(self, stage, items, requests, indices, parse, on_result=None) -> List[Any]:
+        progress = Progress(stage, len(indices), self.limiter)
+
+        async def one(i):
+            item = items[i]
+            try:
+                response = await self.acreate(stage, requests[i])
+                result = await self._parse_or_repair(stage, item, requests[i], response, parse)
+            except Exception as e:
+                print(f"  [{stage}] Error for {_item_id(item) or item}: {e}")
+                result = None
+            if on_result:
+                on_result(item, result)
+            progress.update()
+            return result
+
+        return await asyncio.gather(*(one(i) for i in indices))
+
+    async def _parse_or_repair(self, stage: str, item, params: dict, response, parse):
+        """parse(item, response), with one repair request if the answer is invalid.
+
+        An answer that is still invalid after the repair quarantines the item;
+        invalid answers are dropped from the cache so the next try is fresh.
+        """
+        cache = get_llm_cache()
+        quarantine = get_quarantine()
+        item_id = _item_id(item)
+        try:
+            try:
+                result = parse(item, response)
+            except InvalidOutput as e:
+                cache.discard(request_key(params))
+                print(f"  [{stage}] Invalid answer for {item_id or item}: {e}; asking for a repair")
+                repair = repair_request(params, response, e)
+                try:
+                    result = parse(item, await self.acreate(stage, repair))
+                except InvalidOutput:
+                    cache.discard(request_key(repair))
+                    raise
+        except InvalidOutput as e:
+            print(f"  [{stage}] Still invalid for {item_id or item}: {e}")
+            quarantine.record(stage, item_id, request_key(params), str(e))
+            return None
+        except Exception as e:
+            print(f"  [{stage}] Error for {item_id or item}: {e}")
+            return None
+        quarantine.clear(stage, item_id)
+        return result
+
+
+def _item_id(item) -> Optional[str]:
+    item_id = getattr(item, "id", None)
+    return str(item_id) if item_id is not None else None
+
+
+async def _none():
+    return None
+
+
+class Progress:
+    """Running throughput and ETA, printed every PRINT_EVERY completions or PRINT_SECONDS."""
+
+    PRINT_EVERY = 10
+    PRINT_SECONDS = 15.0
+
+    def __init__(self, stage: str, total: int, limiter: Optional[AdaptiveLimiter] = None):
+        self.stage = stage
+        self.total = total
+        self.limiter = limiter
+        self.done = 0
+        self.start = self.last_print = time.monotonic()
+
+    def update(self):
+        self.done += 1
+        now = time.monotonic()
+        if self.done % self.PRINT_EVERY and self.done != self.total and now - self.last_print < self.PRINT_SECONDS:
+            return
+        self.last_print = now
+        elapsed = max(now - self.start, 1e-6)
+        rate = self.done / elapsed
+        line = f"  [{self.stage}] {self.done}/{self.total} done, {rate * 60:.0f}/min"
+        if self.done < self.total:
+            line += f", ETA {_format_duration((self.total - self.done) / rate)}"
+        else:
+            line += f", {_format_duration(elapsed)} total"
+        if self.limiter:
+            line += f" (concurrency {int(self.limiter.limit)})"
+        print(line)
+
+
+def _format_duration(seconds: float) -> str:
+    minutes, seconds = divmod(int(seconds), 60)
+    return f"{minutes}m{seconds:02d}s" if minutes else f"{seconds}s"
+
+
+_executor: Optional[LLMExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_llm_executor() -> LLMExecutor:
+    """Return the process-wide executor, creating it (and its client) on first use."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = LLMExecutor()
+        return _executor
+
+
+def set_batch_mode(enabled: bool = True):
+    """Send map() workloads through the Message Batches API for this process."""
+    get_llm_executor().batch_mode = enabled
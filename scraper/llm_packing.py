@@ -0,0 +1,183 @@
+"""Multi-listing request packing for short-output LLM stages (--pack).
+
+The evaluator and tag extractor answer with a small JSON object but send a
+long rubric with every listing. In packing mode they send several listings
+per request instead:
+
+- listings are grouped greedily up to LLM_PACK_TOKEN_BUDGET estimated input
+  tokens and LLM_PACK_MAX_ITEMS listings per request;
+- the static rubric is sent once per request instead of once per listing
+  (and marked for prompt caching only if it reaches the model's minimum
+  cacheable length, see cached_system);
+- the model answers with a JSON array of objects keyed by "listing_id"
+  (through a forced tool, as {"results": [...]}, see structured_output.py);
+  every object is matched to its listing by that id, never by position;
+- if the answer cannot be parsed at all, the group is split in half and both
+  halves are retried; listings missing from an otherwise valid answer are
+  retried together. A listing that still fails on its own returns None, and
+  the stage falls back to its regular one-listing-per-request path.
+"""
+
+import asyncio
+import threading
+import time
+from typing import Any, Callable, Dict, List, Sequence
+
+from scraper.config import LLM_PACK_MAX_ITEMS, LLM_PACK_TOKEN_BUDGET
+from scraper.llm_executor import get_llm_executor
+from scraper.structured_output import response_json
+
+_packing = False
+_packing_lock = threading.Lock()
+
+
+def set_packing(enabled: bool = True):
+    """Pack several listings per request in the stages that support it."""
+    global _packing
+    with _packing_lock:
+        _packing = enabled
+
+
+def packing_enabled() -> bool:
+    return _packing and not get_llm_executor().batch_mode
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough input size (about 4 characters per token for French/English prose)."""
+    return len(text) // 4 + 1
+
+
+def pack_by_budget(
+    items: Sequence[Any],
+    cost: Callable[[Any], int],
+    budget: int = LLM_PACK_TOKEN_BUDGET,
+    max_items: int = LLM_PACK_MAX_ITEMS,
+) -> List[List[Any]]:
+    """Greedy grouping in input order; an item larger than the budget gets a group of its own."""
+    groups: List[List[Any]] = []
+    current: List[Any] = []
+    used = 0
+    for item in items:
+        size = cost(item)
+        if current and (used + size > budget or len(current) >= max_items):
+            groups.append(current)
+            current, used = [], 0
+        current.append(item)
+        used += size
+    if current:
+        groups.append(current)
+    return groups
+
+
+def keyed_entries(data) -> Dict[str, dict]:
+    """{listing_id: object} from a parsed packed answer (array, {"results": [...]} or single object)."""
+    if isinstance(data, dict):
+        # Tolerate {"results": [...]} or a single object for a one-listing group
+        data = data.get("results", [data])
+    if not isinstance(data, list):
+        raise ValueError(f"expected a JSON array, got {type(data).__name__}")
+
+    entries = {}
+    for entry in data:
+        if isinstance(entry, dict) and entry.get("listing_id") is not None:
+            entries.setdefault(str(entry["listing_id"]), entry)
+    return entries
+
+
+def map_packed(
+    stage: str,
+    items: Sequence[Any],
+    build_group: Callable[[List[Any]], dict],
+    parse_item: Callable[[Any, dict], Any],
+    cost: Callable[[Any], int],
+) -> List[Any]:
+    """Packed counterpart of LLMExecutor.map(): results aligned with `items`, None on failure.
+
+    build_group(items) returns the request for a group; parse_item(item, entry)
+    turns the entry keyed by item.id into a result (raising or returning None
+    if it is invalid).
+    """
+    executor = get_llm_executor()
+    groups = pack_by_budget(items, cost)
+    print(f"  [{stage}] Packing {len(items)} listings into {len(groups)} requests")
+    results: Dict[str, Any] = {}
+    stats = {"requests": 0, "splits": 0}
+    start = time.monotonic()
+
+    async def run_group(group: List[Any]):
+        stats["requests"] += 1
+        try:
+            response = await executor.acreate(stage, build_group(group))
+            entries = keyed_entries(response_json(response))
+        except Exception as e:
+            entries = None
+            if len(group) == 1:
+                print(f"  [{stage}] Error for {group[0].id}: {e}")
+
+        failed = []
+        for item in group:
+            entry = entries.get(item.id) if entries is not None else None
+            result = None
+            if entry is not None:
+                try:
+                    result = parse_item(item, entry)
+                except Exception as e:
+                    print(f"  [{stage}] Invalid result for {item.id}: {e}")
+            if result is None:
+                failed.append(item)
+            else:
+                results[item.id] = result
+
+        if len(group) == 1 or not failed:
+            return
+        if len(failed) == len(group):
+            # Nothing usable came back: halve and retry both sides
+            stats["splits"] += 1
+            middle = len(group) // 2
+            await asyncio.gather(run_group(group[:middle]), run_group(group[middle:]))
+        else:
+            await run_group(failed)
+
+    async def run_all():
+        await asyncio.gather(*(run_group(group) for group in groups))
+
+    executor.run(run_all())
+    print(f"  [{stage}] {len(results)}/{len(items)} listings from {stats['requests']} requests "
+          f"({stats['splits']} splits) in {time.monotonic() - start:.0f}s")
+    return [results.get(item.id) for item in items]
+
+
+# Shortest prompt prefix the API caches, by model family; shorter prefixes are silently not cached
+CACHE_MIN_TOKENS = {
+    "claude-haiku-4-5": 4096,
+    "claude-opus-4-5": 4096,
+    "claude-3-5-haiku": 2048,
+    "claude-3-haiku": 2048,
+}
+DEFAULT_CACHE_MIN_TOKENS = 1024
+
+
+def cached_system(text: str, model: str):
+    """System prompt, as a block marked for prompt caching when it is long enough to be cached.
+
+    The packed rubrics (about 700 tokens) are below every minimum today, so
+    they go as plain text; the marker comes back if a rubric grows past it.
+    """
+    minimum = next((n for prefix, n in CACHE_MIN_TOKENS.items() if model.startswith(prefix)), DEFAULT_CACHE_MIN_TOKENS)
+    if estimate_tokens(text) < minimum:
+        return text
+    return [{"type": "text", "text": text, "cache_control": {"type": "ephemeral"}}]
+
+
+def packed_listing_block(listing_id: str, body: str) -> str:
+    return f"=== listing_id: {listing_id} ===\n{body}"
+
+
+def packed_max_tokens(group: Sequence[Any], per_item: int, ceiling: int = 8192) -> int:
+    return min(ceiling, per_item * len(group))
+
+
+def unescape_template(template: str) -> str:
+    """A str.format() template with no fields, as the literal text the model sees."""
+    return template.replace("{{", "{").replace("}}", "}")
+
@@ -0,0 +1,85 @@
+"""Quarantine for items whose LLM answers keep failing validation.
+
+An item (listing, venue...) whose answer is still invalid after the repair
+request is recorded here with the hash of its request. Until its backoff
+expires, LLMExecutor.map() skips it instead of paying for the same failure
+on every run. The backoff doubles with every failure, from
+LLM_QUARANTINE_BACKOFF_HOURS up to LLM_QUARANTINE_MAX_DAYS.
+
+A changed request (new description, new prompt, new model) has a different
+hash, so the item is tried again right away; a valid answer removes it.
+Records are persisted as JSON in LLM_QUARANTINE_FILE.
+"""
+
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Optional
+
+from scraper.config import LLM_QUARANTINE_BACKOFF_HOURS, LLM_QUARANTINE_FILE, LLM_QUARANTINE_MAX_DAYS
+
+
+class Quarantine:
+    """Failing items, persisted as {"stage:item_id": {"request", "failures", "retry_after", "error", ...}}."""
+
+    def __init__(self, path: str = LLM_QUARANTINE_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self.entries: Dict[str, dict] = {}
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                self.entries = json.load(f)
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f, indent=2, ensure_ascii=False)
+        os.replace(tmp, self.path)
+
+    def blocked(self, stage: str, item_id: Optional[str], request: str) -> bool:
+        """True while `item_id` is quarantined for this exact request."""
+        if item_id is None:
+            return False
+        with self._lock:
+            entry = self.entries.get(f"{stage}:{item_id}")
+        return bool(entry) and entry["request"] == request and time.time() < entry["retry_after"]
+
+    def record(self, stage: str, item_id: Optional[str], request: str, error: str):
+        if item_id is None:
+            return
+        key = f"{stage}:{item_id}"
+        with self._lock:
+            entry = self.entries.get(key)
+            failures = entry["failures"] + 1 if entry and entry["request"] == request else 1
+            backoff = min(LLM_QUARANTINE_BACKOFF_HOURS * 3600 * 2 ** (failures - 1), LLM_QUARANTINE_MAX_DAYS * 86400)
+            self.entries[key] = {
+                "request": request,
+                "failures": failures,
+                "retry_after": time.time() + backoff,
+                "error": error[:500],
+                "updated_at": datetime.now().isoformat(),
+            }
+            self._save()
+        print(f"  [{stage}] {item_id} quarantined after {failures} failed run(s), next try in {backoff / 3600:.0f}h")
+
+    def clear(self, stage: str, item_id: Optional[str]):
+        if item_id is None:
+            return
+        with self._lock:
+            if self.entries.pop(f"{stage}:{item_id}", None) is not None:
+                self._save()
+
+
+_quarantine: Optional[Quarantine] = None
+_quarantine_lock = threading.Lock()
+
+
+def get_quarantine() -> Quarantine:
+    global _quarantine
+    with _quarantine_lock:
+        if _quarantine is None:
+            _quarantine = Quarantine()
+        return _quarantine
@@ -1,6 +1,16 @@
 #!/usr/bin/env python3
-"""Main orchestrator for the Cohabitat Europe scraper."""
-
+"""Main orchestrator for the Cohabitat Europe scraper.
+
+Usage:
+    python -m scraper.main                 # Full crawl
+    python -m scraper.main --incremental   # Only new/expired detail pages + a refresh sample
+    python -m scraper.main --replay RUN_ID # Serve all fetches from an archived run (offline)
+    python -m scraper.main --from evaluate --to tags   # Run a slice of the stage DAG
+    python -m scraper.main --resume        # Continue an interrupted run
+    python -m scraper.main --stale-report  # What the LLM stages would redo, and why
+"""
+
+import argparse
 import json
 import os
 import sys
@@ -9,7 +19,10 @@ from typing import Dict
 # Add parent directory to path so we can import scraper package
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
-from scraper.config import DATA_DIR, LISTINGS_FILE, EVALUATIONS_FILE, TAGS_FILE
+from scraper.config import (
+    DATA_DIR, LISTINGS_FILE, EVALUATIONS_FILE, TAGS_FILE,
+    PIPELINE_DIR, PIPELINE_STATE_FILE, PRE_FILTER_FILE,
+)
 from scraper.models import Listing, Evaluation, ListingTags
 # Belgium
 from scraper.scrapers.habitat_groupe import HabitatGroupeScraper
@@ -24,13 +37,23 @@ from scraper.scrapers.cohousing_spain import CohousingSpainScraper
 from scraper.scrapers.ecovillage import EcovillageOrgScraper
 from scraper.scrapers.ic_org import ICOrgScraper
 # Pipeline
-from scraper.evaluator import evaluate_all
-from scraper.tag_extractor import extract_all_tags
-from scraper.content_generator import generate_all_content
+from scraper.evaluator import evaluate_all, plan_evaluations
+from scraper.tag_extractor import extract_all_tags, plan_tags
+from scraper.content_generator import generate_all_content, plan_content
+from scraper.listing_analyzer import analyze_all
 from scraper.quality_filter import pre_filter, post_filter_evaluations
-from scraper.description_cleaner import clean_all_descriptions
-from scraper.translator import translate_listings
+from scraper.description_cleaner import clean_all_descriptions, apply_cleaned, plan_cleaning, strip_boilerplate
+from scraper.translator import apply_translation, translate_listings
+from scraper.boilerplate import get_boilerplate_model
 from scraper.image_filter import filter_all_listings as filter_all_images
+from scraper.scrape_runner import run_scrapers, print_timings, prepare_scrapers, mark_seen
+from scraper.response_archive import open_run
+from scraper.pipeline import Artifact, Pipeline, Stage
+from scraper.prompt_compaction import print_compaction_stats
+from scraper.llm_cache import print_llm_cache_stats, set_bypass
+from scraper.llm_executor import set_batch_mode
+from scraper.llm_packing import set_packing
+from scraper.prescorer import set_prescoring
 
 
 def load_existing_listings() -> Dict[str, Listing]:
@@ -86,17 +109,16 @@ def save_evaluations(evaluations: Dict[str, Evaluation]):
     print(f"Saved {len(data)} evaluations to {EVALUATIONS_FILE}")
 
 
-def main():
-    print("=" * 60)
-    print("Cohabitat Europe - Scraper & Evaluator")
-    print("=" * 60)
+# === Pipeline stages ===
+# Each stage reads its declared inputs from ctx and returns its outputs.
+# The listing artifacts (scraped, translated, cleaned, images) all hold the same
+# Dict[str, Listing], each marking a transformation step as done.
 
-    # Load existing data
+def stage_scrape(ctx: dict) -> dict:
+    args = ctx["args"]
     existing_listings = load_existing_listings()
-    existing_evaluations = load_existing_evaluations()
-    print(f"Existing: {len(existing_listings)} listings, {len(existing_evaluations)} evaluations")
+    print(f"Existing: {len(existing_listings)} listings")
 
-    # Run scrapers
     scrapers = [
         # Belgium
         HabitatGroupeScraper(),
@@ -111,118 +133,232 @@ def main():
         EcovillageOrgScraper(),
         ICOrgScraper(),
     ]
+    prepare_scrapers(scrapers, existing_listings, incremental=args.incremental)
+
+    mode = "incremental" if args.incremental else "full"
+    print(f"\n--- Scraping ({len(scrapers)} sources in parallel, {mode}) ---")
+    scrape_results = run_scrapers(scrapers)
 
     all_new_listings = []
-    for scraper in scrapers:
-        print(f"\n--- Scraping {scraper.name} ---")
-        try:
-            listings = scraper.scrape()
-            new_count = sum(1 for l in listings if l.id not in existing_listings)
-            all_new_listings.extend(listings)
-            print(f"  Found {len(listings)} listings ({new_count} new)")
-        except Exception as e:
-            print(f"  ERROR: {e}")
+    for result in scrape_results:
+        if result.error:
+            continue
+        new_count = sum(1 for l in result.listings if l.id not in existing_listings)
+        all_new_listings.extend(result.listings)
+        mark_seen(existing_listings, result.confirmed_ids)
+        print(f"  {result.name}: {len(result.listings)} listings ({new_count} new, "
+              f"{len(result.confirmed_ids)} unchanged)")
+    print_timings(scrape_results)
 
     # Merge with existing
     for listing in all_new_listings:
         existing_listings[listing.id] = listing
+    ctx["stats"]["new_listings"] = len(all_new_listings)
+    return {"scraped": existing_listings}
+
 
+def stage_pre_filter(ctx: dict) -> dict:
     # Pre-filter: remove obviously irrelevant listings before evaluation
     print(f"\n--- Pre-filter Quality ---")
-    all_listings_list = list(existing_listings.values())
-    filtered_listings, rejection_log = pre_filter(all_listings_list)
+    all_listings_list = list(ctx["cleaned"].values())
+    filtered_listings, rejection_log = pre_filter(all_listings_list, set(load_existing_evaluations()))
     print(f"  Pre-filter: {len(all_listings_list)} -> {len(filtered_listings)} listings")
     print(f"  Rejected: {len(rejection_log)} listings")
     for r in rejection_log[:10]:
         print(f"    - {r['title'][:60]} | {r['reason']}")
     if len(rejection_log) > 10:
         print(f"    ... and {len(rejection_log) - 10} more")
+    ctx["stats"]["pre_filtered_out"] = len(rejection_log)
+    return {"filtered": filtered_listings}
 
+
+def stage_translate(ctx: dict) -> dict:
     # Translate non-French listings (Spanish/English -> French)
     print(f"\n--- Translation ---")
-    to_translate = [l for l in existing_listings.values()
+    listings = ctx["scraped"]
+    to_translate = [l for l in listings.values()
                     if l.original_language and l.original_language != "fr"]
-    translations = translate_listings(to_translate)
+    # Learned from the scraped text, so the source sites' template lines are not translated
+    boilerplate = get_boilerplate_model()
+    if boilerplate.learn(to_translate):
+        boilerplate.save()
+    translations = translate_listings(to_translate, boilerplate.strip)
     for listing_id, content in translations.items():
-        if listing_id in existing_listings:
-            existing_listings[listing_id].title = content["title"]
-            existing_listings[listing_id].description = content["description"]
+        if listing_id in listings:
+            apply_translation(listings[listing_id], content)
+    return {"translated": listings}
+
 
-    # Clean descriptions (remove web page garbage via LLM)
+def stage_clean(ctx: dict) -> dict:
+    # Clean descriptions (remove learned boilerplate, then web page garbage via LLM)
     print(f"\n--- Description Cleaning ---")
-    all_to_clean = list(existing_listings.values())
-    cleaned = clean_all_descriptions(all_to_clean)
+    listings = ctx["translated"]
+    cleaned = clean_all_descriptions(list(listings.values()))
     for listing_id, clean_desc in cleaned.items():
-        if listing_id in existing_listings:
-            existing_listings[listing_id].description = clean_desc
+        if listing_id in listings:
+            apply_cleaned(listings[listing_id], clean_desc)
+    return {"cleaned": listings}
 
+
+def stage_images(ctx: dict) -> dict:
     # Filter images: remove avatars, banners, icons, non-photo content
     print(f"\n--- Image Filtering ---")
-    image_updates = filter_all_images(list(existing_listings.values()))
+    listings = ctx["cleaned"]
+    image_updates = filter_all_images(list(listings.values()))
     for lid, clean_images in image_updates.items():
-        if lid in existing_listings:
-            existing_listings[lid].images = clean_images
+        if lid in listings:
+            listings[lid].images = clean_images
+    return {"images": listings}
 
-    # Save ALL listings (unfiltered) for reference
-    save_listings(existing_listings)
 
+def stage_evaluate(ctx: dict) -> dict:
     # Evaluate only filtered listings (saves API costs)
     print(f"\n--- AI Evaluation ---")
-    new_evaluations = evaluate_all(filtered_listings, existing_evaluations)
-
-    # Merge evaluations
+    existing_evaluations = load_existing_evaluations()
+    print(f"Existing: {len(existing_evaluations)} evaluations")
+    new_evaluations = evaluate_all(ctx["filtered"], existing_evaluations)
     for evaluation in new_evaluations:
         existing_evaluations[evaluation.listing_id] = evaluation
+    ctx["stats"]["new_evaluations"] = len(new_evaluations)
+    return {"evaluations": existing_evaluations}
 
+
+def stage_content(ctx: dict) -> dict:
     # Generate AI titles and descriptions
     print(f"\n--- AI Content Generation ---")
-    ai_content = generate_all_content(filtered_listings, existing_evaluations)
+    evaluations = ctx["evaluations"]
+    ai_content = generate_all_content(ctx["filtered"], evaluations)
     for listing_id, content in ai_content.items():
-        if listing_id in existing_evaluations:
-            existing_evaluations[listing_id].ai_title = content["ai_title"]
-            existing_evaluations[listing_id].ai_description = content["ai_description"]
+        if listing_id in evaluations:
+            evaluations[listing_id].ai_title = content["ai_title"]
+            evaluations[listing_id].ai_description = content["ai_description"]
+            evaluations[listing_id].content_fingerprint = content["content_fingerprint"]
+    return {"content": evaluations}
 
-    save_evaluations(existing_evaluations)
 
+def stage_tags(ctx: dict) -> dict:
     # Extract structured tags
     print(f"\n--- Tag Extraction ---")
     existing_tags = load_existing_tags()
     print(f"Existing: {len(existing_tags)} tags")
-    new_tags = extract_all_tags(filtered_listings, existing_tags)
+    new_tags = extract_all_tags(ctx["filtered"], existing_tags)
     for tag in new_tags:
         existing_tags[tag.listing_id] = tag
-    save_tags(existing_tags)
+    ctx["stats"]["new_tags"] = len(new_tags)
+    return {"tags": existing_tags}
+
 
+def stage_analyze(ctx: dict) -> dict:
+    # Fused evaluation + tags + AI content, one call per listing (--fused)
+    print(f"\n--- Fused AI Analysis ---")
+    evaluations = load_existing_evaluations()
+    tags = load_existing_tags()
+    print(f"Existing: {len(evaluations)} evaluations, {len(tags)} tags")
+    new_evaluations, new_tags = analyze_all(ctx["filtered"], evaluations, tags)
+    ctx["stats"]["new_evaluations"] = new_evaluations
+    ctx["stats"]["new_tags"] = new_tags
+    return {"evaluations": evaluations, "content": evaluations, "tags": tags}
+
+
+def stage_post_filter(ctx: dict) -> dict:
     # Post-filter: remove low-scoring listings from display
     print(f"\n--- Post-filter Quality ---")
     quality_listings, removed_count = post_filter_evaluations(
-        list(existing_listings.values()),
-        list(existing_evaluations.values()),
+        list(ctx["images"].values()),
+        list(ctx["content"].values()),
     )
     print(f"  Post-filter: removed {removed_count} low-scoring listings")
     print(f"  Quality listings for display: {len(quality_listings)}")
+    ctx["stats"]["post_filtered_out"] = removed_count
+    return {"quality": quality_listings}
+
+
+def _load_listings_once(ctx: dict) -> Dict[str, Listing]:
+    """All listing artifacts share one dict, loaded from listings.json on resume."""
+    if "_listings" not in ctx:
+        ctx["_listings"] = load_existing_listings()
+    return ctx["_listings"]
+
+
+def _save_pre_filter(filtered: list):
+    os.makedirs(PIPELINE_DIR, exist_ok=True)
+    with open(PRE_FILTER_FILE, "w", encoding="utf-8") as f:
+        json.dump([l.id for l in filtered], f)
+
+
+def _load_pre_filter(ctx: dict) -> list:
+    if not os.path.exists(PRE_FILTER_FILE):
+        raise FileNotFoundError(f"{PRE_FILTER_FILE} missing; run from pre_filter")
+    with open(PRE_FILTER_FILE, "r", encoding="utf-8") as f:
+        ids = json.load(f)
+    listings = _load_listings_once(ctx)
+    return [listings[i] for i in ids if i in listings]
+
+
+def build_pipeline(fused: bool = False) -> Pipeline:
+    listing_artifacts = [
+        Artifact(name, save_listings, _load_listings_once)
+        for name in ("scraped", "translated", "cleaned", "images")
+    ]
+    artifacts = listing_artifacts + [
+        Artifact("filtered", _save_pre_filter, _load_pre_filter),
+        Artifact("evaluations", save_evaluations, lambda ctx: load_existing_evaluations()),
+        Artifact("content", save_evaluations, lambda ctx: load_existing_evaluations()),
+        Artifact("tags", save_tags, lambda ctx: load_existing_tags()),
+        Artifact("quality"),
+    ]
+    stages = [
+        Stage("scrape", stage_scrape, (), ("scraped",)),
+        Stage("translate", stage_translate, ("scraped",), ("translated",)),
+        Stage("clean", stage_clean, ("translated",), ("cleaned",)),
+        # Stages share the Listing objects: pre_filter and images wait for the text to be final,
+        # so the filter always sees translated, cleaned descriptions and no stage mutates them under another
+        Stage("pre_filter", stage_pre_filter, ("cleaned",), ("filtered",)),
+        Stage("images", stage_images, ("cleaned",), ("images",)),
+    ]
+    if fused:
+        stages.append(Stage("analyze", stage_analyze, ("filtered", "cleaned"), ("evaluations", "content", "tags")))
+    else:
+        stages += [
+            # Evaluation and tagging only need the filtered, cleaned listings: they run side by side.
+            # Evaluation also waits for image filtering, whose photo count it reads (see evaluator/prescorer)
+            Stage("evaluate", stage_evaluate, ("filtered", "cleaned", "images"), ("evaluations",)),
+            Stage("tags", stage_tags, ("filtered", "cleaned"), ("tags",)),
+            Stage("content", stage_content, ("filtered", "evaluations"), ("content",)),
+        ]
+    stages.append(Stage("post_filter", stage_post_filter, ("images", "content"), ("quality",)))
+    return Pipeline(stages, artifacts, PIPELINE_STATE_FILE)
+
+
+def print_summary(ctx: dict):
+    stats = ctx["stats"]
+    listings = ctx.get("images") or ctx.get("scraped") or _load_listings_once(ctx)
+    evaluations = ctx.get("content") or ctx.get("evaluations") or {}
 
-    # Summary
     print(f"\n{'=' * 60}")
     print(f"SUMMARY:")
-    print(f"  Total scraped: {len(existing_listings)}")
-    print(f"  Pre-filtered out: {len(rejection_log)}")
-    print(f"  Total evaluations: {len(existing_evaluations)}")
-    print(f"  Post-filtered out: {removed_count}")
-    print(f"  Quality listings: {len(quality_listings)}")
-    print(f"  Total tags: {len(existing_tags)}")
-    print(f"  New this run: {len(all_new_listings)} listings, {len(new_evaluations)} evaluations, {len(new_tags)} tags")
+    print(f"  Total scraped: {len(listings)}")
+    if "pre_filtered_out" in stats:
+        print(f"  Pre-filtered out: {stats['pre_filtered_out']}")
+    print(f"  Total evaluations: {len(evaluations)}")
+    if "post_filtered_out" in stats:
+        print(f"  Post-filtered out: {stats['post_filtered_out']}")
+        print(f"  Quality listings: {len(ctx['quality'])}")
+    if "tags" in ctx:
+        print(f"  Total tags: {len(ctx['tags'])}")
+    print(f"  New this run: {stats.get('new_listings', 0)} listings, "
+          f"{stats.get('new_evaluations', 0)} evaluations, {stats.get('new_tags', 0)} tags")
 
     # Show top matches
-    if existing_evaluations:
+    if evaluations:
         top = sorted(
-            existing_evaluations.values(),
+            evaluations.values(),
             key=lambda e: e.quality_score,
             reverse=True,
         )[:5]
         print(f"\n  Top 5 quality listings:")
         for e in top:
-            listing = existing_listings.get(e.listing_id)
+            listing = listings.get(e.listing_id)
             title = listing.title[:50] if listing else "?"
             avail = f" [{e.availability_status}]" if hasattr(e, 'availability_status') else ""
             print(f"    {e.quality_score}/100 - {title}{avail}")
@@ -230,5 +366,72 @@ def main():
     print(f"{'=' * 60}")
 
 
+def print_stale_report():
+    """Show, per LLM stage, which stored outputs are out of date and why. Runs nothing."""
+    listings = load_existing_listings()
+    evaluations = load_existing_evaluations()
+    tags = load_existing_tags()
+    filtered, _ = pre_filter(list(listings.values()), set(evaluations), persist=False)
+    print(f"Stale report over {len(listings)} listings ({len(filtered)} after pre-filter)")
+
+    plan_cleaning(strip_boilerplate(list(listings.values()), learn=False)[0])[1].print(verbose=True)
+    plan_evaluations(filtered, evaluations)[1].print(verbose=True)
+    plan_content(filtered, evaluations)[1].print(verbose=True)
+    plan_tags(filtered, tags)[1].print(verbose=True)
+
+
+def main():
+    # --fused changes the stage list, which --from/--to choose from
+    fused = argparse.ArgumentParser(add_help=False)
+    fused.add_argument("--fused", action="store_true")
+    pipeline = build_pipeline(fused.parse_known_args()[0].fused)
+    parser = argparse.ArgumentParser(description="Cohabitat Europe scraper & evaluator")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Skip detail pages of recently seen listings and stop paginating at known ones")
+    parser.add_argument("--replay", metavar="RUN_ID",
+                        help="Replay an archived run from data/archive instead of the network")
+    parser.add_argument("--from", dest="start", choices=pipeline.stage_names,
+                        help="First stage to run (earlier outputs are loaded from data/)")
+    parser.add_argument("--to", dest="stop", choices=pipeline.stage_names,
+                        help="Last stage to run")
+    parser.add_argument("--resume", action="store_true",
+                        help="Skip stages completed by the previous (interrupted) run")
+    parser.add_argument("--no-llm-cache", action="store_true",
+                        help="Do not answer LLM calls from data/cache (fresh answers are still stored)")
+    parser.add_argument("--batch", action="store_true",
+                        help="Submit LLM stages as Message Batches jobs (slower, cheaper; resumable)")
+    parser.add_argument("--pack", action="store_true",
+                        help="Evaluate and tag several listings per LLM request (cached rubric)")
+    parser.add_argument("--prescore", action="store_true",
+                        help="Score listings locally and only send uncertain or borderline ones to the LLM evaluator")
+    parser.add_argument("--fused", action="store_true",
+                        help="Evaluate, tag and write AI content with one LLM call per listing (stage 'analyze')")
+    parser.add_argument("--stale-report", action="store_true",
+                        help="Show which LLM stage outputs are out of date and why, then exit")
+    args = parser.parse_args()
+
+    if args.stale_report:
+        print_stale_report()
+        return
+
+    print("=" * 60)
+    print("Cohabitat Europe - Scraper & Evaluator")
+    print("=" * 60)
+    open_run(args.replay)
+    if args.no_llm_cache:
+        set_bypass(True)
+    if args.batch:
+        set_batch_mode(True)
+    if args.pack:
+        set_packing(True)
+    if args.prescore:
+        set_prescoring(True)
+
+    ctx = pipeline.run(args.start, args.stop, resume=args.resume, ctx={"args": args, "stats": {}})
+    print_summary(ctx)
+    print_llm_cache_stats()
+    print_compaction_stats()
+
+
 if __name__ == "__main__":
     main()
@@ -1,6 +1,6 @@
 from pydantic import BaseModel, Field
 from datetime import datetime
-from typing import Optional, List
+from typing import Optional, List, Dict
 import hashlib
 
 
@@ -21,14 +21,22 @@ class Listing(BaseModel):
     images: List[str] = Field(default_factory=list)
     date_published: Optional[str] = None
     date_scraped: str = ""
+    last_seen: str = ""  # last time the detail page was fetched or confirmed unchanged
     latitude: Optional[float] = None
     longitude: Optional[float] = None
+    clean_fingerprint: Optional[str] = None  # see scraper/fingerprint.py
+    # Source text kept when title/description are replaced by a translation (see scraper/translator.py)
+    original_title: Optional[str] = None
+    original_description: Optional[str] = None
+    translation_key: Optional[str] = None
 
     def model_post_init(self, __context) -> None:
         if not self.id:
             self.id = hashlib.md5(self.source_url.encode()).hexdigest()[:12]
         if not self.date_scraped:
             self.date_scraped = datetime.utcnow().isoformat()
+        if not self.last_seen:
+            self.last_seen = self.date_scraped
 
 
 class Evaluation(BaseModel):
@@ -42,6 +50,9 @@ class Evaluation(BaseModel):
     ai_title: Optional[str] = None
     ai_description: Optional[str] = None
     date_evaluated: str = ""
+    input_fingerprint: Optional[str] = None
+    content_fingerprint: Optional[str] = None
+    score_source: Optional[str] = None  # "prescorer" when estimated locally (see scraper/prescorer.py)
 
     def model_post_init(self, __context) -> None:
         if not self.date_evaluated:
@@ -87,7 +98,11 @@ class ListingTags(BaseModel):
     near_nature: Optional[bool] = None
     near_transport: Optional[bool] = None
 
+    # Origine de chaque champ rempli: {"source": "rule"|"llm", "confidence": ..., "evidence": ...}
+    provenance: Dict[str, dict] = Field(default_factory=dict)
+
     date_extracted: str = ""
+    input_fingerprint: Optional[str] = None
 
     def model_post_init(self, __context) -> None:
         if not self.date_extracted:
@@ -0,0 +1,156 @@
+"""Bounded name similarity for deduplication.
+
+Deduplication only needs to know whether two names are within a small edit
+distance, not the exact distance of every pair. NameMatcher normalizes each
+name once (optionally without accents, optionally as a sorted token set)
+and keeps it interned with its length, character mask and character counts.
+A pair then goes through cheap lower bounds before any edit distance is
+computed:
+
+1. the length difference,
+2. the characters present in only one of the names (a single edit changes
+   at most two of them),
+3. the multiset difference of the characters,
+
+and only the survivors compute an edit distance: common prefix and suffix
+trimmed, then a bit-parallel Levenshtein (one DP column per character, as
+integer bit vectors) that stops as soon as the bound can no longer be met.
+
+Used by the retreat deduplicator (scraper/deduplicator.py); the cohousing
+side can reuse it for listing titles.
+"""
+
+import re
+import sys
+import unicodedata
+from collections import Counter
+from typing import Callable, Dict, NamedTuple, Optional
+
+
+def strip_accents(text: str) -> str:
+    return "".join(c for c in unicodedata.normalize("NFKD", text) if not unicodedata.combining(c))
+
+
+def default_normalize(name: str) -> str:
+    return " ".join(re.split(r"\s+", name.lower().strip()))
+
+
+class PreparedName(NamedTuple):
+    key: str
+    mask: int  # one bit per character present
+    counts: Counter
+
+
+def _mask(text: str) -> int:
+    mask = 0
+    for c in text:
+        mask |= 1 << (ord(c) % 64)
+    return mask
+
+
+def bounded_levenshtein(a: str, b: str, max_distance: int) -> Optional[int]:
+    """Levenshtein distance of `a` and `b` if it is at most `max_distance`, else None."""
+    # A common prefix or suffix does not change the distance
+    prefix = 0
+    shortest = min(len(a), len(b))
+    while prefix < shortest and a[prefix] == b[prefix]:
+        prefix += 1
+    suffix = 0
+    while suffix < shortest - prefix and a[-1 - suffix] == b[-1 - suffix]:
+        suffix += 1
+    a = a[prefix:len(a) - suffix]
+    b = b[prefix:len(b) - suffix]
+
+    if len(a) < len(b):
+        a, b = b, a
+    if len(a) - len(b) > max_distance:
+        return None
+    if not b:
+        return len(a)
+
+    # Bit-parallel Levenshtein (Myers/Hyyrö): one column of the DP matrix per character of `b`
+    # as bit vectors over `a`. `score` is the bottom cell of the column; once it exceeds the
+    # bound by more than the characters left, the distance cannot come back under it.
+    m = len(a)
+    full = (1 << m) - 1
+    last = 1 << (m - 1)
+    peq: Dict[str, int] = {}
+    for i, c in enumerate(a):
+        peq[c] = peq.get(c, 0) | (1 << i)
+    pv, mv, score = full, 0, m
+    remaining = len(b)
+    for c in b:
+        eq = peq.get(c, 0)
+        xv = eq | mv
+        xh = (((eq & pv) + pv) ^ pv) | eq
+        ph = (mv | ~(xh | pv)) & full
+        mh = pv & xh
+        if ph & last:
+            score += 1
+        elif mh & last:
+            score -= 1
+        remaining -= 1
+        if score - remaining > max_distance:
+            return None
+        ph = ((ph << 1) | 1) & full
+        mh = (mh << 1) & full
+        pv = (mh | ~(xv | ph)) & full
+        mv = ph & xv
+
+    return score if score <= max_distance else None
+
+
+class NameMatcher:
+    """Names within `max_distance` edits of each other, after normalization."""
+
+    def __init__(
+        self,
+        max_distance: int = 2,
+        normalize: Callable[[str], str] = default_normalize,
+        accent_insensitive: bool = True,
+        token_set: bool = False,
+    ):
+        self.max_distance = max_distance
+        self.normalize = normalize
+        self.accent_insensitive = accent_insensitive
+        self.token_set = token_set
+        self._prepared: Dict[str, PreparedName] = {}
+        self.stats = Counter()
+
+    def prepare(self, name: str) -> PreparedName:
+        """Normalized form of `name`, computed once per distinct name."""
+        prepared = self._prepared.get(name)
+        if prepared is None:
+            key = self.normalize(name)
+            if self.accent_insensitive:
+                key = strip_accents(key)
+            if self.token_set:
+                key = " ".join(sorted(set(key.split())))
+            key = sys.intern(key)
+            prepared = PreparedName(key, _mask(key), Counter(key))
+            self._prepared[name] = prepared
+        return prepared
+
+    def distance(self, name1: str, name2: str) -> Optional[int]:
+        """Edit distance of the normalized names, or None when it exceeds max_distance."""
+        a, b = self.prepare(name1), self.prepare(name2)
+        k = self.max_distance
+        if a.key is b.key:
+            self.stats["identical"] += 1
+            return 0
+        if abs(len(a.key) - len(b.key)) > k:
+            self.stats["length"] += 1
+            return None
+        if bin(a.mask ^ b.mask).count("1") > 2 * k:
+            self.stats["mask"] += 1
+            return None
+        # Characters of a missing from b, and of b missing from a: the two differ by len(a) - len(b)
+        only_a = sum((a.counts - b.counts).values())
+        if max(only_a, only_a - len(a.key) + len(b.key)) > k:
+            self.stats["bag"] += 1
+            return None
+        self.stats["dp"] += 1
+        return bounded_levenshtein(a.key, b.key, k)
+
+    def matches(self, name1: str, name2: str) -> bool:
+        return self.distance(name1, name2) is not None
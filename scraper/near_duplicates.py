@@ -0,0 +1,245 @@
+"""Near-duplicate detection across sources (MinHash + LSH).
+
+The same project is often posted on several sites (habitat-groupe.be,
+samenhuizen.be, findacohouse.be...) or reposted with small rewordings, which
+the exact hash of quality_filter does not catch. Each listing's text (title
+and description, with the source's boilerplate stripped, see
+scraper/boilerplate.py) is cut into word shingles and summarised by a MinHash
+signature of MINHASH_PERMUTATIONS values. The share of equal values between
+two signatures estimates the Jaccard similarity of their shingle sets.
+
+Signatures are split into MINHASH_BANDS bands indexed in hash buckets (LSH):
+two listings are compared only if at least one band is identical, so looking
+up a new listing costs its number of bands, not the number of listings.
+Candidates at or above NEAR_DUPLICATE_THRESHOLD are linked, and each cluster
+keeps one canonical listing: an already evaluated member if there is one,
+then the one first seen, then the smallest id.
+
+Signatures are persisted in NEAR_DUPLICATE_FILE with the hash of the text
+they were computed from, so only new or edited listings are re-hashed, and
+with the date each listing was first indexed. Unlike date_scraped, which
+restarts whenever a listing is scraped again, that date does not move, so
+the canonical member stays the same from one run to the next.
+Listings are compared on their current description, which is the French
+translation once the translator has run: a listing reposted in another
+language is caught on the run after its translation.
+"""
+
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+from typing import Collection, Dict, Iterable, List, Optional, Set, Tuple
+
+from scraper.boilerplate import get_boilerplate_model
+from scraper.config import MINHASH_BANDS, MINHASH_PERMUTATIONS, NEAR_DUPLICATE_FILE, NEAR_DUPLICATE_THRESHOLD
+from scraper.models import Listing
+
+SHINGLE_WORDS = 3
+# Below this many shingles a text is too short for a meaningful estimate
+MIN_SHINGLES = 10
+
+_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+# Fixed seed: signatures stay comparable across runs
+_rng = random.Random(20240611)
+_PERMUTATIONS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(MINHASH_PERMUTATIONS)]
+_ROWS = MINHASH_PERMUTATIONS // MINHASH_BANDS
+
+
+def listing_text(listing: Listing) -> str:
+    description = get_boilerplate_model().strip(listing.source, listing.description) or ""
+    return f"{listing.title}\n{description}"
+
+
+def shingles(text: str) -> Set[str]:
+    text = re.sub(r"https?://\S+", " ", text.lower())
+    words = re.findall(r"\w+", text)
+    return {" ".join(words[i:i + SHINGLE_WORDS]) for i in range(len(words) - SHINGLE_WORDS + 1)}
+
+
+def minhash(shingle_set: Iterable[str]) -> List[int]:
+    hashes = [int.from_bytes(hashlib.blake2b(s.encode(), digest_size=8).digest(), "big") for s in shingle_set]
+    return [min(((a * h + b) % _PRIME) & _MAX_HASH for h in hashes) for a, b in _PERMUTATIONS]
+
+
+def similarity(sig1: List[int], sig2: List[int]) -> float:
+    """Estimated Jaccard similarity of the two shingle sets."""
+    return sum(1 for x, y in zip(sig1, sig2) if x == y) / len(sig1)
+
+
+def _bands(signature: List[int]) -> List[Tuple[int, tuple]]:
+    return [(band, tuple(signature[band * _ROWS:(band + 1) * _ROWS])) for band in range(MINHASH_BANDS)]
+
+
+def _distinct_units(a: Listing, b: Listing) -> bool:
+    """Two units of one project on the same site: same text, but a different price or unit number.
+
+    Colivings post each room with the project's description ("Room 1",
+    "Studio 9", "3rd floor"); those are separate offers, not reposts.
+    """
+    if a.source != b.source:
+        return False
+    if a.price_amount is not None and b.price_amount is not None and a.price_amount != b.price_amount:
+        return True
+    return set(re.findall(r"\d+", a.title)) != set(re.findall(r"\d+", b.title))
+
+
+class NearDuplicateIndex:
+    """MinHash signatures by listing id, persisted as
+    {"permutations", "signatures": {id: {"text", "signature", "first_seen"}}}."""
+
+    def __init__(self, path: str = NEAR_DUPLICATE_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self.entries: Dict[str, dict] = {}
+        self.buckets: Dict[Tuple[int, tuple], Set[str]] = {}
+        self.computed = 0
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            # Signatures from other settings cannot be compared with new ones
+            if data.get("permutations") == MINHASH_PERMUTATIONS:
+                for listing_id, entry in data.get("signatures", {}).items():
+                    self._insert(listing_id, entry)
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"permutations": MINHASH_PERMUTATIONS, "signatures": self.entries}, f)
+        os.replace(tmp, self.path)
+
+    def _insert(self, listing_id: str, entry: dict):
+        self.entries[listing_id] = entry
+        if entry["signature"]:
+            for key in _bands(entry["signature"]):
+                self.buckets.setdefault(key, set()).add(listing_id)
+
+    def _remove(self, listing_id: str):
+        entry = self.entries.pop(listing_id, None)
+        if entry and entry["signature"]:
+            for key in _bands(entry["signature"]):
+                bucket = self.buckets.get(key)
+                if bucket:
+                    bucket.discard(listing_id)
+                    if not bucket:
+                        del self.buckets[key]
+
+    def add(self, listing: Listing) -> Optional[List[int]]:
+        """Index `listing`, re-hashing it only if its text changed; None for texts too short to compare."""
+        text = listing_text(listing)
+        text_hash = hashlib.md5(text.encode()).hexdigest()
+        with self._lock:
+            entry = self.entries.get(listing.id)
+            if entry and "first_seen" not in entry:
+                # Indexed before first_seen was kept: the current scrape date is the best guess
+                entry["first_seen"] = listing.date_scraped
+            if entry and entry["text"] == text_hash:
+                return entry["signature"]
+            shingle_set = shingles(text)
+            signature = minhash(shingle_set) if len(shingle_set) >= MIN_SHINGLES else None
+            first_seen = entry["first_seen"] if entry else listing.date_scraped
+            self._remove(listing.id)
+            self._insert(listing.id, {"text": text_hash, "signature": signature, "first_seen": first_seen})
+            self.computed += 1
+            return signature
+
+    def query(self, listing_id: str) -> List[Tuple[str, float]]:
+        """Indexed listings at least NEAR_DUPLICATE_THRESHOLD similar to `listing_id`, best first."""
+        with self._lock:
+            signature = self.entries.get(listing_id, {}).get("signature")
+            if not signature:
+                return []
+            candidates = set()
+            for key in _bands(signature):
+                candidates |= self.buckets.get(key, set())
+            candidates.discard(listing_id)
+            found = [(other, similarity(signature, self.entries[other]["signature"])) for other in candidates]
+        return sorted(((o, s) for o, s in found if s >= NEAR_DUPLICATE_THRESHOLD), key=lambda x: -x[1])
+
+    def first_seen(self, listing_id: str) -> str:
+        with self._lock:
+            return self.entries.get(listing_id, {}).get("first_seen", "")
+
+    def prune(self, keep: Set[str]):
+        with self._lock:
+            for listing_id in [i for i in self.entries if i not in keep]:
+                self._remove(listing_id)
+
+
+def find_near_duplicates(
+    listings: List[Listing],
+    evaluated: Collection[str] = (),
+    stored: Optional[Collection[str]] = None,
+    persist: bool = True,
+) -> Dict[str, Tuple[str, float]]:
+    """{duplicate id: (canonical id, best similarity within the cluster)} for the given listings.
+
+    The canonical member of a cluster is an evaluated one (ids in
+    `evaluated`) if any, then the one first seen, so it keeps its
+    evaluation, tags and content when new copies show up or are re-scraped.
+
+    The index only forgets listings missing from `stored` (all stored listing
+    ids, `listings` by default): a listing left out of this run by another
+    filter keeps its signature and first_seen date. Without `persist` the
+    index file is not rewritten.
+    """
+    index = get_near_duplicate_index()
+    by_id = {listing.id: listing for listing in listings}
+    index.prune(set(stored) | set(by_id) if stored is not None else set(by_id))
+    index.computed = 0
+    for listing in listings:
+        index.add(listing)
+    if persist:
+        index.save()
+
+    parent = {listing_id: listing_id for listing_id in by_id}
+
+    def find(i: str) -> str:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    best: Dict[str, float] = {}
+    for listing in listings:
+        for other, score in index.query(listing.id):
+            if other not in by_id or _distinct_units(listing, by_id[other]):
+                continue
+            best[listing.id] = max(best.get(listing.id, 0.0), score)
+            parent[find(listing.id)] = find(other)
+
+    clusters: Dict[str, List[Listing]] = {}
+    for listing in listings:
+        clusters.setdefault(find(listing.id), []).append(listing)
+
+    duplicates = {}
+    for members in clusters.values():
+        if len(members) < 2:
+            continue
+        canonical = min(members, key=lambda l: (l.id not in evaluated, index.first_seen(l.id), l.id))
+        for member in members:
+            if member is not canonical:
+                duplicates[member.id] = (canonical.id, best.get(member.id, 0.0))
+
+    cluster_count = sum(1 for members in clusters.values() if len(members) > 1)
+    print(
+        f"  [near_duplicates] {cluster_count} clusters, {len(duplicates)} duplicates "
+        f"({index.computed} signatures computed, {len(listings) - index.computed} reused)"
+    )
+    return duplicates
+
+
+_index: Optional[NearDuplicateIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_near_duplicate_index() -> NearDuplicateIndex:
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = NearDuplicateIndex()
+        return _index
@@ -0,0 +1,180 @@
+"""Declarative stage DAG for the scraping pipeline.
+
+A pipeline is a list of stages, each declaring the artifacts it reads and
+writes. Stages whose inputs are ready run concurrently in a thread pool, so
+independent branches (e.g. image filtering vs. pre-filtering, image
+filtering vs. tag extraction) overlap.
+
+Artifacts with a `save` function are persisted as soon as they are produced.
+A run can then start or stop at any stage: inputs that the selected stages
+do not produce themselves are loaded from the stored outputs of an earlier
+run. `resume=True` skips the stages the previous run already completed.
+"""
+
+import json
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+class PipelineError(Exception):
+    pass
+
+
+@dataclass
+class Artifact:
+    """A named stage output, optionally persisted between runs."""
+    name: str
+    save: Optional[Callable[[Any], None]] = None
+    load: Optional[Callable[[dict], Any]] = None  # receives the context loaded so far
+
+
+@dataclass
+class Stage:
+    """`run(ctx)` returns a dict mapping each declared output to its value."""
+    name: str
+    run: Callable[[dict], Dict[str, Any]]
+    inputs: Tuple[str, ...] = ()
+    outputs: Tuple[str, ...] = ()
+
+
+class Pipeline:
+    def __init__(self, stages: List[Stage], artifacts: List[Artifact], state_file: str):
+        self.stages = stages
+        self.artifacts = {a.name: a for a in artifacts}
+        self.state_file = state_file
+        self._validate()
+
+    def _validate(self):
+        produced = set()
+        for stage in self.stages:
+            missing = [i for i in stage.inputs if i not in produced]
+            if missing:
+                raise PipelineError(f"Stage '{stage.name}' reads {missing} before any earlier stage writes it")
+            produced.update(stage.outputs)
+
+    @property
+    def stage_names(self) -> List[str]:
+        return [s.name for s in self.stages]
+
+    def select(self, start: Optional[str] = None, stop: Optional[str] = None) -> List[Stage]:
+        """Stages from `start` to `stop` inclusive, in declaration (topological) order."""
+        names = self.stage_names
+        for name in (start, stop):
+            if name and name not in names:
+                raise PipelineError(f"Unknown stage '{name}' (choose from {', '.join(names)})")
+        first = names.index(start) if start else 0
+        last = names.index(stop) if stop else len(names) - 1
+        if first > last:
+            raise PipelineError(f"Stage '{start}' comes after '{stop}'")
+        return self.stages[first:last + 1]
+
+    # --- State ---
+
+    def _load_state(self) -> dict:
+        if not os.path.exists(self.state_file):
+            return {}
+        with open(self.state_file, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _save_state(self, state: dict):
+        os.makedirs(os.path.dirname(self.state_file), exist_ok=True)
+        with open(self.state_file, "w", encoding="utf-8") as f:
+            json.dump(state, f, ensure_ascii=False, indent=2)
+
+    def _load_inputs(self, selected: List[Stage], ctx: dict):
+        produced = {o for s in selected for o in s.outputs}
+        needed = {i for s in selected for i in s.inputs if i not in produced}
+        # Load in declaration order so loaders can build on earlier artifacts
+        for name, artifact in self.artifacts.items():
+            if name not in needed or name in ctx:
+                continue
+            if artifact.load is None:
+                raise PipelineError(f"Artifact '{name}' is not stored; include the stage that produces it")
+            print(f"  [pipeline] Loading stored '{name}'")
+            ctx[name] = artifact.load(ctx)
+
+    # --- Execution ---
+
+    def run(
+        self,
+        start: Optional[str] = None,
+        stop: Optional[str] = None,
+        resume: bool = False,
+        ctx: Optional[dict] = None,
+        max_workers: int = 4,
+    ) -> dict:
+        """Run the selected stages, concurrently where the DAG allows.
+
+        Returns the context dict holding every artifact produced or loaded.
+        """
+        ctx = ctx if ctx is not None else {}
+        selected = self.select(start, stop)
+        state = self._load_state()
+
+        if resume and state.get("completed"):
+            done = set(state["completed"])
+            skipped = [s.name for s in selected if s.name in done]
+            selected = [s for s in selected if s.name not in done]
+            if skipped:
+                print(f"  [pipeline] Resuming, already done: {', '.join(skipped)}")
+        else:
+            state = {"started": datetime.utcnow().isoformat(), "completed": [], "timings": {}}
+
+        if not selected:
+            print("  [pipeline] Nothing to run")
+            return ctx
+
+        self._load_inputs(selected, ctx)
+        print(f"  [pipeline] Stages: {' -> '.join(s.name for s in selected)}")
+
+        producer = {o: s.name for s in selected for o in s.outputs}
+        deps = {s.name: {producer[i] for i in s.inputs if i in producer} for s in selected}
+        by_name = {s.name: s for s in selected}
+        finished: set = set()
+        running: Dict[Any, Tuple[str, float]] = {}
+        error = None
+
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="stage") as pool:
+            while len(finished) < len(selected):
+                if error is None:
+                    launched = {name for name, _ in running.values()}
+                    for name, stage in by_name.items():
+                        if name in finished or name in launched or not deps[name] <= finished:
+                            continue
+                        running[pool.submit(stage.run, ctx)] = (name, time.monotonic())
+                if not running:
+                    break
+
+                done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                for future in done:
+                    name, started = running.pop(future)
+                    elapsed = time.monotonic() - started
+                    try:
+                        outputs = future.result() or {}
+                    except Exception as e:
+                        print(f"  [pipeline] Stage '{name}' failed after {elapsed:.1f}s: {e}")
+                        error = error or PipelineError(f"Stage '{name}' failed: {e}")
+                        continue
+
+                    for artifact_name in by_name[name].outputs:
+                        if artifact_name not in outputs:
+                            error = error or PipelineError(f"Stage '{name}' did not produce '{artifact_name}'")
+                            continue
+                        ctx[artifact_name] = outputs[artifact_name]
+                        artifact = self.artifacts.get(artifact_name)
+                        if artifact and artifact.save:
+                            artifact.save(outputs[artifact_name])
+
+                    finished.add(name)
+                    state["completed"].append(name)
+                    state["timings"][name] = round(elapsed, 1)
+                    self._save_state(state)
+                    print(f"  [pipeline] Stage '{name}' done in {elapsed:.1f}s")
+
+        if error:
+            raise error
+        return ctx
@@ -0,0 +1,380 @@
+"""Local quality pre-scorer: gates which listings need an LLM evaluation.
+
+Most of an evaluation's quality_score and data_quality_score comes down to
+how complete a listing is: description length, price, contact, location,
+publication date, images. A ridge regression over those features is trained
+from the stored evaluations (train_prescorer.py) and saved next to this
+module in PRESCORER_MODEL_FILE.
+
+Training keeps out-of-fold predictions (5 folds) to measure how far the model
+is from the LLM, per band of predicted score. That measured error is the
+prediction's expected_error, and confidence = 1 - expected_error / 50.
+
+With --prescore, the evaluator only sends a listing to the LLM when the
+model is uncertain (expected error above PRESCORE_MAX_ERROR, or features
+outside the training range) or when the prediction is close enough to
+MIN_SCORE_THRESHOLD that an error could flip the post-filter decision.
+The rest get a local evaluation marked score_source="prescorer", whose
+fingerprint names the pre-scorer model instead of the LLM: it is evaluated
+again once prescoring is off or the model is retrained. Models trained on
+legacy overall_score labels are not loaded.
+"""
+
+import json
+import math
+import os
+import re
+import threading
+import zlib
+from datetime import datetime
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from scraper.config import (
+    PRESCORE_MAX_ERROR,
+    PRESCORE_THRESHOLD_MARGIN,
+    PRESCORER_MODEL_FILE,
+)
+from scraper.models import Listing
+from scraper.quality_filter import MIN_SCORE_THRESHOLD
+
+FEATURES = (
+    "description_chars_log",
+    "description_words_log",
+    "has_price",
+    "has_contact",
+    "has_location",
+    "has_province",
+    "has_coordinates",
+    "has_date",
+    "age_years",
+    "image_count",
+    "type_offre_location",
+    "type_creation_groupe",
+    "type_cohousing",
+)
+TARGETS = ("quality_score", "data_quality_score")
+# Evaluations stored before quality_score existed carry their score under this name
+LEGACY_LABELS = {"quality_score": "overall_score"}
+
+RIDGE_LAMBDA = 1.0
+FOLDS = 5
+BAND_WIDTH = 10  # calibration bands of predicted quality_score
+MIN_BAND_SIZE = 10  # sparser bands count as at least twice the overall error
+
+EMAIL_RE = re.compile(r"[\w.+-]+@[\w-]+\.[\w.]+")
+PHONE_RE = re.compile(r"(?:\+|00)\d{2}[\s./-]?\d|\b0\d{1,3}[\s./-]?\d{2}[\s./-]?\d{2}")
+
+
+class Prediction(NamedTuple):
+    quality_score: int
+    data_quality_score: int
+    expected_error: float  # typical |quality_score - LLM score| for similar predictions
+    confidence: float  # 0..1
+    in_range: bool  # features within what the model was trained on
+
+
+def features(listing: Listing, now: Optional[datetime] = None) -> List[float]:
+    description = listing.description or ""
+    age_years = 0.0
+    if listing.date_published:
+        try:
+            published = datetime.fromisoformat(listing.date_published[:10])
+            age_years = min(5.0, max(0.0, ((now or datetime.now()) - published).days / 365))
+        except ValueError:
+            pass
+    return [
+        math.log1p(len(description)),
+        math.log1p(len(description.split())),
+        float(bool(listing.price or listing.price_amount)),
+        float(bool(listing.contact or EMAIL_RE.search(description) or PHONE_RE.search(description))),
+        float(bool(listing.location)),
+        float(bool(listing.province)),
+        float(listing.latitude is not None and listing.longitude is not None),
+        float(bool(listing.date_published)),
+        age_years,
+        float(min(len(listing.images), 10)),
+        float(listing.listing_type == "offre-location"),
+        float(listing.listing_type == "creation-groupe"),
+        float(listing.listing_type == "cohousing"),
+    ]
+
+
+def _solve(a: List[List[float]], b: List[float]) -> List[float]:
+    """Gaussian elimination with partial pivoting (a is small and square)."""
+    n = len(b)
+    m = [row[:] + [b[i]] for i, row in enumerate(a)]
+    for col in range(n):
+        pivot = max(range(col, n), key=lambda r: abs(m[r][col]))
+        m[col], m[pivot] = m[pivot], m[col]
+        if abs(m[col][col]) < 1e-12:
+            continue
+        for r in range(n):
+            if r != col:
+                factor = m[r][col] / m[col][col]
+                for c in range(col, n + 1):
+                    m[r][c] -= factor * m[col][c]
+    return [m[i][n] / m[i][i] if abs(m[i][i]) >= 1e-12 else 0.0 for i in range(n)]
+
+
+def _fit_ridge(rows: Sequence[Sequence[float]], targets: Sequence[float]) -> dict:
+    """Ridge regression on standardized features; the intercept is not penalized."""
+    d = len(rows[0])
+    means = [sum(r[j] for r in rows) / len(rows) for j in range(d)]
+    stds = [math.sqrt(sum((r[j] - means[j]) ** 2 for r in rows) / len(rows)) or 1.0 for j in range(d)]
+    x = [[1.0] + [(r[j] - means[j]) / stds[j] for j in range(d)] for r in rows]
+    xtx = [[sum(row[i] * row[k] for row in x) for k in range(d + 1)] for i in range(d + 1)]
+    for i in range(1, d + 1):
+        xtx[i][i] += RIDGE_LAMBDA
+    xty = [sum(row[i] * y for row, y in zip(x, targets)) for i in range(d + 1)]
+    return {"means": means, "stds": stds, "weights": _solve(xtx, xty)}
+
+
+def _apply(linear: dict, row: Sequence[float]) -> float:
+    weights = linear["weights"]
+    return weights[0] + sum(
+        w * (v - m) / s for w, v, m, s in zip(weights[1:], row, linear["means"], linear["stds"])
+    )
+
+
+def _band(score: float) -> str:
+    return str(int(max(0, min(99, score)) // BAND_WIDTH) * BAND_WIDTH)
+
+
+class PreScorer:
+    """Two ridge models (quality_score, data_quality_score) plus their measured error per band."""
+
+    def __init__(self, data: dict):
+        self.data = data
+
+    @classmethod
+    def load(cls, path: str = PRESCORER_MODEL_FILE) -> Optional["PreScorer"]:
+        if not os.path.exists(path):
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if list(data.get("features", [])) != list(FEATURES):
+            print(f"  [prescorer] {path} was trained on other features, retrain it (train_prescorer.py)")
+            return None
+        legacy = data.get("legacy_labels", {})
+        if any(legacy.values()):
+            # overall_score is on another scale than quality_score: such a model must not skip the LLM
+            print(f"  [prescorer] {path} was trained on legacy labels "
+                  f"({', '.join(LEGACY_LABELS[target] for target, n in legacy.items() if n)}), "
+                  f"retrain it on current evaluations (train_prescorer.py)")
+            return None
+        return cls(data)
+
+    @property
+    def model_name(self) -> str:
+        """Identifies the trained model in evaluation fingerprints: retraining makes local estimates stale."""
+        return "prescorer-" + re.sub(r"\D", "", self.data["trained_at"])[:14]
+
+    def save(self, path: str = PRESCORER_MODEL_FILE):
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.data, f, indent=2)
+        os.replace(tmp, path)
+
+    def predict(self, listing: Listing) -> Prediction:
+        row = features(listing)
+        quality = max(0.0, min(100.0, _apply(self.data["models"]["quality_score"], row)))
+        data_quality = max(0.0, min(10.0, _apply(self.data["models"]["data_quality_score"], row)))
+
+        calibration = self.data["calibration"]
+        band = calibration["bands"].get(_band(quality))
+        if band and band["count"] >= MIN_BAND_SIZE:
+            expected_error = band["mae"]
+        else:
+            expected_error = max(band["mae"] if band else 0.0, calibration["mae"] * 2)
+
+        in_range = True
+        for value, low, high in zip(row, self.data["ranges"]["min"], self.data["ranges"]["max"]):
+            slack = 0.1 * (high - low)
+            if value < low - slack or value > high + slack:
+                in_range = False
+                break
+
+        return Prediction(
+            quality_score=round(quality),
+            data_quality_score=round(data_quality),
+            expected_error=round(expected_error, 1),
+            confidence=round(max(0.0, 1 - expected_error / 50), 2),
+            in_range=in_range,
+        )
+
+    def needs_llm(self, prediction: Prediction) -> Optional[str]:
+        """Why this prediction is not good enough to skip the LLM, or None."""
+        if not prediction.in_range:
+            return "outside training data"
+        if prediction.expected_error > PRESCORE_MAX_ERROR:
+            return "uncertain"
+        if abs(prediction.quality_score - MIN_SCORE_THRESHOLD) <= PRESCORE_THRESHOLD_MARGIN + prediction.expected_error:
+            return "near threshold"
+        return None
+
+    def split(self, listings: List[Listing]) -> Tuple[List[Listing], List[Tuple[Listing, Prediction]]]:
+        """(listings for the LLM, [(listing, prediction)] trusted locally)."""
+        to_llm = []
+        local = []
+        reasons: Dict[str, int] = {}
+        for listing in listings:
+            prediction = self.predict(listing)
+            reason = self.needs_llm(prediction)
+            if reason:
+                to_llm.append(listing)
+                reasons[reason] = reasons.get(reason, 0) + 1
+            else:
+                local.append((listing, prediction))
+        detail = ", ".join(f"{n} {reason}" for reason, n in sorted(reasons.items()))
+        print(f"  [prescorer] {len(local)} scored locally, {len(to_llm)} sent to the LLM"
+              + (f" ({detail})" if detail else ""))
+        return to_llm, local
+
+
+def labelled_examples(listings: Dict[str, Listing], evaluations: List[dict]) -> Tuple[List[Listing], Dict[str, List[float]], Dict[str, int]]:
+    """Listings with stored LLM scores, their targets, and how many evaluations were skipped
+    for carrying a target only under its legacy name (overall_score is not on the quality_score scale)."""
+    examples = []
+    targets: Dict[str, List[float]] = {target: [] for target in TARGETS}
+    legacy = {target: 0 for target in TARGETS}
+    for evaluation in evaluations:
+        listing = listings.get(evaluation.get("listing_id"))
+        if listing is None or evaluation.get("score_source") == "prescorer":
+            continue
+        values = {}
+        for target in TARGETS:
+            value = evaluation.get(target)
+            if value is None and LEGACY_LABELS.get(target) in evaluation:
+                legacy[target] += 1
+            values[target] = value
+        if any(value is None for value in values.values()):
+            continue
+        examples.append(listing)
+        for target in TARGETS:
+            targets[target].append(float(values[target]))
+    return examples, targets, legacy
+
+
+def train(listings: List[Listing], targets: Dict[str, List[float]], legacy: Dict[str, int]) -> PreScorer:
+    """Fit both models on all examples and calibrate them with out-of-fold predictions."""
+    rows = [features(listing) for listing in listings]
+    folds = [zlib.crc32(listing.id.encode()) % FOLDS for listing in listings]
+
+    out_of_fold = {target: [0.0] * len(rows) for target in TARGETS}
+    for fold in range(FOLDS):
+        train_idx = [i for i, f in enumerate(folds) if f != fold]
+        test_idx = [i for i, f in enumerate(folds) if f == fold]
+        if not train_idx or not test_idx:
+            continue
+        for target in TARGETS:
+            linear = _fit_ridge([rows[i] for i in train_idx], [targets[target][i] for i in train_idx])
+            for i in test_idx:
+                out_of_fold[target][i] = _apply(linear, rows[i])
+
+    quality = targets["quality_score"]
+    predicted = [max(0.0, min(100.0, p)) for p in out_of_fold["quality_score"]]
+    errors = [abs(p - y) for p, y in zip(predicted, quality)]
+    bands: Dict[str, dict] = {}
+    for p, error in zip(predicted, errors):
+        band = bands.setdefault(_band(p), {"count": 0, "total": 0.0})
+        band["count"] += 1
+        band["total"] += error
+    data_errors = [abs(max(0.0, min(10.0, p)) - y) for p, y in zip(out_of_fold["data_quality_score"], targets["data_quality_score"])]
+
+    data = {
+        "features": list(FEATURES),
+        "trained_at": datetime.now().isoformat(),
+        "examples": len(rows),
+        "skipped_legacy": legacy,
+        "models": {target: _fit_ridge(rows, targets[target]) for target in TARGETS},
+        "ranges": {
+            "min": [min(r[j] for r in rows) for j in range(len(FEATURES))],
+            "max": [max(r[j] for r in rows) for j in range(len(FEATURES))],
+        },
+        "calibration": {
+            "mae": sum(errors) / len(errors),
+            "data_quality_mae": sum(data_errors) / len(data_errors),
+            "bands": {
+                band: {"count": v["count"], "mae": round(v["total"] / v["count"], 2)}
+                for band, v in sorted(bands.items(), key=lambda item: int(item[0]))
+            },
+        },
+    }
+    scorer = PreScorer(data)
+    scorer.data["calibration"]["report"] = _agreement(scorer, listings, predicted, quality)
+    return scorer
+
+
+def _agreement(scorer: PreScorer, listings: List[Listing], predicted: List[float], actual: List[float]) -> dict:
+    """How the out-of-fold predictions compare with the LLM, overall and where the gate would trust them."""
+    report = {}
+    for name, selected in (("all", range(len(listings))), ("trusted", [])):
+        if name == "trusted":
+            selected = []
+            for i, listing in enumerate(listings):
+                prediction = scorer.predict(listing)._replace(quality_score=round(predicted[i]))
+                if scorer.needs_llm(prediction) is None:
+                    selected.append(i)
+        selected = list(selected)
+        if not selected:
+            report[name] = {"count": 0}
+            continue
+        errors = [abs(predicted[i] - actual[i]) for i in selected]
+        same_side = sum(
+            1 for i in selected
+            if (predicted[i] >= MIN_SCORE_THRESHOLD) == (actual[i] >= MIN_SCORE_THRESHOLD)
+        )
+        report[name] = {
+            "count": len(selected),
+            "mae": round(sum(errors) / len(errors), 2),
+            "within_5": round(sum(e <= 5 for e in errors) / len(errors), 3),
+            "within_10": round(sum(e <= 10 for e in errors) / len(errors), 3),
+            "same_threshold_side": round(same_side / len(selected), 3),
+        }
+    return report
+
+
+def print_calibration_report(scorer: PreScorer):
+    data = scorer.data
+    calibration = data["calibration"]
+    print(f"Pre-scorer trained {data['trained_at'][:19]} on {data['examples']} evaluations")
+    skipped = data.get("skipped_legacy", {})
+    if any(skipped.values()):
+        print(f"  Skipped evaluations with legacy labels only: " + ", ".join(
+            f"{n} with {LEGACY_LABELS[target]}" for target, n in skipped.items() if n))
+    print(f"  Out-of-fold MAE: quality_score {calibration['mae']:.1f}, "
+          f"data_quality_score {calibration['data_quality_mae']:.2f}")
+    print(f"  Error by predicted quality_score band:")
+    for band, stats in calibration["bands"].items():
+        print(f"    {int(band):3d}-{int(band) + BAND_WIDTH - 1:<3d} {stats['count']:5d} listings  MAE {stats['mae']:.1f}")
+    for name, stats in calibration.get("report", {}).items():
+        if not stats["count"]:
+            print(f"  {name}: no listings")
+            continue
+        print(f"  {name}: {stats['count']} listings, MAE {stats['mae']:.1f}, "
+              f"within 5 pts {stats['within_5']:.0%}, within 10 pts {stats['within_10']:.0%}, "
+              f"same side of {MIN_SCORE_THRESHOLD}: {stats['same_threshold_side']:.0%}")
+
+
+_prescoring = False
+_scorer: Optional[PreScorer] = None
+_scorer_lock = threading.Lock()
+
+
+def set_prescoring(enabled: bool = True):
+    """Let the evaluator skip the LLM for listings the pre-scorer is confident about."""
+    global _prescoring
+    _prescoring = enabled
+
+
+def get_prescorer() -> Optional[PreScorer]:
+    """The trained model when --prescore is on and a model file exists, else None."""
+    global _scorer
+    if not _prescoring:
+        return None
+    with _scorer_lock:
+        if _scorer is None:
+            _scorer = PreScorer.load()
+            if _scorer is None:
+                print(f"  [prescorer] No model at {PRESCORER_MODEL_FILE}, evaluating everything with the LLM")
+        return _scorer
@@ -0,0 +1,207 @@
+"""Description compaction before prompt formatting, shared by the LLM stages.
+
+Stages used to send `description[:3000]`: URLs, share buttons, signatures
+and repeated paragraphs included, and whatever came after the cut lost.
+compact_description() instead:
+
+1. normalizes whitespace and replaces URLs (tracking parameters included)
+   by "[lien]", so the model still knows a link was given;
+2. drops lines that are only a share-button label ("Partager",
+   "Facebook") and mobile mail signatures ("Envoyé de mon iPhone");
+3. drops sentences already seen earlier in the text;
+4. if the result is still over PROMPT_DESCRIPTION_TOKENS, cuts it into
+   passages of at most a third of that (between paragraphs, lines,
+   sentences, or words for unpunctuated text) and keeps the opening passage
+   plus the most informative other passages (prices, surfaces, group size,
+   contact, housing vocabulary, per token) in their original order, marking
+   gaps with "[…]". The result never exceeds the budget.
+
+Estimated description tokens before (the old 3000-character cut) and after
+are recorded per stage; see print_compaction_stats().
+
+Stage fingerprints (see scraper/fingerprint.py) hash the compacted
+description, i.e. the text the model actually sees, and COMPACTION_VERSION:
+bump it whenever the rules below change so stored results are redone.
+"""
+
+import hashlib
+import re
+import threading
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+from scraper.config import PROMPT_DESCRIPTION_TOKENS
+from scraper.llm_packing import estimate_tokens
+
+# What stages sent before compaction, used as the "before" of the report
+LEGACY_DESCRIPTION_CHARS = 3000
+# Part of the stage fingerprints: bump when the compaction rules change
+COMPACTION_VERSION = "compaction-3"
+
+URL_RE = re.compile(r"(?:https?://|www\.)\S+", re.IGNORECASE)
+# The whole line is a share widget label ("Partager", "Facebook", "Partager sur Twitter")
+SHARE_LINE_RE = re.compile(
+    r"^(?:(?:partager|share|delen|compartir|compartilhar)(?: (?:sur|on|op|en|no|via))?\s*:?\s*)?"
+    r"(?:facebook|twitter|x \(twitter\)|linkedin|whatsapp|pinterest|messenger|telegram)\s*$"
+    r"|^(?:partager|share|delen|compartir|compartilhar|imprimer|print|tweet|j'aime|like)\s*:?\s*$",
+    re.IGNORECASE,
+)
+# Mobile mail signatures ("Envoyé de mon iPhone"), dropped as a line
+SIGNATURE_RE = re.compile(
+    r"^(envoyé (de|depuis) mon|sent from my|verzonden (vanaf|met) mijn|enviado desde mi|enviado do meu)\b.{0,40}$",
+    re.IGNORECASE,
+)
+SENTENCE_RE = re.compile(r"(?<=[.!?])\s+")
+
+FACT_PATTERNS = [
+    re.compile(r"\d[\d .,]*\s*(€|eur\b|euros?\b)|€\s*\d", re.IGNORECASE),
+    re.compile(r"\d[\d .,]*\s*(m²|m2\b|ha\b|hectares?\b|ares?\b)", re.IGNORECASE),
+    re.compile(r"\d+\s*(personnes|ménages|foyers|familles|adultes|enfants|logements|unités|habitants|"
+               r"people|households|units|personas|viviendas|pessoas|huishoudens|woningen)", re.IGNORECASE),
+    re.compile(r"[\w.+-]+@[\w-]+\.[\w.]+|\btél|\btel\b|\+\d{2}\s?\d", re.IGNORECASE),
+]
+KEYWORDS = (
+    "jardin", "potager", "commun", "partag", "gouvernance", "sociocrat", "consensus", "charte", "écolog",
+    "permaculture", "animaux", "chien", "chat", "enfant", "famill", "senior", "intergénération", "repas",
+    "coopérative", "location", "vente", "loyer", "chambre", "studio", "maison", "appartement", "terrain",
+    "rural", "village", "gare", "transport", "accessib", "meublé", "disponible", "atelier",
+)
+
+_stats: Dict[str, Dict[str, Tuple[int, int]]] = defaultdict(dict)
+_stats_lock = threading.Lock()
+
+
+def _normalize(text: str) -> str:
+    paragraphs: List[List[str]] = [[]]
+    for line in text.splitlines():
+        line = re.sub(r"[ \t ]+", " ", URL_RE.sub("[lien]", line)).strip()
+        if not line:
+            if paragraphs[-1]:
+                paragraphs.append([])
+            continue
+        if SHARE_LINE_RE.match(line) or SIGNATURE_RE.match(line):
+            continue
+        paragraphs[-1].append(line)
+
+    # Drop sentences repeated from earlier in the text (short ones like "Oui." are kept)
+    seen = set()
+    kept = []
+    for lines in paragraphs:
+        kept_lines = []
+        for line in lines:
+            sentences = []
+            for sentence in SENTENCE_RE.split(line):
+                key = re.sub(r"\W+", " ", sentence).strip().lower()
+                if len(key) >= 20:
+                    if key in seen:
+                        continue
+                    seen.add(key)
+                sentences.append(sentence)
+            if sentences:
+                kept_lines.append(" ".join(sentences))
+        if kept_lines:
+            kept.append("\n".join(kept_lines))
+    return "\n\n".join(kept)
+
+
+def _word_pieces(sentence: str, max_tokens: int) -> List[str]:
+    """`sentence` cut between words (or inside an overlong word) into pieces of at most max_tokens."""
+    max_chars = 4 * max_tokens - 1  # the longest text estimate_tokens() counts as max_tokens
+    pieces = []
+    piece = ""
+    for word in sentence.split(" "):
+        while len(word) > max_chars:
+            if piece:
+                pieces.append(piece)
+                piece = ""
+            pieces.append(word[:max_chars])
+            word = word[max_chars:]
+        if piece and len(piece) + 1 + len(word) > max_chars:
+            pieces.append(piece)
+            piece = ""
+        piece = f"{piece} {word}" if piece else word
+    if piece:
+        pieces.append(piece)
+    return pieces
+
+
+def _passages(text: str, max_tokens: int) -> List[str]:
+    """Paragraphs, with paragraphs over max_tokens cut into groups of lines and sentences.
+
+    No passage is over max_tokens: a sentence longer than that (text with no
+    punctuation or line breaks) is cut between words.
+    """
+    passages = []
+    for paragraph in text.split("\n\n"):
+        if estimate_tokens(paragraph) <= max_tokens:
+            passages.append(paragraph)
+            continue
+        group = ""
+        for line in paragraph.split("\n"):
+            separator = "\n"
+            for sentence in SENTENCE_RE.split(line):
+                for piece in _word_pieces(sentence, max_tokens):
+                    if group and estimate_tokens(f"{group}{separator}{piece}") > max_tokens:
+                        passages.append(group)
+                        group = ""
+                    group = f"{group}{separator}{piece}" if group else piece
+                    separator = " "
+        if group:
+            passages.append(group)
+    return passages
+
+
+def _density(passage: str) -> float:
+    lowered = passage.lower()
+    score = 3 * sum(len(pattern.findall(passage)) for pattern in FACT_PATTERNS)
+    score += sum(1 for keyword in KEYWORDS if keyword in lowered)
+    score += len(set(re.findall(r"\w{5,}", lowered))) / 20
+    return score / estimate_tokens(passage)
+
+
+def compact(text: str, budget: int = PROMPT_DESCRIPTION_TOKENS) -> str:
+    """`text` cleaned up and, if needed, reduced to at most `budget` tokens (plus gap markers)."""
+    text = _normalize(text or "")
+    if estimate_tokens(text) <= budget:
+        return text
+
+    passages = _passages(text, max(1, budget // 3))
+    chosen = {0}
+    used = estimate_tokens(passages[0])
+    for i in sorted(range(1, len(passages)), key=lambda i: _density(passages[i]), reverse=True):
+        size = estimate_tokens(passages[i])
+        if used + size <= budget:
+            chosen.add(i)
+            used += size
+
+    pieces = []
+    for i, passage in enumerate(passages):
+        if i in chosen:
+            pieces.append(passage)
+        elif pieces and pieces[-1] != "[…]":
+            pieces.append("[…]")
+    return "\n\n".join(pieces)
+
+
+def compact_description(stage: str, text: str, budget: int = PROMPT_DESCRIPTION_TOKENS) -> str:
+    """compact() for a prompt of `stage`, recording its size before and after."""
+    text = text or ""
+    compacted = compact(text, budget)
+    key = hashlib.sha1(text.encode("utf-8")).hexdigest()
+    with _stats_lock:
+        _stats[stage][key] = (estimate_tokens(text[:LEGACY_DESCRIPTION_CHARS]), estimate_tokens(compacted))
+    return compacted
+
+
+def print_compaction_stats():
+    """Estimated description tokens per stage for this process, before and after compaction."""
+    with _stats_lock:
+        stats = {stage: list(sizes.values()) for stage, sizes in _stats.items() if sizes}
+    if not stats:
+        return
+    print(f"\n  Prompt compaction (estimated description tokens):")
+    for stage, sizes in sorted(stats.items()):
+        before = sum(b for b, _ in sizes)
+        after = sum(a for _, a in sizes)
+        saved = 100 * (before - after) / before if before else 0
+        print(f"    {stage:<24} {len(sizes):5d} descriptions {before:8d} -> {after:8d} tokens (-{saved:.0f}%)")
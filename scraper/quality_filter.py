@@ -7,9 +7,10 @@ This saves API costs and reduces noise in the final output.
 import hashlib
 import re
 from datetime import datetime, timedelta
-from typing import List, Optional, Tuple
+from typing import Collection, List, Optional, Tuple
 
 from scraper.models import Listing
+from scraper.near_duplicates import find_near_duplicates
 
 # Only these listing types are relevant: collaborative housing offering a spot
 RELEVANT_TYPES = {"offre-location", "creation-groupe", "habitat-leger", "ecovillage", "community-profile", "cohousing", "existing-project"}
@@ -23,9 +24,17 @@ RENTAL_KEYWORDS = ["location", "louer", "locataire", "locat", "bail", "mensuel",
 MIN_SCORE_THRESHOLD = 15
 
 
-def pre_filter(listings: List[Listing]) -> Tuple[List[Listing], List[dict]]:
+def pre_filter(
+    listings: List[Listing],
+    evaluated: Collection[str] = (),
+    persist: bool = True,
+) -> Tuple[List[Listing], List[dict]]:
     """Filter out obviously irrelevant listings before AI evaluation.
 
+    `evaluated`: ids of listings that already have an evaluation, kept in
+    preference to their near-duplicates. Without `persist`, the near-duplicate
+    index is not saved (read-only reports).
+
     Returns:
         (kept_listings, rejection_log) where rejection_log entries are
         {"id": str, "title": str, "reason": str}
@@ -47,6 +56,18 @@ def pre_filter(listings: List[Listing]) -> Tuple[List[Listing], List[dict]]:
             content_hash = _content_hash(listing)
             seen_hashes.add(content_hash)
 
+    # 6. Near-duplicates across sources and reworded reposts: only the canonical listing goes on
+    duplicates = find_near_duplicates(kept, evaluated, stored={l.id for l in listings}, persist=persist)
+    for listing in kept:
+        if listing.id in duplicates:
+            canonical_id, score = duplicates[listing.id]
+            rejected.append({
+                "id": listing.id,
+                "title": listing.title[:80],
+                "reason": f"Quasi-doublon de {canonical_id} (similarite {score:.2f})",
+            })
+    kept = [listing for listing in kept if listing.id not in duplicates]
+
     return kept, rejected
 
 
@@ -94,7 +115,7 @@ def _should_skip(listing: Listing, seen_hashes: set) -> Optional[str]:
         if pub_date and (datetime.utcnow() - pub_date) > timedelta(days=548):
             return f"Trop ancien (publie le {listing.date_published})"
 
-    # 5. Near-duplicate detection
+    # 5. Exact duplicate detection (near-duplicates are clustered in pre_filter)
     content_hash = _content_hash(listing)
     if content_hash in seen_hashes:
         return "Quasi-doublon (contenu similaire)"
@@ -0,0 +1,201 @@
+"""Process-wide per-host rate limiting for all outgoing scraper requests.
+
+Every host gets a token bucket: `burst` requests may go out back to back,
+then requests are released at the sustained `per_minute` rate. Buckets are
+shared by every scraper, thread and helper in the process, so two code paths
+hitting the same site can never add up to more than the site's budget.
+
+429 and 503 responses pause the whole host for the duration given by the
+`Retry-After` header (or an exponential backoff when it is missing) before
+the request is retried.
+
+This is also the single point where responses are archived, or served from
+the archive when a run is being replayed (see scraper/response_archive.py).
+"""
+
+import email.utils
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+import requests
+
+from scraper.config import (
+    DEFAULT_RATE_LIMIT,
+    DOMAIN_RATE_LIMITS,
+    RATE_LIMIT_MAX_RETRIES,
+    REQUEST_TIMEOUT,
+)
+from scraper.retreat_config import RATE_LIMIT_SETTINGS
+from scraper.response_archive import get_archive, request_key
+
+RETRY_STATUS_CODES = {429, 503}
+MAX_BACKOFF_SECONDS = 120
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at `per_minute / 60` tokens per second."""
+
+    def __init__(self, per_minute: float, burst: int):
+        self.rate = max(per_minute, 0.001) / 60.0
+        self.capacity = max(1, int(burst))
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_take(self, now: float) -> float:
+        """Take a token if possible. Returns 0 on success, else seconds to wait."""
+        self._refill(now)
+        if now < self.blocked_until:
+            return self.blocked_until - now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def block(self, now: float, seconds: float):
+        self.blocked_until = max(self.blocked_until, now + seconds)
+        self.tokens = 0.0
+
+
+class DomainRateLimiter:
+    """Thread-safe registry of token buckets keyed by host."""
+
+    def __init__(
+        self,
+        limits: Optional[Dict[str, dict]] = None,
+        default: Optional[dict] = None,
+    ):
+        self._limits = dict(limits or {})
+        self._default = dict(default or DEFAULT_RATE_LIMIT)
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def _key_for(self, host: str) -> str:
+        """Map a host to its configured domain (subdomains share the parent's bucket)."""
+        for domain in self._limits:
+            if host == domain or host.endswith("." + domain):
+                return domain
+        if host.startswith("www."):
+            return host[4:]
+        return host
+
+    def _bucket(self, key: str) -> TokenBucket:
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            settings = self._limits.get(key, self._default)
+            bucket = TokenBucket(settings["per_minute"], settings.get("burst", 1))
+            self._buckets[key] = bucket
+        return bucket
+
+    def acquire(self, url: str) -> float:
+        """Block until a request to `url` is allowed. Returns seconds waited."""
+        key = self._key_for(_host(url))
+        waited = 0.0
+        while True:
+            with self._lock:
+                wait = self._bucket(key).try_take(time.monotonic())
+            if wait <= 0:
+                return waited
+            time.sleep(wait)
+            waited += wait
+
+    def pause(self, url: str, seconds: float):
+        """Stop all requests to the host of `url` for `seconds`."""
+        key = self._key_for(_host(url))
+        with self._lock:
+            self._bucket(key).block(time.monotonic(), seconds)
+
+
+def _host(url: str) -> str:
+    return (urlparse(url).hostname or "").lower()
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header (delta-seconds or HTTP-date) into seconds."""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+def _collect_limits() -> Dict[str, dict]:
+    """Merge cohousing per-domain limits with the retreat RATE_LIMIT_SETTINGS."""
+    limits = {domain: dict(settings) for domain, settings in DOMAIN_RATE_LIMITS.items()}
+    for settings in RATE_LIMIT_SETTINGS.values():
+        for host in settings.get("hosts", []):
+            limits[host] = {
+                "per_minute": settings["max_per_minute"],
+                "burst": settings.get("burst", 1),
+            }
+    return limits
+
+
+_limiter: Optional[DomainRateLimiter] = None
+_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> DomainRateLimiter:
+    """Return the process-wide limiter, creating it on first use."""
+    global _limiter
+    with _limiter_lock:
+        if _limiter is None:
+            _limiter = DomainRateLimiter(_collect_limits(), DEFAULT_RATE_LIMIT)
+        return _limiter
+
+
+def limited_request(
+    session: requests.Session,
+    method: str,
+    url: str,
+    max_retries: int = RATE_LIMIT_MAX_RETRIES,
+    **kwargs,
+) -> requests.Response:
+    """Send a request through the shared limiter, retrying on 429/503.
+
+    The final response is returned as-is; callers decide whether to
+    raise_for_status(). When replaying an archived run, the archived
+    response is returned without touching the network.
+    """
+    archive = get_archive()
+    if archive:
+        key = request_key(method, url, kwargs.get("params"), kwargs.get("json"), kwargs.get("data"))
+        if archive.replay:
+            return archive.load(key)
+
+    limiter = get_rate_limiter()
+    kwargs.setdefault("timeout", REQUEST_TIMEOUT)
+
+    for attempt in range(max_retries + 1):
+        limiter.acquire(url)
+        response = session.request(method, url, **kwargs)
+        if response.status_code not in RETRY_STATUS_CODES or attempt == max_retries:
+            break
+
+        delay = parse_retry_after(response.headers.get("Retry-After"))
+        if delay is None:
+            delay = 5 * (2 ** attempt)
+        delay = min(delay, MAX_BACKOFF_SECONDS)
+        print(f"  [rate_limiter] {response.status_code} from {_host(url)}, pausing host {delay:.0f}s "
+              f"(retry {attempt + 1}/{max_retries})")
+        limiter.pause(url, delay)
+
+    if archive:
+        archive.record(key, response)
+    return response
@@ -0,0 +1,154 @@
+"""Content-addressed archive of raw HTTP responses, with offline replay.
+
+Every response that goes through `limited_request()` is recorded for the
+current run:
+
+    data/archive/blobs/<sha[:2]>/<sha256>.gz    gzip'd body, shared across runs
+    data/archive/runs/<run-id>.jsonl            one line per request (key, status, headers, body sha)
+
+`start_replay(run_id)` switches the process to serving every request from
+that run's index instead of the network: no rate limiting, no delays, and a
+ConnectionError for anything that was not archived. Re-running a scraper
+against an archived crawl is the fastest way to test a parser change.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from scraper.config import ARCHIVE_DIR, ARCHIVE_ENABLED
+
+
+def request_key(method: str, url: str, params=None, json_body=None, data=None) -> str:
+    """Stable key for a request: method, full URL with params, and body if any."""
+    full_url = requests.Request(method, url, params=params).prepare().url
+    key = f"{method.upper()} {full_url}"
+    if json_body is not None:
+        key += " " + json.dumps(json_body, sort_keys=True, ensure_ascii=False)
+    elif data is not None:
+        key += " " + (data if isinstance(data, str) else json.dumps(data, sort_keys=True, default=str))
+    return key
+
+
+class ResponseArchive:
+    """Records or replays the responses of one run."""
+
+    def __init__(self, run_id: str, replay: bool = False, root: str = ARCHIVE_DIR):
+        self.run_id = run_id
+        self.replay = replay
+        self._blob_dir = os.path.join(root, "blobs")
+        self._index_path = os.path.join(root, "runs", f"{run_id}.jsonl")
+        self._lock = threading.Lock()
+        self._entries: Dict[str, dict] = {}
+        self.misses = 0
+
+        if replay:
+            if not os.path.exists(self._index_path):
+                available = ", ".join(list_runs(root)[-5:]) or "none"
+                raise FileNotFoundError(f"No archived run '{run_id}' (latest: {available})")
+            with open(self._index_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    entry = json.loads(line)
+                    self._entries[entry["key"]] = entry  # last write wins
+        else:
+            os.makedirs(os.path.dirname(self._index_path), exist_ok=True)
+            os.makedirs(self._blob_dir, exist_ok=True)
+
+    def _blob_path(self, sha: str) -> str:
+        return os.path.join(self._blob_dir, sha[:2], f"{sha}.gz")
+
+    def record(self, key: str, response: requests.Response):
+        body = response.content or b""
+        sha = hashlib.sha256(body).hexdigest()
+        blob = self._blob_path(sha)
+        entry = {
+            "key": key,
+            "url": response.url,
+            "status": response.status_code,
+            "reason": response.reason,
+            "headers": dict(response.headers),
+            "encoding": response.encoding,
+            "sha256": sha,
+            "fetched_at": datetime.utcnow().isoformat(),
+        }
+        with self._lock:
+            if not os.path.exists(blob):
+                os.makedirs(os.path.dirname(blob), exist_ok=True)
+                with gzip.open(blob, "wb") as f:
+                    f.write(body)
+            with open(self._index_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    def load(self, key: str) -> requests.Response:
+        """Rebuild the archived response for `key` (replay mode)."""
+        entry = self._entries.get(key)
+        if entry is None:
+            with self._lock:
+                self.misses += 1
+            raise requests.ConnectionError(f"Not in archive {self.run_id}: {key}")
+        with gzip.open(self._blob_path(entry["sha256"]), "rb") as f:
+            body = f.read()
+        response = requests.Response()
+        response.status_code = entry["status"]
+        response.reason = entry.get("reason")
+        response.url = entry["url"]
+        response.headers = CaseInsensitiveDict(entry["headers"])
+        response.encoding = entry.get("encoding")
+        response._content = body
+        return response
+
+
+def list_runs(root: str = ARCHIVE_DIR) -> List[str]:
+    runs_dir = os.path.join(root, "runs")
+    if not os.path.isdir(runs_dir):
+        return []
+    return sorted(f[:-len(".jsonl")] for f in os.listdir(runs_dir) if f.endswith(".jsonl"))
+
+
+_archive: Optional[ResponseArchive] = None
+
+
+def start_recording(run_id: Optional[str] = None) -> str:
+    """Record every response of this process under a new run ID. Returns the ID."""
+    global _archive
+    run_id = run_id or datetime.utcnow().strftime("%Y%m%dT%H%M%SZ")
+    _archive = ResponseArchive(run_id)
+    return run_id
+
+
+def start_replay(run_id: str) -> ResponseArchive:
+    """Serve every request of this process from an archived run."""
+    global _archive
+    _archive = ResponseArchive(run_id, replay=True)
+    return _archive
+
+
+def get_archive() -> Optional[ResponseArchive]:
+    return _archive
+
+
+def is_replaying() -> bool:
+    return _archive is not None and _archive.replay
+
+
+def open_run(replay_run_id: Optional[str] = None) -> Optional[str]:
+    """Set up archiving for a pipeline run: replay `replay_run_id`, or record a new run.
+
+    Returns the run ID in use, or None when archiving is disabled.
+    """
+    if replay_run_id:
+        start_replay(replay_run_id)
+        print(f"  [archive] Replaying run {replay_run_id} (offline)")
+        return replay_run_id
+    if not ARCHIVE_ENABLED:
+        return None
+    run_id = start_recording()
+    print(f"  [archive] Recording responses as run {run_id}")
+    return run_id
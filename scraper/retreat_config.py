@@ -8,7 +8,6 @@ GOOGLE_PLACES_API_KEY = os.environ.get("GOOGLE_PLACES_API_KEY", "")
 
 # === Scraping settings ===
 REQUEST_DELAY = 2  # secondes entre les requêtes (même domaine)
-GOOGLE_PLACES_DELAY = 2  # secondes entre les requêtes Google Places
 USER_AGENT = "RetreatVenueFinder/1.0 (retreat venue directory project)"
 REQUEST_TIMEOUT = 15  # secondes
 
@@ -207,17 +206,22 @@ TARGET_COUNTRIES = {
 }
 
 # === Rate limiting ===
+# Appliqué par le limiteur partagé (scraper/rate_limiter.py), par hôte :
+# max_per_minute = débit soutenu, burst = requêtes autorisées d'affilée.
 RATE_LIMIT_SETTINGS = {
     "google_places": {
-        "delay": GOOGLE_PLACES_DELAY,
+        "hosts": ["places.googleapis.com"],
         "max_per_minute": 20,
+        "burst": 2,
     },
     "retreat_guru": {
-        "delay": 3,
+        "hosts": ["retreat.guru"],
         "max_per_minute": 15,
+        "burst": 2,
     },
     "bookyogaretreats": {
-        "delay": 3,
+        "hosts": ["bookyogaretreats.com"],
         "max_per_minute": 15,
+        "burst": 2,
     },
 }
@@ -4,8 +4,6 @@ Produit un titre et une description en français, optimisés pour les
 organisateurs de retraites qui cherchent un lieu.
 """
 
-import json
-import time
 from typing import Optional, Dict, List
 
 from scraper.retreat_scrapers.retreat_models import (
@@ -13,12 +11,16 @@ from scraper.retreat_scrapers.retreat_models import (
     RetreatVenueEvaluation,
 )
 from scraper.retreat_config import ANTHROPIC_API_KEY
+from scraper.llm_executor import get_llm_executor
+from scraper.prompt_compaction import compact_description
+from scraper.structured_output import CONTENT_SCHEMA, output_tool, read_content, with_output_tool
 
 try:
     import anthropic
 except ImportError:
     anthropic = None
 
+MODEL = "claude-haiku-4-5-20251001"
 
 RETREAT_CONTENT_SYSTEM = """Tu es un rédacteur spécialisé dans les lieux de retraite bien-être en Europe et dans le monde.
 Tu rédiges des titres et descriptions en français, clairs et informatifs, destinés à des organisateurs de stages (yoga, méditation, etc.) qui cherchent un lieu.
@@ -74,17 +76,14 @@ RÈGLES POUR LA DESCRIPTION:
 - Ne pas répéter le titre"""
 
 
-def generate_retreat_content(
-    venue: RetreatVenueListing,
-    evaluation: Optional[RetreatVenueEvaluation] = None,
-) -> Optional[dict]:
-    """Génère un titre et une description IA pour un lieu de retraite."""
-    if not anthropic or not ANTHROPIC_API_KEY:
-        print("  [retreat_content_gen] API Anthropic non disponible, génération ignorée")
-        return None
+CONTENT_TOOL = output_tool("record_content", "Enregistre le titre et la description rédigés.", CONTENT_SCHEMA)
 
-    client = anthropic.Anthropic(api_key=ANTHROPIC_API_KEY)
 
+def _build_request(
+    venue: RetreatVenueListing,
+    evaluation: Optional[RetreatVenueEvaluation] = None,
+) -> dict:
+    """Construit la requête de génération de contenu pour une venue."""
     evaluation_context = ""
     if evaluation:
         evaluation_context = f"""ÉVALUATION EXISTANTE:
@@ -110,36 +109,35 @@ Idéal pour: {', '.join(evaluation.best_for)}"""
         style=", ".join(venue.style) or "Non spécifié",
         services=", ".join(venue.services) or "Non spécifié",
         suitable_for=", ".join(venue.suitable_for) or "Non spécifié",
-        description=venue.description[:3000],
+        description=compact_description("retreat_content_gen", venue.description),
         evaluation_context=evaluation_context,
     )
 
-    try:
-        response = client.messages.create(
-            model="claude-haiku-4-5-20251001",
-            max_tokens=512,
-            system=RETREAT_CONTENT_SYSTEM,
-            messages=[{"role": "user", "content": prompt}],
-        )
-
-        text = response.content[0].text.strip()
-
-        # Gérer les blocs markdown
-        if text.startswith("```"):
-            text = text.split("\n", 1)[1]
-            if text.endswith("```"):
-                text = text[:-3]
-            text = text.strip()
-
-        result = json.loads(text)
-        return {
-            "ai_title": result.get("ai_title", ""),
-            "ai_description": result.get("ai_description", ""),
-        }
-
-    except json.JSONDecodeError as e:
-        print(f"  [retreat_content_gen] Erreur JSON pour {venue.id}: {e}")
+    return with_output_tool(dict(
+        model=MODEL,
+        max_tokens=512,
+        system=RETREAT_CONTENT_SYSTEM,
+        messages=[{"role": "user", "content": prompt}],
+    ), CONTENT_TOOL)
+
+
+def _parse_content(venue: RetreatVenueListing, response) -> dict:
+    """Extrait titre et description de la réponse du modèle."""
+    return read_content(response)
+
+
+def generate_retreat_content(
+    venue: RetreatVenueListing,
+    evaluation: Optional[RetreatVenueEvaluation] = None,
+) -> Optional[dict]:
+    """Génère un titre et une description IA pour un lieu de retraite."""
+    if not anthropic or not ANTHROPIC_API_KEY:
+        print("  [retreat_content_gen] API Anthropic non disponible, génération ignorée")
         return None
+
+    try:
+        response = get_llm_executor().create("retreat_content_gen", _build_request(venue, evaluation))
+        return _parse_content(venue, response)
     except Exception as e:
         print(f"  [retreat_content_gen] Erreur pour {venue.id}: {e}")
         return None
@@ -164,21 +162,22 @@ def generate_all_retreat_content(
         print("  [retreat_content_gen] Aucune venue à traiter")
         return results
 
+    if not anthropic or not ANTHROPIC_API_KEY:
+        print("  [retreat_content_gen] API Anthropic non disponible, génération ignorée")
+        return results
+
     print(f"  [retreat_content_gen] Génération de contenu pour {len(to_generate)} venues...")
 
-    for i, venue in enumerate(to_generate):
-        print(f"  [retreat_content_gen] {i+1}/{len(to_generate)}: {venue.name[:60]}...")
-        evaluation = evaluations.get(venue.id)
-        content = generate_retreat_content(venue, evaluation)
+    contents = get_llm_executor().map(
+        "retreat_content_gen", to_generate,
+        lambda venue: _build_request(venue, evaluations.get(venue.id)),
+        _parse_content,
+    )
+    for venue, content in zip(to_generate, contents):
         if content:
             results[venue.id] = content
-            print(f"    Titre: {content['ai_title'][:60]}...")
         else:
-            print(f"    Ignoré (génération échouée)")
-
-        # Rate limiting
-        if i < len(to_generate) - 1:
-            time.sleep(0.5)
+            print(f"    Ignoré {venue.id} (génération échouée)")
 
     print(f"  [retreat_content_gen] Terminé: {len(results)} contenus générés")
     return results
@@ -5,8 +5,6 @@ de retraites, et produit un score global, un résumé, des points forts et des
 points de vigilance.
 """
 
-import json
-import time
 from typing import Optional, Dict, List
 
 from scraper.retreat_scrapers.retreat_models import (
@@ -15,12 +13,16 @@ from scraper.retreat_scrapers.retreat_models import (
     RetreatCriteriaScores,
 )
 from scraper.retreat_config import ANTHROPIC_API_KEY
+from scraper.llm_executor import get_llm_executor
+from scraper.prompt_compaction import compact_description
+from scraper.structured_output import InvalidOutput, output_schema, output_tool, response_object, with_output_tool
 
 try:
     import anthropic
 except ImportError:
     anthropic = None
 
+MODEL = "claude-haiku-4-5-20251001"
 
 RETREAT_EVAL_SYSTEM = """Tu es un évaluateur expert de lieux de retraite pour organisateurs de stages (yoga, méditation, bien-être, développement personnel).
 Tu évalues la qualité et l'adéquation des lieux de manière objective, du point de vue d'un organisateur qui cherche un lieu pour accueillir un groupe.
@@ -124,14 +126,13 @@ BARÈME DES CRITÈRES (0-10 chacun):
     - 0-4: Très peu d'informations"""
 
 
-def evaluate_retreat_venue(venue: RetreatVenueListing) -> Optional[RetreatVenueEvaluation]:
-    """Évalue un lieu de retraite via Claude Haiku."""
-    if not anthropic or not ANTHROPIC_API_KEY:
-        print("  [retreat_evaluator] API Anthropic non disponible, évaluation ignorée")
-        return None
-
-    client = anthropic.Anthropic(api_key=ANTHROPIC_API_KEY)
+# La réponse passe par un outil imposé, dont le schéma vient du modèle RetreatVenueEvaluation
+EVALUATION_TOOL = output_tool(
+    "record_evaluation", "Enregistre l'évaluation du lieu.", output_schema(RetreatVenueEvaluation)
+)
 
+def _build_request(venue: RetreatVenueListing) -> dict:
+    """Construit la requête d'évaluation pour une venue."""
     prompt = RETREAT_EVAL_PROMPT.format(
         name=venue.name,
         source=venue.source,
@@ -160,54 +161,59 @@ def evaluate_retreat_venue(venue: RetreatVenueListing) -> Optional[RetreatVenueE
         rating_count=venue.rating_count or 0,
         website=venue.website or "Non disponible",
         email=venue.contact_email or "Non disponible",
-        description=venue.description[:3000],
+        description=compact_description("retreat_evaluator", venue.description),
     )
+    return with_output_tool(dict(
+        model=MODEL,
+        max_tokens=1024,
+        system=RETREAT_EVAL_SYSTEM,
+        messages=[{"role": "user", "content": prompt}],
+    ), EVALUATION_TOOL)
+
 
+def _parse_evaluation(venue: RetreatVenueListing, response) -> RetreatVenueEvaluation:
+    """Transforme la réponse du modèle en RetreatVenueEvaluation."""
+    result = response_object(response)
     try:
-        response = client.messages.create(
-            model="claude-haiku-4-5-20251001",
-            max_tokens=1024,
-            system=RETREAT_EVAL_SYSTEM,
-            messages=[{"role": "user", "content": prompt}],
-        )
-
-        text = response.content[0].text.strip()
-
-        # Gérer les blocs markdown
-        if text.startswith("```"):
-            text = text.split("\n", 1)[1]
-            if text.endswith("```"):
-                text = text[:-3]
-            text = text.strip()
-
-        result = json.loads(text)
-
-        criteria = result.get("criteria_scores", {})
-
-        return RetreatVenueEvaluation(
-            listing_id=venue.id,
-            overall_score=max(0, min(100, result["overall_score"])),
-            match_summary=result["match_summary"],
-            criteria_scores=RetreatCriteriaScores(
-                practice_spaces_quality=max(0, min(10, criteria.get("practice_spaces_quality", 0))),
-                accommodation_quality=max(0, min(10, criteria.get("accommodation_quality", 0))),
-                capacity_flexibility=max(0, min(10, criteria.get("capacity_flexibility", 0))),
-                dining_quality=max(0, min(10, criteria.get("dining_quality", 0))),
-                natural_setting=max(0, min(10, criteria.get("natural_setting", 0))),
-                value_for_money=max(0, min(10, criteria.get("value_for_money", 0))),
-                accessibility_transport=max(0, min(10, criteria.get("accessibility_transport", 0))),
-                organizer_services=max(0, min(10, criteria.get("organizer_services", 0))),
-                atmosphere_vibe=max(0, min(10, criteria.get("atmosphere_vibe", 0))),
-                data_completeness=max(0, min(10, criteria.get("data_completeness", 0))),
-            ),
-            highlights=result.get("highlights", []),
-            concerns=result.get("concerns", []),
-            best_for=result.get("best_for", []),
-        )
-
-    except json.JSONDecodeError as e:
-        print(f"  [retreat_evaluator] Erreur JSON pour {venue.id}: {e}")
+        return _evaluation_from_result(venue, result)
+    except (KeyError, TypeError, ValueError) as e:
+        raise InvalidOutput(f"{type(e).__name__}: {e}")
+
+
+def _evaluation_from_result(venue: RetreatVenueListing, result: dict) -> RetreatVenueEvaluation:
+    criteria = result.get("criteria_scores") or {}
+
+    return RetreatVenueEvaluation(
+        listing_id=venue.id,
+        overall_score=max(0, min(100, result["overall_score"])),
+        match_summary=result["match_summary"],
+        criteria_scores=RetreatCriteriaScores(
+            practice_spaces_quality=max(0, min(10, criteria.get("practice_spaces_quality", 0))),
+            accommodation_quality=max(0, min(10, criteria.get("accommodation_quality", 0))),
+            capacity_flexibility=max(0, min(10, criteria.get("capacity_flexibility", 0))),
+            dining_quality=max(0, min(10, criteria.get("dining_quality", 0))),
+            natural_setting=max(0, min(10, criteria.get("natural_setting", 0))),
+            value_for_money=max(0, min(10, criteria.get("value_for_money", 0))),
+            accessibility_transport=max(0, min(10, criteria.get("accessibility_transport", 0))),
+            organizer_services=max(0, min(10, criteria.get("organizer_services", 0))),
+            atmosphere_vibe=max(0, min(10, criteria.get("atmosphere_vibe", 0))),
+            data_completeness=max(0, min(10, criteria.get("data_completeness", 0))),
+        ),
+        highlights=result.get("highlights", []),
+        concerns=result.get("concerns", []),
+        best_for=result.get("best_for", []),
+    )
+
+
+def evaluate_retreat_venue(venue: RetreatVenueListing) -> Optional[RetreatVenueEvaluation]:
+    """Évalue un lieu de retraite via Claude Haiku."""
+    if not anthropic or not ANTHROPIC_API_KEY:
+        print("  [retreat_evaluator] API Anthropic non disponible, évaluation ignorée")
         return None
+
+    try:
+        response = get_llm_executor().create("retreat_evaluator", _build_request(venue))
+        return _parse_evaluation(venue, response)
     except Exception as e:
         print(f"  [retreat_evaluator] Erreur pour {venue.id}: {e}")
         return None
@@ -229,20 +235,18 @@ def evaluate_all_retreat_venues(
         print("  [retreat_evaluator] Aucune nouvelle venue à évaluer")
         return new_evaluations
 
+    if not anthropic or not ANTHROPIC_API_KEY:
+        print("  [retreat_evaluator] API Anthropic non disponible, évaluation ignorée")
+        return new_evaluations
+
     print(f"  [retreat_evaluator] Évaluation de {len(to_evaluate)} venues...")
 
-    for i, venue in enumerate(to_evaluate):
-        print(f"  [retreat_evaluator] {i+1}/{len(to_evaluate)}: {venue.name[:60]}...")
-        evaluation = evaluate_retreat_venue(venue)
+    results = get_llm_executor().map("retreat_evaluator", to_evaluate, _build_request, _parse_evaluation)
+    for venue, evaluation in zip(to_evaluate, results):
         if evaluation:
             new_evaluations.append(evaluation)
-            print(f"    Score: {evaluation.overall_score}/100 - {evaluation.match_summary[:80]}...")
         else:
-            print(f"    Ignoré (évaluation échouée)")
-
-        # Rate limiting
-        if i < len(to_evaluate) - 1:
-            time.sleep(1)
+            print(f"    Ignoré {venue.id} (évaluation échouée)")
 
     print(f"  [retreat_evaluator] Terminé: {len(new_evaluations)} évaluations")
     return new_evaluations
@@ -16,6 +16,8 @@ Usage:
     python -m scraper.retreat_main --test      # Mode test (3 venues max)
     python -m scraper.retreat_main --no-ai     # Sans évaluation/contenu IA
     python -m scraper.retreat_main --scrape-only  # Scraping + dedup seulement
+    python -m scraper.retreat_main --incremental  # Ne re-visite que les lieux nouveaux/expirés
+    python -m scraper.retreat_main --replay RUN_ID  # Rejoue un run archivé (hors ligne)
 """
 
 import argparse
@@ -49,6 +51,11 @@ from scraper.contact_extractor import extract_contacts
 from scraper.retreat_evaluator import evaluate_all_retreat_venues
 from scraper.retreat_content_gen import generate_all_retreat_content
 from scraper.retreat_tag_extractor import extract_all_retreat_tags
+from scraper.scrape_runner import format_cache_stats, prepare_scrapers, mark_seen
+from scraper.response_archive import open_run
+from scraper.prompt_compaction import print_compaction_stats
+from scraper.llm_cache import print_llm_cache_stats, set_bypass
+from scraper.llm_executor import set_batch_mode
 
 
 # === Chargement des données existantes ===
@@ -209,6 +216,14 @@ def main():
     parser.add_argument("--priority", type=int, default=1, help="Niveau de priorité max des pays (1-3)")
     parser.add_argument("--ai-contacts", action="store_true", help="Utiliser l'IA pour l'extraction de contacts")
     parser.add_argument("--ai-tags", action="store_true", help="Utiliser l'IA pour compléter les tags")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Crawl incrémental (ignore les lieux vus récemment)")
+    parser.add_argument("--replay", metavar="RUN_ID",
+                        help="Rejouer un run archivé (data/archive) au lieu du réseau")
+    parser.add_argument("--no-llm-cache", action="store_true",
+                        help="Ne pas répondre depuis le cache LLM (les réponses fraîches sont stockées)")
+    parser.add_argument("--batch", action="store_true",
+                        help="Soumettre les étapes IA via l'API Message Batches (plus lent, moins cher, reprenable)")
     args = parser.parse_args()
 
     print("=" * 60)
@@ -216,6 +231,11 @@ def main():
     if args.test:
         print("  MODE TEST (3 venues max)")
     print("=" * 60)
+    open_run(args.replay)
+    if args.no_llm_cache:
+        set_bypass(True)
+    if args.batch:
+        set_batch_mode(True)
 
     # 1. Charger les données existantes
     print("\n--- Chargement des données existantes ---")
@@ -234,6 +254,8 @@ def main():
         BookYogaRetreatsScraper(priority_max=args.priority),
     ]
 
+    prepare_scrapers(scrapers, existing_venues, incremental=args.incremental)
+
     all_new_venues: list[RetreatVenueListing] = []
     for scraper in scrapers:
         print(f"\n  --- {scraper.name} ---")
@@ -244,6 +266,8 @@ def main():
             print(f"  Trouvé {len(venues)} venues ({new_count} nouvelles)")
         except Exception as e:
             print(f"  ERREUR: {e}")
+        mark_seen(existing_venues, scraper.confirmed_ids)
+        print(f"  {format_cache_stats(scraper.cache_stats)}")
 
     # En mode test, limiter à 3 venues
     if args.test and len(all_new_venues) > 3:
@@ -395,6 +419,8 @@ def _print_summary(
     print(f"    Avec email: {with_email}/{len(venues)}")
     print(f"    Avec site web: {with_website}/{len(venues)}")
 
+    print_llm_cache_stats()
+    print_compaction_stats()
     print(f"{'=' * 60}")
 
 
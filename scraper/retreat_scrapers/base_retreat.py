@@ -5,15 +5,12 @@ géocodage, génération d'ID, mapping vers RetreatVenueListing.
 """
 
 import hashlib
-import time
 from abc import abstractmethod
 from typing import Optional, Tuple
 
-import requests
-
 from scraper.scrapers.base import BaseScraper
 from scraper.retreat_scrapers.retreat_models import RetreatVenueListing
-from scraper.retreat_config import REQUEST_DELAY, USER_AGENT, REQUEST_TIMEOUT
+from scraper.retreat_config import USER_AGENT
 
 
 class BaseRetreatScraper(BaseScraper):
@@ -41,14 +38,14 @@ class BaseRetreatScraper(BaseScraper):
 
         Retourne (latitude, longitude) ou None si non trouvé.
         Utilise un cache en mémoire pour éviter les requêtes dupliquées.
-        Respecte la politique Nominatim : max 1 requête/seconde.
+        Respecte la politique Nominatim (max 1 requête/seconde) via le
+        limiteur partagé.
         """
         if address in self._geocode_cache:
             return self._geocode_cache[address]
 
         try:
-            time.sleep(1.1)  # Respect Nominatim rate limit (1 req/s)
-            response = requests.get(
+            response = self._rate_limited_get(
                 "https://nominatim.openstreetmap.org/search",
                 params={
                     "q": address,
@@ -57,9 +54,7 @@ class BaseRetreatScraper(BaseScraper):
                     "addressdetails": 1,
                 },
                 headers={"User-Agent": USER_AGENT},
-                timeout=REQUEST_TIMEOUT,
             )
-            response.raise_for_status()
             results = response.json()
 
             if results:
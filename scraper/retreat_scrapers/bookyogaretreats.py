@@ -5,7 +5,6 @@ Parse les pages de listing et de détail pour extraire les données des venues.
 """
 
 import re
-import time
 from typing import Optional
 from urllib.parse import urljoin
 
@@ -13,7 +12,7 @@ from bs4 import BeautifulSoup
 
 from scraper.retreat_scrapers.base_retreat import BaseRetreatScraper
 from scraper.retreat_scrapers.retreat_models import RetreatVenueListing
-from scraper.retreat_config import TARGET_COUNTRIES, RATE_LIMIT_SETTINGS
+from scraper.retreat_config import TARGET_COUNTRIES
 
 
 class BookYogaRetreatsScraper(BaseRetreatScraper):
@@ -21,6 +20,7 @@ class BookYogaRetreatsScraper(BaseRetreatScraper):
 
     name = "BookYogaRetreats"
     base_url = "https://www.bookyogaretreats.com"
+    parse_in_processes = True
 
     # Mapping codes pays → slugs URL
     COUNTRY_SLUGS = {
@@ -45,7 +45,6 @@ class BookYogaRetreatsScraper(BaseRetreatScraper):
     def __init__(self, priority_max: int = 3):
         super().__init__()
         self.priority_max = priority_max
-        self._delay = RATE_LIMIT_SETTINGS["bookyogaretreats"]["delay"]
 
     def scrape(self) -> list[RetreatVenueListing]:
         """Scrape les venues depuis bookyogaretreats.com."""
@@ -91,12 +90,12 @@ class BookYogaRetreatsScraper(BaseRetreatScraper):
 
                 print(f"    Page {page}: {len(listing_links)} liens")
 
-                for link in listing_links:
-                    detail_url = urljoin(self.base_url, link)
-                    venue = self._scrape_detail_page(detail_url, country_code)
-                    if venue:
-                        venues.append(venue)
-                    time.sleep(self._delay)
+                detail_urls = [urljoin(self.base_url, link) for link in listing_links]
+                venues.extend(self._fetch_and_parse(detail_urls, self._scrape_detail_page, country_code))
+
+                if self._index_exhausted(detail_urls):
+                    print(f"    Page {page}: uniquement des lieux connus, arrêt (incrémental)")
+                    break
 
                 # Vérifier la pagination
                 if not self._has_next_page(soup, page):
@@ -142,15 +141,10 @@ class BookYogaRetreatsScraper(BaseRetreatScraper):
         return False
 
     def _scrape_detail_page(
-        self, url: str, country_code: str
+        self, url: str, html: str, country_code: str
     ) -> Optional[RetreatVenueListing]:
-        """Scrape une page de détail sur bookyogaretreats.com."""
-        try:
-            response = self._rate_limited_get(url)
-            soup = BeautifulSoup(response.text, "lxml")
-        except Exception as e:
-            print(f"    Erreur détail {url}: {e}")
-            return None
+        """Parse une page de détail (déjà téléchargée) sur bookyogaretreats.com."""
+        soup = BeautifulSoup(html, "lxml")
 
         # Nom
         name_tag = soup.select_one("h1, .venue-name, .listing-title")
@@ -4,7 +4,6 @@ Utilise l'API Text Search pour trouver des lieux par catégorie × ville,
 puis Place Details pour les informations de contact.
 """
 
-import time
 from typing import Optional
 
 import requests
@@ -13,7 +12,6 @@ from scraper.retreat_scrapers.base_retreat import BaseRetreatScraper
 from scraper.retreat_scrapers.retreat_models import RetreatVenueListing
 from scraper.retreat_config import (
     GOOGLE_PLACES_API_KEY,
-    GOOGLE_PLACES_DELAY,
     SEARCH_CATEGORIES,
     TARGET_COUNTRIES,
 )
@@ -63,8 +61,6 @@ class GooglePlacesScraper(BaseRetreatScraper):
             except Exception as e:
                 print(f"  [google_places] Erreur pour '{query}' ({city}): {e}")
 
-            time.sleep(GOOGLE_PLACES_DELAY)
-
         print(f"  [google_places] Total: {len(venues)} lieux trouvés")
         return venues
 
@@ -121,13 +117,12 @@ class GooglePlacesScraper(BaseRetreatScraper):
         }
 
         try:
-            response = requests.post(
+            response = self._rate_limited_request(
+                "POST",
                 f"{self.base_url}/places:searchText",
                 json=payload,
                 headers=headers,
-                timeout=15,
             )
-            response.raise_for_status()
             data = response.json()
             places = data.get("places", [])
             all_results.extend(places)
@@ -153,13 +148,10 @@ class GooglePlacesScraper(BaseRetreatScraper):
         }
 
         try:
-            time.sleep(GOOGLE_PLACES_DELAY)
-            response = requests.get(
+            response = self._rate_limited_get(
                 f"{self.base_url}/places/{place_id}",
                 headers=headers,
-                timeout=15,
             )
-            response.raise_for_status()
             return response.json()
         except Exception as e:
             print(f"  [google_places] Erreur détails pour {place_id}: {e}")
@@ -5,7 +5,6 @@ Parse les pages de listing puis les pages de détail de chaque lieu.
 """
 
 import re
-import time
 from typing import Optional
 from urllib.parse import urljoin
 
@@ -13,7 +12,7 @@ from bs4 import BeautifulSoup
 
 from scraper.retreat_scrapers.base_retreat import BaseRetreatScraper
 from scraper.retreat_scrapers.retreat_models import RetreatVenueListing, RetreatTestimonial
-from scraper.retreat_config import TARGET_COUNTRIES, RATE_LIMIT_SETTINGS
+from scraper.retreat_config import TARGET_COUNTRIES
 
 
 class RetreatGuruScraper(BaseRetreatScraper):
@@ -21,6 +20,7 @@ class RetreatGuruScraper(BaseRetreatScraper):
 
     name = "Retreat.guru"
     base_url = "https://retreat.guru"
+    parse_in_processes = True
 
     # Mapping des codes pays vers les slugs retreat.guru
     COUNTRY_SLUGS = {
@@ -46,7 +46,6 @@ class RetreatGuruScraper(BaseRetreatScraper):
     def __init__(self, priority_max: int = 3):
         super().__init__()
         self.priority_max = priority_max
-        self._delay = RATE_LIMIT_SETTINGS["retreat_guru"]["delay"]
 
     def scrape(self) -> list[RetreatVenueListing]:
         """Scrape les centres de retraite depuis retreat.guru."""
@@ -93,12 +92,12 @@ class RetreatGuruScraper(BaseRetreatScraper):
 
                 print(f"    Page {page}: {len(listing_links)} liens")
 
-                for link in listing_links:
-                    detail_url = urljoin(self.base_url, link)
-                    venue = self._scrape_detail_page(detail_url, country_code)
-                    if venue:
-                        venues.append(venue)
-                    time.sleep(self._delay)
+                detail_urls = [urljoin(self.base_url, link) for link in listing_links]
+                venues.extend(self._fetch_and_parse(detail_urls, self._scrape_detail_page, country_code))
+
+                if self._index_exhausted(detail_urls):
+                    print(f"    Page {page}: uniquement des lieux connus, arrêt (incrémental)")
+                    break
 
                 # Vérifier la pagination
                 if not self._has_next_page(soup):
@@ -135,15 +134,10 @@ class RetreatGuruScraper(BaseRetreatScraper):
         return False
 
     def _scrape_detail_page(
-        self, url: str, country_code: str
+        self, url: str, html: str, country_code: str
     ) -> Optional[RetreatVenueListing]:
-        """Scrape une page de détail d'un lieu sur retreat.guru."""
-        try:
-            response = self._rate_limited_get(url)
-            soup = BeautifulSoup(response.text, "lxml")
-        except Exception as e:
-            print(f"    Erreur détail {url}: {e}")
-            return None
+        """Parse une page de détail (déjà téléchargée) d'un lieu sur retreat.guru."""
+        soup = BeautifulSoup(html, "lxml")
 
         # Nom
         name_tag = soup.select_one("h1")
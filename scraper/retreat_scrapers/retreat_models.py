@@ -57,6 +57,7 @@ class RetreatVenueListing(BaseModel):
     name: str
     description: str
     date_scraped: str = ""
+    last_seen: str = ""  # last time the detail page was fetched or confirmed unchanged
 
     # === Localisation ===
     country: Optional[str] = None
@@ -287,6 +288,8 @@ class RetreatVenueListing(BaseModel):
             self.id = hashlib.md5(self.source_url.encode()).hexdigest()[:12]
         if not self.date_scraped:
             self.date_scraped = datetime.utcnow().isoformat()
+        if not self.last_seen:
+            self.last_seen = self.date_scraped
 
 
 class RetreatCriteriaScores(BaseModel):
@@ -6,7 +6,6 @@ pour les cas ambigus (lorsque les données structurées ne suffisent pas).
 """
 
 import json
-import time
 from typing import Optional, Dict, List
 
 from scraper.retreat_scrapers.retreat_models import (
@@ -14,12 +13,16 @@ from scraper.retreat_scrapers.retreat_models import (
     RetreatVenueTags,
 )
 from scraper.retreat_config import ANTHROPIC_API_KEY
+from scraper.llm_executor import get_llm_executor
+from scraper.prompt_compaction import compact_description
+from scraper.structured_output import output_schema, output_tool, response_object, validate, with_output_tool
 
 try:
     import anthropic
 except ImportError:
     anthropic = None
 
+MODEL = "claude-haiku-4-5-20251001"
 
 def _determine_capacity_range(venue: RetreatVenueListing) -> Optional[str]:
     """Détermine la catégorie de capacité."""
@@ -204,70 +207,87 @@ Règles:
 - Pour les listes, ne retourne que les éléments clairement mentionnés"""
 
 
-def _ai_complete_tags(
-    venue: RetreatVenueListing, existing_tags: RetreatVenueTags
-) -> RetreatVenueTags:
-    """Utilise l'IA pour compléter les tags manquants depuis la description."""
-    if not anthropic or not ANTHROPIC_API_KEY:
-        return existing_tags
+# Champs que l'IA peut compléter, imposés via un outil dont le schéma vient de RetreatVenueTags
+AI_TAG_FIELDS = (
+    "has_yoga_studio", "has_meditation_hall", "has_pool", "has_sauna_spa",
+    "is_vegetarian", "is_vegan_friendly", "eco_friendly", "setting", "style",
+)
+TAGS_TOOL = output_tool(
+    "record_tags", "Enregistre les tags déduits de la description.",
+    output_schema(RetreatVenueTags, include=AI_TAG_FIELDS),
+)
 
-    client = anthropic.Anthropic(api_key=ANTHROPIC_API_KEY)
 
-    # Ne soumettre que si on a des lacunes significatives
-    tags_data = existing_tags.model_dump()
-    null_count = sum(1 for v in tags_data.values() if v is None)
-    if null_count < 5:
-        return existing_tags
+def _needs_ai(tags: RetreatVenueTags) -> bool:
+    """Ne soumettre à l'IA que si on a des lacunes significatives."""
+    null_count = sum(1 for v in tags.model_dump().values() if v is None)
+    return null_count >= 5
+
 
+def _build_request(venue: RetreatVenueListing, existing_tags: RetreatVenueTags) -> dict:
+    tags_data = existing_tags.model_dump()
     prompt = TAG_AI_PROMPT.format(
         name=venue.name,
-        description=venue.description[:3000],
+        description=compact_description("retreat_tag_extractor", venue.description),
         existing_tags=json.dumps(
             {k: v for k, v in tags_data.items() if k != "listing_id" and k != "date_extracted"},
             ensure_ascii=False,
             indent=2,
         ),
     )
+    return with_output_tool(dict(
+        model=MODEL,
+        max_tokens=512,
+        system=TAG_AI_SYSTEM,
+        messages=[{"role": "user", "content": prompt}],
+    ), TAGS_TOOL)
+
+
+def _merge_ai_tags(existing_tags: RetreatVenueTags, response) -> RetreatVenueTags:
+    """Complète les champs nuls de existing_tags avec la réponse du modèle."""
+    answer = response_object(response)
+    checked = validate(
+        RetreatVenueTags,
+        {k: v for k, v in answer.items() if k in AI_TAG_FIELDS and v is not None},
+        listing_id=existing_tags.listing_id,
+    )
+    ai_result = checked.model_dump(include=set(AI_TAG_FIELDS))
+
+    # Compléter seulement les champs nuls
+    if existing_tags.has_yoga_studio is None and ai_result.get("has_yoga_studio") is not None:
+        existing_tags.has_yoga_studio = ai_result["has_yoga_studio"]
+    if existing_tags.has_meditation_hall is None and ai_result.get("has_meditation_hall") is not None:
+        existing_tags.has_meditation_hall = ai_result["has_meditation_hall"]
+    if existing_tags.has_pool is None and ai_result.get("has_pool") is not None:
+        existing_tags.has_pool = ai_result["has_pool"]
+    if existing_tags.has_sauna_spa is None and ai_result.get("has_sauna_spa") is not None:
+        existing_tags.has_sauna_spa = ai_result["has_sauna_spa"]
+    if existing_tags.is_vegetarian is None and ai_result.get("is_vegetarian") is not None:
+        existing_tags.is_vegetarian = ai_result["is_vegetarian"]
+    if existing_tags.is_vegan_friendly is None and ai_result.get("is_vegan_friendly") is not None:
+        existing_tags.is_vegan_friendly = ai_result["is_vegan_friendly"]
+    if existing_tags.eco_friendly is None and ai_result.get("eco_friendly") is not None:
+        existing_tags.eco_friendly = ai_result["eco_friendly"]
+
+    # Compléter les listes vides
+    if not existing_tags.setting and ai_result.get("setting"):
+        existing_tags.setting = ai_result["setting"]
+    if not existing_tags.style and ai_result.get("style"):
+        existing_tags.style = ai_result["style"]
 
-    try:
-        response = client.messages.create(
-            model="claude-haiku-4-5-20251001",
-            max_tokens=512,
-            system=TAG_AI_SYSTEM,
-            messages=[{"role": "user", "content": prompt}],
-        )
-
-        text = response.content[0].text.strip()
-        if text.startswith("```"):
-            text = text.split("\n", 1)[1]
-            if text.endswith("```"):
-                text = text[:-3]
-            text = text.strip()
-
-        ai_result = json.loads(text)
-
-        # Compléter seulement les champs nuls
-        if existing_tags.has_yoga_studio is None and ai_result.get("has_yoga_studio") is not None:
-            existing_tags.has_yoga_studio = ai_result["has_yoga_studio"]
-        if existing_tags.has_meditation_hall is None and ai_result.get("has_meditation_hall") is not None:
-            existing_tags.has_meditation_hall = ai_result["has_meditation_hall"]
-        if existing_tags.has_pool is None and ai_result.get("has_pool") is not None:
-            existing_tags.has_pool = ai_result["has_pool"]
-        if existing_tags.has_sauna_spa is None and ai_result.get("has_sauna_spa") is not None:
-            existing_tags.has_sauna_spa = ai_result["has_sauna_spa"]
-        if existing_tags.is_vegetarian is None and ai_result.get("is_vegetarian") is not None:
-            existing_tags.is_vegetarian = ai_result["is_vegetarian"]
-        if existing_tags.is_vegan_friendly is None and ai_result.get("is_vegan_friendly") is not None:
-            existing_tags.is_vegan_friendly = ai_result["is_vegan_friendly"]
-        if existing_tags.eco_friendly is None and ai_result.get("eco_friendly") is not None:
-            existing_tags.eco_friendly = ai_result["eco_friendly"]
-
-        # Compléter les listes vides
-        if not existing_tags.setting and ai_result.get("setting"):
-            existing_tags.setting = ai_result["setting"]
-        if not existing_tags.style and ai_result.get("style"):
-            existing_tags.style = ai_result["style"]
+    return existing_tags
+
+
+def _ai_complete_tags(
+    venue: RetreatVenueListing, existing_tags: RetreatVenueTags
+) -> RetreatVenueTags:
+    """Utilise l'IA pour compléter les tags manquants depuis la description."""
+    if not anthropic or not ANTHROPIC_API_KEY or not _needs_ai(existing_tags):
+        return existing_tags
 
+    try:
+        response = get_llm_executor().create("retreat_tag_extractor", _build_request(venue, existing_tags))
+        _merge_ai_tags(existing_tags, response)
     except Exception as e:
         print(f"  [retreat_tag_extractor] Erreur IA pour {venue.id}: {e}")
 
@@ -289,27 +309,28 @@ def extract_all_retreat_tags(
     Returns:
         Liste des nouveaux tags
     """
-    new_tags = []
     to_extract = [v for v in venues if v.id not in existing_tags]
 
     if not to_extract:
         print("  [retreat_tag_extractor] Aucune venue à traiter")
-        return new_tags
+        return []
 
     print(f"  [retreat_tag_extractor] Extraction de tags pour {len(to_extract)} venues...")
 
-    for i, venue in enumerate(to_extract):
-        print(f"  [retreat_tag_extractor] {i+1}/{len(to_extract)}: {venue.name[:60]}...")
-
-        # Extraction directe depuis les données structurées
-        tags = extract_tags_from_venue(venue)
-
-        # Complétion IA optionnelle pour les cas ambigus
-        if use_ai:
-            tags = _ai_complete_tags(venue, tags)
-            time.sleep(0.5)
-
-        new_tags.append(tags)
+    # Extraction directe depuis les données structurées
+    new_tags = [extract_tags_from_venue(venue) for venue in to_extract]
+
+    # Complétion IA optionnelle pour les cas ambigus, en parallèle via l'exécuteur partagé
+    if use_ai and anthropic and ANTHROPIC_API_KEY:
+        ambiguous = {venue.id: tags for venue, tags in zip(to_extract, new_tags) if _needs_ai(tags)}
+        if ambiguous:
+            print(f"  [retreat_tag_extractor] Complétion IA pour {len(ambiguous)} venues...")
+            get_llm_executor().map(
+                "retreat_tag_extractor",
+                [venue for venue in to_extract if venue.id in ambiguous],
+                lambda venue: _build_request(venue, ambiguous[venue.id]),
+                lambda venue, response: _merge_ai_tags(ambiguous[venue.id], response),
+            )
 
     print(f"  [retreat_tag_extractor] Terminé: {len(new_tags)} tags extraits")
     return new_tags
@@ -0,0 +1,104 @@
+"""Run several scrapers concurrently, one thread per source.
+
+Each scraper targets its own domain and keeps its own politeness delay, so
+running them side by side does not increase the load on any single site: the
+whole crawl takes roughly as long as the slowest source instead of the sum of
+all of them.
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+from scraper.scrapers.base import BaseScraper
+
+
+@dataclass
+class ScrapeResult:
+    """Outcome of a single scraper run."""
+    name: str
+    listings: list = field(default_factory=list)
+    error: Optional[str] = None
+    elapsed: float = 0.0
+    cache_stats: dict = field(default_factory=dict)
+    confirmed_ids: set = field(default_factory=set)
+
+
+def prepare_scrapers(scrapers: List[BaseScraper], existing: Dict[str, object], incremental: bool = False):
+    """Give every scraper the known listing IDs with their last-seen timestamps."""
+    known = {item_id: item.last_seen or item.date_scraped for item_id, item in existing.items()}
+    for scraper in scrapers:
+        scraper.known_ids = known
+        scraper.incremental = incremental
+
+
+def mark_seen(existing: Dict[str, object], ids: Iterable[str]) -> int:
+    """Bump last_seen on stored listings whose detail page was confirmed unchanged."""
+    now = datetime.utcnow().isoformat()
+    count = 0
+    for item_id in ids:
+        if item_id in existing:
+            existing[item_id].last_seen = now
+            count += 1
+    return count
+
+
+def _run_one(scraper: BaseScraper) -> ScrapeResult:
+    start = time.monotonic()
+    try:
+        listings = scraper.scrape()
+        error = None
+    except Exception as e:
+        listings, error = [], str(e)
+    return ScrapeResult(scraper.name, listings, error, time.monotonic() - start,
+                        dict(scraper.cache_stats), set(scraper.confirmed_ids))
+
+
+def run_scrapers(
+    scrapers: List[BaseScraper],
+    max_workers: Optional[int] = None,
+) -> List[ScrapeResult]:
+    """Run all scrapers in parallel and collect results as they finish.
+
+    Returns:
+        One ScrapeResult per scraper, in completion order.
+    """
+    if not scrapers:
+        return []
+
+    results = []
+    start = time.monotonic()
+    workers = max_workers or len(scrapers)
+    print(f"  [scrape_runner] Running {len(scrapers)} scrapers concurrently ({workers} workers)")
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="scraper") as pool:
+        futures = {pool.submit(_run_one, s): s for s in scrapers}
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            if result.error:
+                print(f"  [scrape_runner] {result.name}: ERROR after {result.elapsed:.1f}s: {result.error}")
+            else:
+                print(f"  [scrape_runner] {result.name}: {len(result.listings)} listings in {result.elapsed:.1f}s")
+
+    print(f"  [scrape_runner] All scrapers done in {time.monotonic() - start:.1f}s")
+    return results
+
+
+def format_cache_stats(stats: dict) -> str:
+    """One-line summary of a scraper's HTTP cache counters."""
+    hits, misses = stats.get("hit", 0), stats.get("miss", 0)
+    total = hits + misses
+    rate = f"{100 * hits / total:.0f}%" if total else "-"
+    return (f"cache {hits} hit / {misses} miss ({rate}), {stats.get('unchanged', 0)} unchanged, "
+            f"{stats.get('skipped', 0)} skipped")
+
+
+def print_timings(results: List[ScrapeResult]):
+    """Print a per-source wall time and HTTP cache table, slowest first."""
+    print(f"\n  Per-source wall time:")
+    for r in sorted(results, key=lambda r: r.elapsed, reverse=True):
+        status = f"ERROR: {r.error[:60]}" if r.error else f"{len(r.listings)} listings"
+        print(f"    {r.name:<32} {r.elapsed:7.1f}s  {status:<16} {format_cache_stats(r.cache_stats)}")
@@ -1,29 +1,253 @@
 from abc import ABC, abstractmethod
-import time
+import asyncio
+import hashlib
+import multiprocessing
+import random
+import threading
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from typing import AsyncIterator, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional
+from urllib.parse import urlparse
 import requests
+from requests.adapters import HTTPAdapter
 from scraper.models import Listing
-from scraper.config import USER_AGENT, REQUEST_DELAY, REQUEST_TIMEOUT
+from scraper.config import (
+    USER_AGENT,
+    MAX_CONCURRENCY_PER_HOST,
+    INCREMENTAL_REFRESH_DAYS,
+    INCREMENTAL_REFRESH_SAMPLE,
+    PARSE_WORKERS,
+)
+from scraper.rate_limiter import limited_request
+from scraper.http_cache import get_http_cache
+from scraper.response_archive import get_archive, is_replaying, request_key
+
+
+class FetchResult(NamedTuple):
+    url: str
+    response: Optional[requests.Response]
+    error: Optional[Exception]
+
+
+_parse_pool: Optional[ProcessPoolExecutor] = None
+_parse_pool_lock = threading.Lock()
+
+
+def get_parse_pool() -> Optional[ProcessPoolExecutor]:
+    """Return the process-wide HTML parsing pool, or None if parsing runs inline.
+
+    Workers are spawned rather than forked: the scrapers run in threads and
+    forking a multi-threaded process can deadlock on inherited locks.
+    """
+    global _parse_pool
+    if PARSE_WORKERS <= 0:
+        return None
+    with _parse_pool_lock:
+        if _parse_pool is None:
+            _parse_pool = ProcessPoolExecutor(
+                max_workers=PARSE_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _parse_pool
+
+
+def _parse_page(scraper: "BaseScraper", method: str, url: str, html: str, args: tuple):
+    """Worker entry point: run a scraper's page parser on pre-fetched HTML."""
+    return getattr(scraper, method)(url, html, *args)
 
 
 class BaseScraper(ABC):
     name: str = ""
     base_url: str = ""
+    max_concurrency_per_host: int = MAX_CONCURRENCY_PER_HOST
+    # Parse detail pages in the shared process pool; parsers must not touch the network
+    parse_in_processes: bool = False
 
     def __init__(self):
         self.session = requests.Session()
         self.session.headers.update({"User-Agent": USER_AGENT})
-        self._last_request_time = 0
+        # Keep-alive pool large enough for every in-flight request of fetch_many()
+        adapter = HTTPAdapter(pool_connections=10, pool_maxsize=self.max_concurrency_per_host)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.http_cache = get_http_cache()
+        # hit = 304 served from cache, miss = full download, unchanged = parse skipped,
+        # skipped = known detail page not fetched in incremental mode
+        self.cache_stats: Counter = Counter()
+        # Known listing ID -> last_seen ISO timestamp, set by the caller before scrape()
+        self.known_ids: Dict[str, str] = {}
+        # Known IDs whose detail page was confirmed unchanged (304) during this run
+        self.confirmed_ids: set = set()
+        self.incremental = False
+        self.refresh_days = INCREMENTAL_REFRESH_DAYS
+        self.refresh_sample = INCREMENTAL_REFRESH_SAMPLE
+
+    # Only parsing state travels to pool workers, not the session, cache or crawl bookkeeping
+    _NOT_PICKLED = ("session", "http_cache", "known_ids", "confirmed_ids")
+
+    def __getstate__(self):
+        return {k: v for k, v in self.__dict__.items() if k not in self._NOT_PICKLED}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.session = None
+        self.http_cache = None
+        self.known_ids = {}
+        self.confirmed_ids = set()
+
+    @staticmethod
+    def listing_id_for(url: str) -> str:
+        return hashlib.md5(url.encode()).hexdigest()[:12]
+
+    def _is_fresh(self, url: str) -> bool:
+        """True if the listing at `url` is known and was seen within refresh_days."""
+        last_seen = self.known_ids.get(self.listing_id_for(url))
+        if not last_seen:
+            return False
+        try:
+            age = datetime.utcnow() - datetime.fromisoformat(last_seen)
+        except ValueError:
+            return False
+        return age < timedelta(days=self.refresh_days)
+
+    def _select_detail_urls(self, urls: Iterable[str]) -> List[str]:
+        """In incremental mode, keep new and expired URLs plus a refresh sample of fresh ones."""
+        urls = list(urls)
+        if not self.incremental:
+            return urls
+        selected = [u for u in urls if not self._is_fresh(u) or random.random() < self.refresh_sample]
+        self.cache_stats["skipped"] += len(urls) - len(selected)
+        return selected
+
+    def _index_exhausted(self, urls: Iterable[str]) -> bool:
+        """In incremental mode, True once an index page lists only fresh known URLs.
+
+        Index pages are sorted newest first on every source, so pagination can stop there.
+        """
+        return self.incremental and all(self._is_fresh(u) for u in urls)
+
+    def _rate_limited_request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """Send a request through the process-wide per-host limiter."""
+        response = limited_request(self.session, method, url, **kwargs)
+        response.raise_for_status()
+        return response
 
     def _rate_limited_get(self, url: str, **kwargs) -> requests.Response:
-        elapsed = time.time() - self._last_request_time
-        if elapsed < REQUEST_DELAY:
-            time.sleep(REQUEST_DELAY - elapsed)
-        self._last_request_time = time.time()
-        kwargs.setdefault("timeout", REQUEST_TIMEOUT)
-        response = self.session.get(url, **kwargs)
+        """GET with conditional revalidation against the persistent page cache.
+
+        A 304 answer is replaced by the cached page, flagged `from_cache`.
+        The cache is bypassed while replaying an archived run.
+        """
+        if self.http_cache is None or is_replaying():
+            return self._rate_limited_request("GET", url, **kwargs)
+
+        key = requests.Request("GET", url, params=kwargs.get("params")).prepare().url
+        cached = self.http_cache.get(key)
+        if cached:
+            kwargs["headers"] = {**kwargs.get("headers", {}), **cached.conditional_headers()}
+
+        response = limited_request(self.session, "GET", url, **kwargs)
+        if cached and response.status_code == 304:
+            self.cache_stats["hit"] += 1
+            self.http_cache.touch(key)
+            page = cached.to_response()
+            archive = get_archive()
+            if archive:
+                # Archive the full page rather than the bare 304 so the run replays on its own
+                archive.record(request_key("GET", url, kwargs.get("params")), page)
+            return page
+
         response.raise_for_status()
+        self.cache_stats["miss"] += 1
+        self.http_cache.put(key, response)
         return response
 
+    async def afetch_many(self, urls: Iterable[str], **kwargs) -> AsyncIterator[FetchResult]:
+        """Fetch URLs concurrently, yielding results in completion order.
+
+        At most `max_concurrency_per_host` requests are in flight per host;
+        the shared rate limiter still decides when each one may start.
+        """
+        semaphores: Dict[str, asyncio.Semaphore] = {}
+
+        async def fetch(url: str) -> FetchResult:
+            host = urlparse(url).hostname or ""
+            sem = semaphores.setdefault(host, asyncio.Semaphore(self.max_concurrency_per_host))
+            async with sem:
+                try:
+                    response = await asyncio.to_thread(self._rate_limited_get, url, **kwargs)
+                    return FetchResult(url, response, None)
+                except Exception as e:
+                    return FetchResult(url, None, e)
+
+        tasks = [asyncio.ensure_future(fetch(url)) for url in dict.fromkeys(urls)]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def fetch_many(self, urls: Iterable[str], **kwargs) -> Iterator[FetchResult]:
+        """Synchronous wrapper around afetch_many() for use inside scrape()."""
+        loop = asyncio.new_event_loop()
+        results = self.afetch_many(urls, **kwargs)
+        try:
+            while True:
+                try:
+                    yield loop.run_until_complete(results.__anext__())
+                except StopAsyncIteration:
+                    break
+        finally:
+            loop.run_until_complete(results.aclose())
+            loop.run_until_complete(loop.shutdown_default_executor())
+            loop.close()
+
+    def _fetch_and_parse(self, urls: Iterable[str], parse: Callable, *args) -> List:
+        """Fetch detail pages concurrently and parse each one as it arrives.
+
+        `parse(url, html, *args)` only parses a pre-fetched page and returns
+        a listing or None. Pages the server reports as unchanged (304) are
+        skipped when their listing is already in `known_ids`; in incremental
+        mode fresh known pages are not fetched at all.
+
+        With `parse_in_processes`, fetched pages are queued to the shared
+        process pool so parsing overlaps fetching and spreads across cores.
+        """
+        pool = None
+        if self.parse_in_processes and getattr(parse, "__self__", None) is self:
+            pool = get_parse_pool()
+
+        items = []
+        pending = []
+        for fetched in self.fetch_many(self._select_detail_urls(urls)):
+            if fetched.error:
+                print(f"  [{self.name}] Error fetching {fetched.url}: {fetched.error}")
+                continue
+            listing_id = self.listing_id_for(fetched.url)
+            if getattr(fetched.response, "from_cache", False) and listing_id in self.known_ids:
+                self.cache_stats["unchanged"] += 1
+                self.confirmed_ids.add(listing_id)
+                continue
+            if pool:
+                pending.append((fetched.url, pool.submit(
+                    _parse_page, self, parse.__name__, fetched.url, fetched.response.text, args)))
+                continue
+            item = parse(fetched.url, fetched.response.text, *args)
+            if item:
+                items.append(item)
+
+        for url, future in pending:
+            try:
+                item = future.result()
+            except Exception as e:
+                print(f"  [{self.name}] Error parsing {url}: {e}")
+                continue
+            if item:
+                items.append(item)
+        return items
+
     @abstractmethod
     def scrape(self) -> list[Listing]:
         pass
@@ -155,14 +155,20 @@ class CohousingSpainScraper(BaseScraper):
 
         soup = BeautifulSoup(resp.text, "lxml")
 
+        project_titles = {}
         for link in soup.find_all("a", href=True):
             href = link["href"]
             text = link.get_text(strip=True)
             if text and len(text) > 3 and ("cohousing" in href.lower() or "vivienda" in href.lower()):
                 full_url = href if href.startswith("http") else self.base_url + href
-                listing = self._scrape_project_page(full_url, text)
-                if listing:
-                    listings.append(listing)
+                project_titles.setdefault(full_url, text)
+
+        for fetched in self.fetch_many(self._select_detail_urls(project_titles)):
+            if fetched.error:
+                continue
+            listing = self._scrape_project_page(fetched.url, fetched.response.text, project_titles[fetched.url])
+            if listing:
+                listings.append(listing)
 
         # Also extract any JSON data embedded in the page
         for script in soup.find_all("script"):
@@ -181,14 +187,9 @@ class CohousingSpainScraper(BaseScraper):
 
         return listings
 
-    def _scrape_project_page(self, url: str, title: str) -> Optional[Listing]:
-        """Scrape an individual project page."""
-        try:
-            resp = self._rate_limited_get(url)
-        except Exception:
-            return None
-
-        soup = BeautifulSoup(resp.text, "lxml")
+    def _scrape_project_page(self, url: str, html: str, title: str) -> Optional[Listing]:
+        """Parse an individual pre-fetched project page."""
+        soup = BeautifulSoup(html, "lxml")
 
         content_el = soup.select_one(".entry-content, article, main, .content")
         description = ""
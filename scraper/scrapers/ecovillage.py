@@ -78,21 +78,11 @@ class EcovillageOrgScraper(BaseScraper):
                 if "ecovillage.org" in href and href != country_url:
                     ecovillage_links.append(href)
 
-        for url in ecovillage_links[:30]:
-            listing = self._scrape_ecovillage(url, meta)
-            if listing:
-                listings.append(listing)
-
+        listings.extend(self._fetch_and_parse(ecovillage_links[:30], self._scrape_ecovillage, meta))
         return listings
 
-    def _scrape_ecovillage(self, url: str, meta: dict) -> Optional[Listing]:
-        try:
-            resp = self._rate_limited_get(url)
-        except Exception as e:
-            print(f"  [{self.name}] Error fetching {url}: {e}")
-            return None
-
-        soup = BeautifulSoup(resp.text, "lxml")
+    def _scrape_ecovillage(self, url: str, html: str, meta: dict) -> Optional[Listing]:
+        soup = BeautifulSoup(html, "lxml")
 
         # Title
         title_el = soup.select_one("h1.entry-title, h1")
@@ -86,22 +86,17 @@ class EcovillageFRScraper(BaseScraper):
             if not article_links:
                 break
 
-            for article_url in article_links:
-                seen_urls.add(article_url)
-                listing = self._scrape_article(article_url)
-                if listing:
-                    listings.append(listing)
+            seen_urls.update(article_links)
+            listings.extend(self._fetch_and_parse(article_links, self._scrape_article))
 
-        return listings
+            if self._index_exhausted(article_links):
+                print(f"  [{self.name}] Only known articles on page {page}, stopping (incremental).")
+                break
 
-    def _scrape_article(self, url: str) -> Optional[Listing]:
-        try:
-            resp = self._rate_limited_get(url)
-        except Exception as e:
-            print(f"  [{self.name}] Error fetching {url}: {e}")
-            return None
+        return listings
 
-        soup = BeautifulSoup(resp.text, "lxml")
+    def _scrape_article(self, url: str, html: str) -> Optional[Listing]:
+        soup = BeautifulSoup(html, "lxml")
 
         # Title
         title_el = soup.select_one("h1, .titre-article, .entry-title")
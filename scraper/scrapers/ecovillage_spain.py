@@ -75,22 +75,13 @@ class EcovillageSpainScraper(BaseScraper):
 
         print(f"  [{self.name}] Found {len(ecovillage_links)} ecovillage links")
 
-        for url in ecovillage_links[:30]:
-            listing = self._scrape_ecovillage(url)
-            if listing:
-                listings.append(listing)
+        listings.extend(self._fetch_and_parse(ecovillage_links[:30], self._scrape_ecovillage))
 
         print(f"  [{self.name}] Total: {len(listings)} entries scraped")
         return listings
 
-    def _scrape_ecovillage(self, url: str) -> Optional[Listing]:
-        try:
-            resp = self._rate_limited_get(url)
-        except Exception as e:
-            print(f"  [{self.name}] Error fetching {url}: {e}")
-            return None
-
-        soup = BeautifulSoup(resp.text, "lxml")
+    def _scrape_ecovillage(self, url: str, html: str) -> Optional[Listing]:
+        soup = BeautifulSoup(html, "lxml")
 
         # Title: use only the h1 text content, not children
         title_el = soup.select_one("h1.entry-title, h1")
@@ -13,6 +13,7 @@ class FindACoHouseScraper(BaseScraper):
 
     name = "findacohouse.be"
     base_url = "https://www.findacohouse.be"
+    parse_in_processes = True
     listings_url = "https://www.findacohouse.be/en/cohousing"
 
     # Belgian postal code to province mapping (first 1-2 digits)
@@ -87,10 +88,11 @@ class FindACoHouseScraper(BaseScraper):
             seen_urls.update(new_urls)
             print(f"  [{self.name}] Found {len(new_urls)} listing URLs on page {page + 1}")
 
-            for detail_url in new_urls:
-                listing = self._scrape_detail(detail_url)
-                if listing:
-                    listings.append(listing)
+            listings.extend(self._fetch_and_parse(new_urls, self._scrape_detail))
+
+            if self._index_exhausted(new_urls):
+                print(f"  [{self.name}] Only known listings on page {page + 1}, stopping (incremental).")
+                break
 
         print(f"  [{self.name}] Total: {len(listings)} listings scraped")
         return listings
@@ -106,15 +108,9 @@ class FindACoHouseScraper(BaseScraper):
                     urls.append(full_url)
         return urls
 
-    def _scrape_detail(self, url: str) -> Optional[Listing]:
-        """Scrape a single cohouse detail page."""
-        try:
-            resp = self._rate_limited_get(url)
-        except Exception as e:
-            print(f"  [{self.name}] Error fetching {url}: {e}")
-            return None
-
-        soup = BeautifulSoup(resp.text, "lxml")
+    def _scrape_detail(self, url: str, html: str) -> Optional[Listing]:
+        """Parse a single pre-fetched cohouse detail page."""
+        soup = BeautifulSoup(html, "lxml")
 
         # Title
         title_el = soup.select_one("h1")
@@ -11,6 +11,7 @@ from scraper.models import Listing
 class HabitatGroupeScraper(BaseScraper):
     name = "habitat-groupe.be"
     base_url = "https://www.habitat-groupe.be"
+    parse_in_processes = True
     listings_url = "https://www.habitat-groupe.be/les-petites-annonces/"
 
     def scrape(self) -> list[Listing]:
@@ -50,10 +51,11 @@ class HabitatGroupeScraper(BaseScraper):
             seen_urls.update(new_urls)
             print(f"  [{self.name}] Found {len(new_urls)} listing URLs on page {page}")
 
-            for detail_url in new_urls:
-                listing = self._scrape_detail(detail_url)
-                if listing:
-                    listings.append(listing)
+            listings.extend(self._fetch_and_parse(new_urls, self._scrape_detail))
+
+            if self._index_exhausted(new_urls):
+                print(f"  [{self.name}] Only known listings on page {page}, stopping (incremental).")
+                break
 
         print(f"  [{self.name}] Total: {len(listings)} listings scraped")
         return listings
@@ -73,14 +75,8 @@ class HabitatGroupeScraper(BaseScraper):
                         urls.append(full_url)
         return urls
 
-    def _scrape_detail(self, url: str) -> Optional[Listing]:
-        try:
-            resp = self._rate_limited_get(url)
-        except Exception as e:
-            print(f"  [{self.name}] Error fetching detail {url}: {e}")
-            return None
-
-        soup = BeautifulSoup(resp.text, "lxml")
+    def _scrape_detail(self, url: str, html: str) -> Optional[Listing]:
+        soup = BeautifulSoup(html, "lxml")
 
         # Extract title
         title_el = soup.select_one("h1.entry-title, h1.wp-block-post-title, h1")
@@ -64,22 +64,13 @@ class ICOrgScraper(BaseScraper):
         print(f"  [{self.name}] Found {len(community_links)} community pages, checking for European ones...")
 
         # Visit each page and check if it's in a target country
-        for url in community_links:
-            listing = self._scrape_community(url)
-            if listing:
-                listings.append(listing)
+        listings.extend(self._fetch_and_parse(community_links, self._scrape_community))
 
         print(f"  [{self.name}] Total: {len(listings)} European communities found")
         return listings
 
-    def _scrape_community(self, url: str) -> Optional[Listing]:
-        try:
-            resp = self._rate_limited_get(url)
-        except Exception as e:
-            print(f"  [{self.name}] Error fetching {url}: {e}")
-            return None
-
-        soup = BeautifulSoup(resp.text, "lxml")
+    def _scrape_community(self, url: str, html: str) -> Optional[Listing]:
+        soup = BeautifulSoup(html, "lxml")
         page_text = soup.get_text()
 
         # Check if any target country is mentioned
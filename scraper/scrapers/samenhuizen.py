@@ -13,6 +13,7 @@ class SamenhuizenScraper(BaseScraper):
 
     name = "samenhuizen.be"
     base_url = "https://www.samenhuizen.be"
+    parse_in_processes = True
     listings_url = "https://www.samenhuizen.be/nl/zoekertjes"
 
     def __init__(self):
@@ -78,10 +79,11 @@ class SamenhuizenScraper(BaseScraper):
             seen_urls.update(new_urls)
             print(f"  [{self.name}] Found {len(new_urls)} listing URLs on page {page + 1}")
 
-            for detail_url in new_urls:
-                listing = self._scrape_detail(detail_url)
-                if listing:
-                    listings.append(listing)
+            listings.extend(self._fetch_and_parse(new_urls, self._scrape_detail))
+
+            if self._index_exhausted(new_urls):
+                print(f"  [{self.name}] Only known listings on page {page + 1}, stopping (incremental).")
+                break
 
         print(f"  [{self.name}] Total: {len(listings)} listings scraped")
         return listings
@@ -103,15 +105,9 @@ class SamenhuizenScraper(BaseScraper):
                         urls.append(full_url)
         return urls
 
-    def _scrape_detail(self, url: str) -> Optional[Listing]:
-        """Scrape a single listing detail page."""
-        try:
-            resp = self._rate_limited_get(url)
-        except Exception as e:
-            print(f"  [{self.name}] Error fetching detail {url}: {e}")
-            return None
-
-        soup = BeautifulSoup(resp.text, "lxml")
+    def _scrape_detail(self, url: str, html: str) -> Optional[Listing]:
+        """Parse a single pre-fetched listing detail page."""
+        soup = BeautifulSoup(html, "lxml")
 
         # Parse all structured fields from classified labels
         fields = self._extract_classified_fields(soup)
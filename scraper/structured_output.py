@@ -0,0 +1,151 @@
+"""Schema-constrained answers for the LLM stages (tool use).
+
+Stages used to ask for "JSON only", strip "```" fences and json.loads() the
+text. Instead, each request now carries a single tool whose input schema is
+derived from the pydantic model the answer ends up in (Evaluation,
+ListingTags, RetreatVenueEvaluation, RetreatVenueTags), and tool_choice
+forces the model to answer through it, so the answer arrives as a JSON
+object already shaped like the model.
+
+Parsers read the answer with response_json() and validate it with
+validate(); anything unusable raises InvalidOutput. LLMExecutor.map() then
+sends one repair request (the original conversation, the bad answer and the
+error) and, if that fails too, quarantines the item (see
+scraper/llm_quarantine.py) so it is not re-sent on every run.
+"""
+
+import json
+from typing import Any, Dict, Iterable, Optional, Type
+
+from pydantic import BaseModel, ValidationError
+
+# Fields filled in by the pipeline, never by the model
+PIPELINE_FIELDS = (
+    "listing_id", "date_evaluated", "date_extracted", "input_fingerprint", "content_fingerprint",
+    "ai_title", "ai_description", "score_source", "provenance",
+)
+
+
+# AI title and description (content generators and the fused analyzer); no pydantic model of their own
+CONTENT_SCHEMA = {
+    "type": "object",
+    "properties": {"ai_title": {"type": "string"}, "ai_description": {"type": "string"}},
+    "required": ["ai_title", "ai_description"],
+}
+
+
+class InvalidOutput(ValueError):
+    """The model's answer does not match the requested schema."""
+
+
+def output_schema(
+    source: Type[BaseModel],
+    include: Optional[Iterable[str]] = None,
+    exclude: Iterable[str] = PIPELINE_FIELDS,
+) -> dict:
+    """JSON schema of a pydantic model's fields, without those the pipeline fills in."""
+    schema = source.model_json_schema()
+    include = set(include) if include is not None else None
+    properties = {
+        name: prop for name, prop in schema["properties"].items()
+        if name not in exclude and (include is None or name in include)
+    }
+    result = {
+        "type": "object",
+        "properties": properties,
+        "required": [name for name in schema.get("required", []) if name in properties],
+    }
+    if "$defs" in schema:
+        result["$defs"] = schema["$defs"]
+    return result
+
+
+def output_tool(name: str, description: str, schema: dict) -> dict:
+    return {"name": name, "description": description, "input_schema": schema}
+
+
+def with_output_tool(params: dict, tool: dict) -> dict:
+    """`params` with `tool` attached and forced as the only way to answer."""
+    return dict(params, tools=[tool], tool_choice={"type": "tool", "name": tool["name"]})
+
+
+def keyed_results_schema(item_schema: dict) -> dict:
+    """Schema for packed answers: {"results": [item + "listing_id", ...]}."""
+    item = dict(item_schema)
+    item["properties"] = {"listing_id": {"type": "string"}, **item_schema["properties"]}
+    item["required"] = ["listing_id"] + list(item_schema.get("required", []))
+    schema = {"type": "object", "properties": {"results": {"type": "array", "items": item}}, "required": ["results"]}
+    if "$defs" in item:
+        schema["$defs"] = item.pop("$defs")
+    return schema
+
+
+def response_json(response) -> Any:
+    """The answer as JSON: the forced tool's input, or the text of a plain answer."""
+    for block in response.content:
+        if getattr(block, "type", None) == "tool_use":
+            return block.input
+
+    text = "".join(getattr(block, "text", "") for block in response.content).strip()
+    # Handle potential markdown code blocks
+    if text.startswith("```"):
+        text = text.split("\n", 1)[1] if "\n" in text else ""
+        if text.endswith("```"):
+            text = text[:-3]
+        text = text.strip()
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError as e:
+        raise InvalidOutput(f"not JSON ({e}): {text[:200]}")
+
+
+def response_object(response) -> dict:
+    data = response_json(response)
+    if not isinstance(data, dict):
+        raise InvalidOutput(f"expected a JSON object, got {type(data).__name__}")
+    return data
+
+
+def read_content(response) -> Dict[str, str]:
+    """{"ai_title", "ai_description"} from a content answer, both non-empty."""
+    return content_from(response_object(response))
+
+
+def content_from(data) -> Dict[str, str]:
+    if not isinstance(data, dict) or not data.get("ai_title") or not data.get("ai_description"):
+        raise InvalidOutput("ai_title and ai_description are required")
+    return {"ai_title": str(data["ai_title"]), "ai_description": str(data["ai_description"])}
+
+
+def validate(model: Type[BaseModel], data: dict, **fields):
+    """model(**data, **fields), with validation problems raised as InvalidOutput."""
+    data = {k: v for k, v in data.items() if k not in fields}
+    try:
+        return model(**data, **fields)
+    except (ValidationError, TypeError, ValueError) as e:
+        raise InvalidOutput(str(e))
+
+
+def repair_request(params: dict, response, error: Exception) -> dict:
+    """Follow-up request showing the model its invalid answer and what was wrong with it."""
+    blocks = []
+    tool_use_id = None
+    for block in response.content:
+        if getattr(block, "type", None) == "tool_use":
+            tool_use_id = block.id
+            blocks.append({"type": "tool_use", "id": block.id, "name": block.name, "input": block.input})
+        elif getattr(block, "text", None):
+            blocks.append({"type": "text", "text": block.text})
+
+    message = f"Réponse invalide: {error}\nCorrige-la en respectant exactement le schéma demandé."
+    if tool_use_id:
+        content = [{"type": "tool_result", "tool_use_id": tool_use_id, "is_error": True, "content": message}]
+    else:
+        content = message
+    return dict(
+        params,
+        messages=list(params["messages"]) + [
+            {"role": "assistant", "content": blocks or [{"type": "text", "text": "(réponse vide)"}]},
+            {"role": "user", "content": content},
+        ],
+    )
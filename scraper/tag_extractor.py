@@ -1,34 +1,64 @@
-"""Extract structured tags from listing descriptions using Claude API."""
+"""Extract structured tags from listing descriptions using Claude API.
 
-import json
-import time
-from typing import Optional, Dict, List
+Fields the rules of scraper/tag_rules.py read confidently from the text are
+filled first; the LLM is only asked about the remaining fields.
+"""
+
+import re
+from typing import Optional, Dict, List, Tuple
 from scraper.models import Listing, ListingTags
-from scraper.config import ANTHROPIC_API_KEY
+from scraper.config import ANTHROPIC_API_KEY, TAG_RULE_MIN_CONFIDENCE
+from scraper.fingerprint import StalenessReport, make_fingerprint, stale_reason
+from scraper.llm_executor import get_llm_executor
+from scraper.prompt_compaction import COMPACTION_VERSION, compact, compact_description
+from scraper.structured_output import (
+    keyed_results_schema,
+    output_schema,
+    output_tool,
+    response_object,
+    validate,
+    with_output_tool,
+)
+from scraper.llm_packing import (
+    cached_system,
+    estimate_tokens,
+    map_packed,
+    packed_listing_block,
+    packed_max_tokens,
+    packing_enabled,
+    unescape_template,
+)
+from scraper.tag_rules import (
+    TAG_RULES_VERSION,
+    RuleMatch,
+    apply_rule_tags,
+    confident_matches,
+    extract_rule_tags,
+    record_llm_provenance,
+)
 
 try:
     import anthropic
 except ImportError:
     anthropic = None
 
+MODEL = "claude-haiku-4-5-20251001"
 
 TAG_EXTRACTION_SYSTEM = """Tu es un extracteur de metadonnees pour des annonces d'habitat collaboratif en Europe.
 Tu analyses les descriptions et extrais des informations structurees.
 Reponds TOUJOURS en JSON valide, sans aucun texte avant ou apres."""
 
 
-TAG_EXTRACTION_PROMPT = """Analyse cette annonce d'habitat groupé/communautaire et extrais les informations structurées.
-
-ANNONCE:
+TAG_LISTING_TEMPLATE = """ANNONCE:
 Titre: {title}
 Lieu: {location}
 Province: {province}
 Prix: {price}
 Type: {listing_type}
 Description:
-{description}
+{description}"""
 
-Réponds UNIQUEMENT en JSON valide avec cette structure exacte.
+TAG_RUBRIC = """Réponds UNIQUEMENT en JSON valide avec cette structure exacte.
 Pour chaque champ, utilise null si l'information n'est pas mentionnée.
 Pour les listes, utilise une liste vide [] si rien ne correspond.
 
@@ -65,76 +95,225 @@ RÈGLES:
 - "jardin" sans précision => "garden"
 - Repas communautaires mentionnés => shared_meals selon fréquence décrite"""
 
+TAG_EXTRACTION_PROMPT = (
+    "Analyse cette annonce d'habitat groupé/communautaire et extrais les informations structurées.\n\n"
+    + TAG_LISTING_TEMPLATE + "\n\n" + TAG_RUBRIC
+)
 
-def extract_tags(listing: Listing) -> Optional[ListingTags]:
-    """Extract structured tags from a single listing."""
-    if not anthropic or not ANTHROPIC_API_KEY:
-        print("  [tag_extractor] Anthropic API not available, skipping")
-        return None
+# Residual prompt: only the rubric lines of the fields the rules left empty
+TAG_RESIDUAL_PROMPT = (
+    "Analyse cette annonce d'habitat groupé/communautaire et extrais les informations structurées.\n"
+    "Les autres champs ont déjà été lus dans le texte: renseigne uniquement ceux demandés ci-dessous.\n\n"
+    + TAG_LISTING_TEMPLATE + "\n\n{rubric}"
+)
+_RUBRIC_FIELD = re.compile(r'^\s*"(\w+)":')
+
+
+def residual_rubric(fields) -> str:
+    """TAG_RUBRIC restricted to `fields` (braces already unescaped)."""
+    lines = []
+    for line in unescape_template(TAG_RUBRIC).split("\n"):
+        m = _RUBRIC_FIELD.match(line)
+        if m and m.group(1) not in fields:
+            continue
+        if line.strip() == "}" and lines:
+            lines[-1] = lines[-1].rstrip(",")
+        lines.append(line)
+    return "\n".join(lines)
+
+
+# Packing mode (--pack): the rules move to a cached system prompt, listings follow in the user turn
+PACKED_TAG_SYSTEM = TAG_EXTRACTION_SYSTEM + """
+
+Tu reçois plusieurs annonces, chacune précédée de son identifiant ("=== listing_id: ... ===").
+Extrais les informations de chaque annonce indépendamment selon les consignes ci-dessous.
+Réponds UNIQUEMENT avec un tableau JSON contenant un objet par annonce, chaque objet reprenant son "listing_id" exact en plus des champs décrits.
+
+""" + unescape_template(TAG_RUBRIC)
+
+
+# The answer is forced through a tool whose schema comes from the ListingTags model
+TAGS_SCHEMA = output_schema(ListingTags)
+TAG_FIELDS = tuple(TAGS_SCHEMA["properties"])
+TAGS_TOOL = output_tool("record_tags", "Enregistre les tags extraits de l'annonce.", TAGS_SCHEMA)
+PACKED_TAGS_TOOL = output_tool("record_tags", "Enregistre les tags extraits de chaque annonce.", keyed_results_schema(TAGS_SCHEMA))
 
-    client = anthropic.Anthropic(api_key=ANTHROPIC_API_KEY)
-    prompt = TAG_EXTRACTION_PROMPT.format(
+
+def _prompt_fields(listing: Listing) -> dict:
+    return dict(
         title=listing.title,
         location=listing.location or "Non spécifié",
         province=listing.province or "Non spécifié",
         price=listing.price or "Non spécifié",
         listing_type=listing.listing_type or "Non spécifié",
-        description=listing.description[:3000],
+        description=compact(listing.description),
     )
 
-    try:
-        response = client.messages.create(
-            model="claude-haiku-4-5-20251001",
-            max_tokens=1024,
-            system=TAG_EXTRACTION_SYSTEM,
-            messages=[{"role": "user", "content": prompt}],
-        )
-
-        text = response.content[0].text.strip()
-
-        # Handle potential markdown code blocks
-        if text.startswith("```"):
-            text = text.split("\n", 1)[1]
-            if text.endswith("```"):
-                text = text[:-3]
-            text = text.strip()
-
-        result = json.loads(text)
-        return ListingTags(listing_id=listing.id, **result)
-
-    except json.JSONDecodeError as e:
-        print(f"  [tag_extractor] JSON parse error for {listing.id}: {e}")
+
+def _request_fields(listing: Listing) -> dict:
+    """_prompt_fields(), recording the description's compaction for the stage report."""
+    fields = _prompt_fields(listing)
+    fields["description"] = compact_description("tag_extractor", listing.description)
+    return fields
+
+
+# Everything stored tags depend on besides the listing: both prompts, the rules and their threshold
+TAGS_TEMPLATE = "".join((
+    TAG_EXTRACTION_SYSTEM, TAG_EXTRACTION_PROMPT, TAG_RESIDUAL_PROMPT,
+    TAG_RULES_VERSION, str(TAG_RULE_MIN_CONFIDENCE), COMPACTION_VERSION,
+))
+
+
+def tags_fingerprint(listing: Listing) -> str:
+    return make_fingerprint(_prompt_fields(listing), TAGS_TEMPLATE, MODEL)
+
+
+def residual_fields(matches: Dict[str, RuleMatch]) -> List[str]:
+    """Fields left for the LLM once the confident rule matches are in."""
+    filled = confident_matches(matches)
+    return [field for field in TAG_FIELDS if field not in filled]
+
+
+def _build_request(listing: Listing, matches: Dict[str, RuleMatch]) -> dict:
+    fields = residual_fields(matches)
+    if len(fields) == len(TAG_FIELDS):
+        prompt, tool = TAG_EXTRACTION_PROMPT.format(**_request_fields(listing)), TAGS_TOOL
+    else:
+        prompt = TAG_RESIDUAL_PROMPT.format(rubric=residual_rubric(fields), **_request_fields(listing))
+        tool = output_tool("record_tags", TAGS_TOOL["description"], output_schema(ListingTags, include=fields))
+    return with_output_tool(dict(
+        model=MODEL,
+        max_tokens=1024,
+        system=TAG_EXTRACTION_SYSTEM,
+        messages=[{"role": "user", "content": prompt}],
+    ), tool)
+
+
+def _parse_tags(listing: Listing, response, matches: Dict[str, RuleMatch]) -> ListingTags:
+    fields = residual_fields(matches)
+    answer = {k: v for k, v in response_object(response).items() if k in fields}
+    return _with_rules(_tags_from_result(listing, answer), fields, matches)
+
+
+def _tags_from_result(listing: Listing, result: dict) -> ListingTags:
+    return validate(ListingTags, result, listing_id=listing.id, input_fingerprint=tags_fingerprint(listing))
+
+
+def _with_rules(tags: ListingTags, llm_fields, matches: Dict[str, RuleMatch]) -> ListingTags:
+    return apply_rule_tags(record_llm_provenance(tags, llm_fields), matches)
+
+
+def _build_packed_request(group: List[Listing]) -> dict:
+    listings = "\n\n".join(
+        packed_listing_block(listing.id, TAG_LISTING_TEMPLATE.format(**_request_fields(listing)))
+        for listing in group
+    )
+    return with_output_tool(dict(
+        model=MODEL,
+        max_tokens=packed_max_tokens(group, 600),
+        system=cached_system(PACKED_TAG_SYSTEM, MODEL),
+        messages=[{"role": "user", "content": listings}],
+    ), PACKED_TAGS_TOOL)
+
+
+def _packed_cost(listing: Listing) -> int:
+    return estimate_tokens(TAG_LISTING_TEMPLATE.format(**_request_fields(listing)))
+
+
+def extract_tags(listing: Listing) -> Optional[ListingTags]:
+    """Extract structured tags from a single listing."""
+    if not anthropic or not ANTHROPIC_API_KEY:
+        print("  [tag_extractor] Anthropic API not available, skipping")
         return None
+
+    matches = extract_rule_tags(listing)
+    try:
+        response = get_llm_executor().create("tag_extractor", _build_request(listing, matches))
+        return _parse_tags(listing, response, matches)
     except Exception as e:
         print(f"  [tag_extractor] Error for {listing.id}: {e}")
         return None
 
 
+def _print_rule_stats(matches: Dict[str, Dict[str, RuleMatch]]):
+    if not matches:
+        return
+    filled = sum(len(confident_matches(m)) for m in matches.values())
+    asked = sum(len(residual_fields(m)) for m in matches.values())
+    print(
+        f"  [tag_extractor] Rules filled {filled} fields; the LLM is asked for "
+        f"{asked / len(matches):.1f}/{len(TAG_FIELDS)} fields per listing"
+    )
+
+
+def plan_tags(
+    listings: List[Listing],
+    existing_tags: Dict[str, ListingTags],
+    fused_template: Optional[str] = None,
+) -> Tuple[List[Listing], StalenessReport]:
+    """Select listings whose tags are missing or were extracted from different inputs
+    (`fused_template`: see plan_evaluations)."""
+    report = StalenessReport("tag_extractor")
+    to_extract = []
+    for listing in listings:
+        current = tags_fingerprint(listing)
+        tags = existing_tags.get(listing.id)
+        if tags and not tags.input_fingerprint:
+            # Extracted before fingerprints existed: stamp instead of re-running
+            tags.input_fingerprint = current
+            report.adopted += 1
+        reason = stale_reason(tags.input_fingerprint if tags else None, current, fused_template)
+        report.add(listing.id, reason)
+        if reason:
+            to_extract.append(listing)
+    return to_extract, report
+
+
 def extract_all_tags(
     listings: List[Listing],
     existing_tags: Dict[str, ListingTags],
 ) -> List[ListingTags]:
-    """Extract tags for listings that don't have them yet."""
+    """Extract tags for listings that don't have them yet or whose inputs changed."""
     new_tags = []
-    to_extract = [l for l in listings if l.id not in existing_tags]
+    to_extract, report = plan_tags(listings, existing_tags)
+    report.print()
 
     if not to_extract:
         print("  [tag_extractor] No new listings to extract tags for")
         return new_tags
 
+    if not anthropic or not ANTHROPIC_API_KEY:
+        print("  [tag_extractor] Anthropic API not available, skipping")
+        return new_tags
+
     print(f"  [tag_extractor] Extracting tags for {len(to_extract)} listings...")
+    matches = {listing.id: extract_rule_tags(listing) for listing in to_extract}
+    _print_rule_stats(matches)
+
+    def build(listing):
+        return _build_request(listing, matches[listing.id])
 
-    for i, listing in enumerate(to_extract):
-        print(f"  [tag_extractor] {i+1}/{len(to_extract)}: {listing.title[:60]}...")
-        tags = extract_tags(listing)
+    def parse(listing, response):
+        return _parse_tags(listing, response, matches[listing.id])
+
+    if packing_enabled():
+        # Packed requests share one rubric, so they still ask for every field; rule matches win
+        def parse_packed(listing, result):
+            return _with_rules(_tags_from_result(listing, result), TAG_FIELDS, matches[listing.id])
+
+        results = map_packed("tag_extractor", to_extract, _build_packed_request, parse_packed, _packed_cost)
+        # Listings the packed answers never covered go one per request
+        unpacked = [listing for listing, tags in zip(to_extract, results) if tags is None]
+        if unpacked:
+            retried = iter(get_llm_executor().map("tag_extractor", unpacked, build, parse))
+            results = [tags or next(retried) for tags in results]
+    else:
+        results = get_llm_executor().map("tag_extractor", to_extract, build, parse)
+    for listing, tags in zip(to_extract, results):
         if tags:
             new_tags.append(tags)
         else:
-            print(f"    Skipped (extraction failed)")
-
-        # Rate limiting
-        if i < len(to_extract) - 1:
-            time.sleep(1)
+            print(f"    Skipped {listing.id} (extraction failed)")
 
     print(f"  [tag_extractor] Completed: {len(new_tags)} tag extractions")
     return new_tags
@@ -0,0 +1,262 @@
+"""Rule-based tag extraction for cohousing listings (FR/NL/ES/EN).
+
+A few ListingTags fields are almost always stated in a handful of fixed
+phrasings: "12 ménages", "75 m²", "3 slaapkamers", "animaux bienvenus",
+"non meublé", "sociocratie"... Those are read here with regexes and small
+lexicons instead of asking the LLM. Every rule match carries a confidence
+and the text it was read from; tag_extractor keeps matches of at least
+TAG_RULE_MIN_CONFIDENCE, records them in ListingTags.provenance and only asks
+the LLM about the fields that are still empty.
+
+Rules stay conservative: a boolean with both a positive and a negative
+phrasing, or a number read with several different values, is left to the LLM.
+"""
+
+import re
+from collections import Counter
+from typing import Dict, List, NamedTuple, Optional
+
+from scraper.config import TAG_RULE_MIN_CONFIDENCE
+from scraper.models import Listing, ListingTags
+
+# Part of the tag fingerprints: bump whenever a pattern, lexicon or confidence below changes,
+# so tags read with the old rules are extracted again
+TAG_RULES_VERSION = "tag-rules-2"
+
+# Confidence lost when a number is read with several different values
+DISAGREEMENT_PENALTY = 0.3
+
+NUMBER_WORDS = {
+    # "onze" (11 in French, "our" in Dutch) and "once" (11 in Spanish) are left out on purpose
+    "un": 1, "une": 1, "deux": 2, "trois": 3, "quatre": 4, "cinq": 5, "six": 6, "sept": 7,
+    "huit": 8, "neuf": 9, "dix": 10, "douze": 12, "quinze": 15, "vingt": 20,
+    "een": 1, "één": 1, "twee": 2, "drie": 3, "vier": 4, "vijf": 5, "zes": 6, "zeven": 7,
+    "acht": 8, "negen": 9, "tien": 10, "elf": 11, "twaalf": 12, "vijftien": 15, "twintig": 20,
+    "uno": 1, "una": 1, "dos": 2, "tres": 3, "cuatro": 4, "cinco": 5, "seis": 6, "siete": 7,
+    "ocho": 8, "nueve": 9, "diez": 10, "doce": 12, "quince": 15, "veinte": 20,
+    "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "seven": 7, "eight": 8,
+    "nine": 9, "ten": 10, "eleven": 11, "twelve": 12, "fifteen": 15, "twenty": 20,
+}
+_NUMBER = r"(\d{1,3}|" + "|".join(sorted(NUMBER_WORDS, key=len, reverse=True)) + r")"
+
+
+class RuleMatch(NamedTuple):
+    value: object
+    confidence: float
+    evidence: str
+
+
+def _number(token: str) -> int:
+    return int(token) if token.isdigit() else NUMBER_WORDS[token]
+
+
+def _normalize(listing: Listing) -> str:
+    text = f"{listing.title}\n{listing.description or ''}".lower()
+    text = text.replace("’", "'").replace(" ", " ")
+    return re.sub(r"[ \t]+", " ", text)
+
+
+# === Nombres ===
+
+GROUP_SIZE = re.compile(
+    r"\b" + _NUMBER + r"\s+(?:(autres|andere|otr[oa]s|other)\s+)?"
+    r"(ménages|foyers|familles|logements|habitations|unités|habitants|adultes|personnes"
+    r"|huishoudens|gezinnen|woningen|wooneenheden|bewoners|volwassenen|personen"
+    r"|hogares|familias|viviendas|habitantes|adultos|personas"
+    r"|households|families|units|homes|residents|adults|people)\b"
+)
+# "pour 2 personnes", "2 logements disponibles", "5 autres ménages": capacity, vacancies or
+# the households still sought, not the group
+GROUP_SIZE_BEFORE = re.compile(r"\b(pour|jusqu'à|voor|tot|para|hasta|for|up to|sleeps)\s*$")
+GROUP_SIZE_AFTER = re.compile(r"^\s*(disponibles?|libres?|à (vendre|louer)|vrij|beschikbaar|te (koop|huur)|en (venta|alquiler)|available|for (sale|rent))")
+# Households and dwellings are how cohousing groups count themselves; people counts are noisier
+# (often a capacity or one household), they agreed with the LLM about half of the time
+GROUP_UNIT_CONFIDENCE = {
+    "ménages": 0.9, "foyers": 0.9, "familles": 0.85, "logements": 0.8, "habitations": 0.8, "unités": 0.75,
+    "huishoudens": 0.9, "gezinnen": 0.85, "woningen": 0.8, "wooneenheden": 0.8,
+    "hogares": 0.9, "familias": 0.85, "viviendas": 0.8,
+    "households": 0.9, "families": 0.85, "units": 0.75, "homes": 0.75,
+}
+GROUP_PEOPLE_CONFIDENCE = 0.6  # below TAG_RULE_MIN_CONFIDENCE: people counts go to the LLM
+
+SURFACE = re.compile(
+    r"(?<![\d.,])(\d{2,4})(?:[.,]\d+)?\s*(?:m²|m2\b|m\s²|mètres? carrés|vierkante meter|metros? cuadrados|sq\.?\s?m\b|square met(?:re|er)s)"
+)
+# Surfaces of the garden, the plot or the shared spaces are not the dwelling's
+SURFACE_EXCLUDED = re.compile(
+    r"jardin|terrain|parcelle|potager|terrasse|commun|partagé|salle|grange|"
+    r"tuin|grond|perceel|terras|gemeenschappelijk|gedeeld|zaal|schuur|"
+    r"jardín|terreno|parcela|huerto|terraza|comunitari|compartid|sala|"
+    r"garden|land|plot|terrace|common|shared|barn|hall"
+)
+SURFACE_CONFIDENCE = 0.85
+
+BEDROOMS = re.compile(
+    r"\b" + _NUMBER + r"\s+(chambres?|slaapkamers?|habitaci(?:ón|ones)|dormitorios?|bedrooms?)\b"
+)
+BEDROOMS_CONFIDENCE = 0.85
+
+
+def _numbers(text: str, pattern, accept, lo: int, hi: int) -> List[tuple]:
+    """(value, confidence, evidence) for each match of `pattern` that `accept` keeps, within [lo, hi]."""
+    found = []
+    for m in pattern.finditer(text):
+        confidence = accept(text, m)
+        if not confidence:
+            continue
+        value = _number(m.group(1))
+        if lo <= value <= hi:
+            found.append((value, confidence, m.group(0).strip()))
+    return found
+
+
+def _best_number(found: List[tuple]) -> Optional[RuleMatch]:
+    """The most frequent value; its confidence drops when other values were read too."""
+    if not found:
+        return None
+    counts = Counter(value for value, _, _ in found)
+    value = counts.most_common(1)[0][0]
+    confidence, evidence = max((c, e) for v, c, e in found if v == value)
+    if len(counts) > 1:
+        confidence -= DISAGREEMENT_PENALTY
+    return RuleMatch(value, round(confidence, 2), evidence)
+
+
+def _accept_group_size(text: str, m) -> float:
+    if m.group(2):
+        return 0
+    if GROUP_SIZE_BEFORE.search(text[max(0, m.start() - 12):m.start()]):
+        return 0
+    if GROUP_SIZE_AFTER.search(text[m.end():m.end() + 20]):
+        return 0
+    return GROUP_UNIT_CONFIDENCE.get(m.group(3), GROUP_PEOPLE_CONFIDENCE)
+
+
+def _accept_surface(text: str, m) -> float:
+    before = text[max(0, m.start() - 40):m.start()]
+    # Only look back within the sentence
+    before = re.split(r"[.;\n]", before)[-1]
+    return 0 if SURFACE_EXCLUDED.search(before) else SURFACE_CONFIDENCE
+
+
+def _accept_bedrooms(text: str, m) -> float:
+    return BEDROOMS_CONFIDENCE
+
+
+# === Booléens et lexiques ===
+
+class Phrasing(NamedTuple):
+    positive: re.Pattern
+    negative: Optional[re.Pattern]
+    confidence: float
+
+
+PHRASINGS = {
+    "pets_allowed": Phrasing(
+        re.compile(
+            r"animaux( de compagnie)? (sont )?(bienvenus|acceptés|admis|autorisés)|(chiens?|chats?) (sont )?(bienvenus|acceptés|admis)"
+            r"|huisdieren (zijn )?(welkom|toegelaten|toegestaan)|(honden|katten) (zijn )?welkom"
+            r"|(se admiten|admite|aceptan|acepta|se aceptan) (mascotas|animales)|mascotas (bienvenidas|permitidas|admitidas)"
+            r"|pets? (are )?(welcome|allowed)|pet[- ]friendly"
+        ),
+        re.compile(
+            r"(pas d'|sans |aucun |interdit aux )animaux|animaux (non|pas|ne sont pas) (admis|acceptés|autorisés)|animaux interdits"
+            r"|geen huisdieren|huisdieren (zijn )?(niet toegelaten|niet toegestaan|verboden)"
+            r"|no se (admiten|aceptan) (mascotas|animales)|sin mascotas|(mascotas|animales) no (permitid|admitid)\w*"
+            r"|no pets|pets (are )?not allowed"
+        ),
+        0.9,
+    ),
+    "furnished": Phrasing(
+        re.compile(r"\bmeublée?s?\b|\bgemeubeld\b|\bamueblad[oa]s?\b|\bfurnished\b"),
+        re.compile(r"\b(non|pas)[- ]meublée?s?\b|\bongemeubeld\b|\bniet gemeubeld\b|\bsin amueblar\b|\bno amueblad[oa]s?\b|\bunfurnished\b"),
+        0.85,
+    ),
+    "has_children": Phrasing(
+        re.compile(
+            r"\b(\d{1,2}|deux|trois|quatre|cinq|six|nos|leurs) (jeunes |petits )?enfants\b"
+            r"|\b(\d{1,2}|twee|drie|vier|vijf|zes|onze|hun) (jonge |kleine )?kinderen\b"
+            r"|\b(\d{1,2}|dos|tres|cuatro|cinco|seis|nuestros|sus) (niños|niñas|hijos|hijas)\b"
+            r"|\b(\d{1,2}|two|three|four|five|six|our|their) (young |small )?(children|kids)\b"
+        ),
+        re.compile(r"pas d'enfants|sans enfants|geen kinderen|zonder kinderen|sin niños|sin hijos|no children|without children"),
+        0.75,
+    ),
+    "accessible_pmr": Phrasing(
+        re.compile(
+            r"\bpmr\b|mobilité réduite|accessible en fauteuil|rolstoeltoegankelijk|toegankelijk voor rolstoel"
+            r"|movilidad reducida|accesible (en|para|con) silla de ruedas|wheelchair[- ]accessible"
+        ),
+        re.compile(
+            r"(non|pas) accessibles? (aux |en )?(pmr|personnes à mobilité|fauteuil)|niet (rolstoel)?toegankelijk"
+            r"|no (es )?accesible|not wheelchair[- ]accessible"
+        ),
+        0.8,
+    ),
+    "has_charter": Phrasing(
+        re.compile(r"\bcharte\b|\bhandvest\b|\bcarta (de convivencia|ética|de valores)\b|\bcharter\b"),
+        None,
+        0.8,
+    ),
+}
+
+# Lexicon for governance: several distinct values found means the LLM decides
+GOVERNANCE = {
+    "sociocracy": (re.compile(r"sociocra(tie|tique|tisch|cia|cy)|sociocrát|holacra"), 0.9),
+    "consensus": (re.compile(r"\bconsens(us|o)\b|décisions? par consentement|prise de décision partagée"), 0.75),
+}
+
+
+def _phrasing(text: str, phrasing: Phrasing) -> Optional[RuleMatch]:
+    negative = phrasing.negative.search(text) if phrasing.negative else None
+    # "non meublé" also contains "meublé": look for positives outside the negative phrasings
+    rest = phrasing.negative.sub(" ", text) if phrasing.negative else text
+    positive = phrasing.positive.search(rest)
+    if positive and negative:
+        return None
+    if positive:
+        return RuleMatch(True, phrasing.confidence, positive.group(0))
+    if negative:
+        return RuleMatch(False, phrasing.confidence, negative.group(0))
+    return None
+
+
+def _governance(text: str) -> Optional[RuleMatch]:
+    found = [(value, conf, m.group(0)) for value, (pattern, conf) in GOVERNANCE.items() for m in [pattern.search(text)] if m]
+    if len(found) != 1:
+        return None
+    return RuleMatch(*found[0])
+
+
+def extract_rule_tags(listing: Listing) -> Dict[str, RuleMatch]:
+    """Every rule match for `listing`, whatever its confidence, by field."""
+    text = _normalize(listing)
+    matches = {
+        "group_size": _best_number(_numbers(text, GROUP_SIZE, _accept_group_size, 2, 200)),
+        "surface_m2": _best_number(_numbers(text, SURFACE, _accept_surface, 10, 1000)),
+        "num_bedrooms": _best_number(_numbers(text, BEDROOMS, _accept_bedrooms, 1, 20)),
+        "governance": _governance(text),
+    }
+    for field, phrasing in PHRASINGS.items():
+        matches[field] = _phrasing(text, phrasing)
+    return {field: match for field, match in matches.items() if match is not None}
+
+
+def confident_matches(matches: Dict[str, RuleMatch]) -> Dict[str, RuleMatch]:
+    return {field: match for field, match in matches.items() if match.confidence >= TAG_RULE_MIN_CONFIDENCE}
+
+
+def apply_rule_tags(tags: ListingTags, matches: Dict[str, RuleMatch]) -> ListingTags:
+    """Set the confident rule matches on `tags` (they win over the LLM) and record their provenance."""
+    for field, match in confident_matches(matches).items():
+        setattr(tags, field, match.value)
+        tags.provenance[field] = {"source": "rule", "confidence": match.confidence, "evidence": match.evidence}
+    return tags
+
+
+def record_llm_provenance(tags: ListingTags, fields) -> ListingTags:
+    """Mark the non-empty `fields` of `tags` as answered by the LLM."""
+    for field in fields:
+        if getattr(tags, field) not in (None, []) and field not in tags.provenance:
+            tags.provenance[field] = {"source": "llm"}
+    return tags
@@ -0,0 +1,76 @@
+"""Translation memory: source text -> French translation, independent of runs.
+
+Entries are keyed by (hash of the source title and description, source
+language, target language), so a listing whose text has not changed is
+never sent to the translator again, whatever happened to the listing
+record in between (re-scraped, cleaned, restored from a backup...).
+Unlike the LLM response cache, entries do not expire and do not depend on
+the prompt: a reviewed translation stays valid until its source changes.
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import NamedTuple, Optional
+
+from scraper.config import TRANSLATION_MEMORY_FILE
+
+
+class Translation(NamedTuple):
+    title: str
+    description: str
+
+
+def translation_key(title: str, description: str, source_lang: str, target_lang: str = "fr") -> str:
+    digest = hashlib.sha256(f"{title}\x00{description}".encode("utf-8")).hexdigest()
+    return f"{digest}:{source_lang}:{target_lang}"
+
+
+class TranslationMemory:
+    """Thread-safe SQLite store of translations keyed by translation_key()."""
+
+    def __init__(self, path: str = TRANSLATION_MEMORY_FILE):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS translations (
+                key TEXT PRIMARY KEY,
+                source_lang TEXT NOT NULL,
+                target_lang TEXT NOT NULL,
+                title TEXT NOT NULL,
+                description TEXT NOT NULL,
+                created_at REAL NOT NULL
+            )"""
+        )
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[Translation]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT title, description FROM translations WHERE key = ?", (key,)
+            ).fetchone()
+        return Translation(*row) if row else None
+
+    def put(self, key: str, title: str, description: str):
+        _, source_lang, target_lang = key.rsplit(":", 2)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO translations VALUES (?, ?, ?, ?, ?, ?)",
+                (key, source_lang, target_lang, title, description, time.time()),
+            )
+            self._conn.commit()
+
+
+_memory: Optional[TranslationMemory] = None
+_memory_lock = threading.Lock()
+
+
+def get_translation_memory() -> TranslationMemory:
+    global _memory
+    with _memory_lock:
+        if _memory is None:
+            _memory = TranslationMemory()
+        return _memory
@@ -1,15 +1,20 @@
 """Translate non-French listing content to French using Claude API."""
 
-import asyncio
-from typing import List, Dict
+import re
+from collections import Counter
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
 from scraper.models import Listing
-from scraper.config import ANTHROPIC_API_KEY
+from scraper.config import ANTHROPIC_API_KEY, TRANSLATION_CHUNK_CHARS
+from scraper.llm_executor import get_llm_executor
+from scraper.structured_output import response_object
+from scraper.translation_memory import get_translation_memory, translation_key
 
 try:
     import anthropic
 except ImportError:
     anthropic = None
 
+MODEL = "claude-haiku-4-5-20251001"
 
 TRANSLATION_SYSTEM = """Tu es un traducteur professionnel. Tu traduis des annonces d'habitat participatif/cohousing en français.
 
@@ -31,87 +36,254 @@ DESCRIPTION ORIGINALE:
 
 Retourne un JSON: {{"title": "titre traduit", "description": "description traduite"}}"""
 
+# Long descriptions are split at paragraph boundaries and translated part by part, concurrently
+TRANSLATION_CHUNK_PROMPT = """Traduis ce passage d'une annonce de {source_lang} vers le français.
+C'est la partie {part}/{parts} de la description; les autres parties sont traduites séparément et mises bout à bout, donc ne résume pas et n'ajoute ni introduction ni conclusion.
 
-async def _translate_one_async(client, listing: Listing) -> tuple:
-    """Translate one listing asynchronously. Returns (listing_id, translated_title, translated_desc) or (listing_id, None, None)."""
-    if not listing.description or len(listing.description.strip()) < 20:
-        return (listing.id, None, None)
+TITRE ORIGINAL:
+{title}
+{glossary}
+PASSAGE ORIGINAL:
+{description}
+
+Retourne un JSON: {output}"""
+
+# Recurring vocabulary, translated the same way in every part of a listing
+TERMINOLOGY = {
+    "nl": {
+        "woongroep": "habitat groupé",
+        "samenhuizen": "habitat partagé",
+        "cohousing": "habitat groupé",
+        "ecodorp": "écovillage",
+        "gemeenschappelijke ruimte": "espace commun",
+        "gemeenschapshuis": "maison commune",
+        "kangoeroewonen": "habitat kangourou",
+        "intergenerationeel": "intergénérationnel",
+        "coöperatie": "coopérative",
+        "moestuin": "potager",
+    },
+    "es": {
+        "vivienda colaborativa": "habitat participatif",
+        "cohousing": "habitat participatif",
+        "ecoaldea": "écovillage",
+        "cooperativa de viviendas": "coopérative d'habitants",
+        "cesión de uso": "droit d'usage",
+        "espacios comunes": "espaces communs",
+        "huerto": "potager",
+        "asamblea": "assemblée",
+    },
+    "en": {
+        "cohousing": "habitat groupé",
+        "co-housing": "habitat groupé",
+        "ecovillage": "écovillage",
+        "intentional community": "communauté intentionnelle",
+        "common house": "maison commune",
+        "sociocracy": "sociocratie",
+        "housing cooperative": "coopérative d'habitants",
+        "vegetable garden": "potager",
+    },
+    "pt": {
+        "ecoaldeia": "écovillage",
+        "cohousing": "habitat participatif",
+        "habitação colaborativa": "habitat participatif",
+        "cooperativa de habitação": "coopérative d'habitants",
+        "espaços comuns": "espaces communs",
+        "horta": "potager",
+    },
+}
+
+
+class Chunk(NamedTuple):
+    listing: Listing
+    index: int
+    count: int
+    title: str
+    text: str
+    glossary: str
+    separator: str  # what followed this part in the source description
+
+    @property
+    def id(self) -> str:
+        return f"{self.listing.id}#{self.index + 1}"
+
+
+# Where a description may be cut, from the most to the least natural: line breaks
+# (scrapers keep one per block, rarely blank lines), sentence ends, then words
+SPLIT_LEVELS = (r"(\n\s*)", r"(?<=[.!?])(\s+)", r"(\s+)")
+
+
+def _cut(text: str, max_chars: int, levels=SPLIT_LEVELS) -> List[Tuple[str, str]]:
+    """`text` as (piece, separator that follows it) pairs, each piece at most max_chars
+    where possible, cut at the first level that brings it under the limit."""
+    if len(text) <= max_chars or not levels:
+        return [(text, "")]
+    parts = re.split(levels[0], text)
+    pieces = []
+    for piece, separator in zip(parts[::2], parts[1::2] + [""]):
+        cut = _cut(piece, max_chars, levels[1:])
+        cut[-1] = (cut[-1][0], separator)
+        pieces.extend(cut)
+    return pieces
+
+
+def split_paragraphs(text: str, max_chars: int = TRANSLATION_CHUNK_CHARS) -> List[Tuple[str, str]]:
+    """Group lines into chunks of at most max_chars, as (chunk, separator) pairs.
+
+    A line is only cut between sentences (or words) when it is itself too
+    long. Joining each chunk with its separator gives back the text, line
+    breaks included.
+    """
+    chunks: List[Tuple[str, str]] = []
+    for piece, separator in _cut(text.strip(), max_chars):
+        if chunks and len(chunks[-1][0]) + len(chunks[-1][1]) + len(piece) <= max_chars:
+            chunks[-1] = (chunks[-1][0] + chunks[-1][1] + piece, separator)
+        else:
+            chunks.append((piece, separator))
+    return chunks
+
+
+def _glossary(language: str, text: str) -> str:
+    lowered = text.lower()
+    terms = [(src, dst) for src, dst in TERMINOLOGY.get(language, {}).items() if src in lowered]
+    if not terms:
+        return ""
+    lines = "\n".join(f"- {src} → {dst}" for src, dst in terms)
+    return f"\nTERMINOLOGIE (à utiliser telle quelle dans toutes les parties):\n{lines}\n"
+
+
+def make_chunks(listing: Listing, title: str, description: str) -> List[Chunk]:
+    if len(description) <= TRANSLATION_CHUNK_CHARS:
+        return [Chunk(listing, 0, 1, title, description, "", "")]
+    parts = split_paragraphs(description)
+    glossary = _glossary(listing.original_language, f"{title}\n{description}")
+    return [
+        Chunk(listing, i, len(parts), title, part, glossary, separator)
+        for i, (part, separator) in enumerate(parts)
+    ]
 
-    lang_names = {"es": "l'espagnol", "en": "l'anglais", "nl": "le neerlandais", "pt": "le portugais"}
-    source_lang = lang_names.get(listing.original_language, listing.original_language)
 
+def _build_chunk_request(chunk: Chunk) -> dict:
+    if chunk.count == 1:
+        # Short descriptions keep the single-request prompt (and its cached answers)
+        return _build_request(chunk.listing, chunk.title, chunk.text)
+    if chunk.index == 0:
+        output = '{"title": "titre traduit", "description": "passage traduit"}'
+    else:
+        output = '{"title": "", "description": "passage traduit"}'
+    prompt = TRANSLATION_CHUNK_PROMPT.format(
+        source_lang=LANG_NAMES.get(chunk.listing.original_language, chunk.listing.original_language),
+        part=chunk.index + 1,
+        parts=chunk.count,
+        title=chunk.title,
+        glossary=chunk.glossary,
+        description=chunk.text,
+        output=output,
+    )
+    return dict(
+        model=MODEL,
+        max_tokens=4096,
+        system=TRANSLATION_SYSTEM,
+        messages=[{"role": "user", "content": prompt}],
+    )
+
+
+def _parse_chunk(chunk: Chunk, response) -> Optional[dict]:
+    return _parse_translation(chunk.listing, chunk.text, response, quiet=chunk.count > 1)
+
+
+def _build_request(listing: Listing, title: str, description: str) -> dict:
+    source_lang = LANG_NAMES.get(listing.original_language, listing.original_language)
     prompt = TRANSLATION_PROMPT.format(
         source_lang=source_lang,
-        title=listing.title,
-        description=listing.description,
+        title=title,
+        description=description,
+    )
+    return dict(
+        model=MODEL,
+        max_tokens=4096,
+        system=TRANSLATION_SYSTEM,
+        messages=[{"role": "user", "content": prompt}],
     )
 
-    try:
-        response = await client.messages.create(
-            model="claude-haiku-4-5-20251001",
-            max_tokens=4096,
-            system=TRANSLATION_SYSTEM,
-            messages=[{"role": "user", "content": prompt}],
-        )
 
-        import json
-        text = response.content[0].text.strip()
-        # Extract JSON from response (handle markdown code blocks)
-        if text.startswith("```"):
-            text = text.split("\n", 1)[1].rsplit("```", 1)[0].strip()
-        result = json.loads(text)
+def _parse_translation(listing: Listing, source_description: str, response, quiet: bool = False) -> Optional[dict]:
+    """Returns {"title", "description"} or None when the answer is unusable."""
+    result = response_object(response)
 
-        translated_title = result.get("title", listing.title)
-        translated_desc = result.get("description", "")
+    translated_title = result.get("title", "")
+    translated_desc = result.get("description", "")
 
-        if len(translated_desc) < len(listing.description) * 0.2:
-            print(f"  [translator] WARNING: suspiciously short translation for {listing.id}, keeping original")
-            return (listing.id, None, None)
+    if len(translated_desc) < len(source_description) * 0.2:
+        print(f"  [translator] WARNING: suspiciously short translation for {listing.id}, keeping original")
+        return None
 
+    if not quiet:
         print(f"    {listing.id}: translated from {listing.original_language}")
-        return (listing.id, translated_title, translated_desc)
+    return {"title": translated_title, "description": translated_desc}
 
-    except Exception as e:
-        print(f"  [translator] Error for {listing.id}: {e}")
-        return (listing.id, None, None)
 
+LANG_FLAGS = {"es": "\ud83c\uddea\ud83c\uddf8", "en": "\ud83c\uddec\ud83c\udde7", "nl": "\ud83c\uddf3\ud83c\uddf1", "pt": "\ud83c\uddf5\ud83c\uddf9"}
+LANG_NAMES = {"es": "l'espagnol", "en": "l'anglais", "nl": "le neerlandais", "pt": "le portugais"}
 
-async def _translate_batch_async(listings: List[Listing], batch_size: int = 10) -> Dict[str, dict]:
-    """Translate listings in concurrent batches using async API."""
-    client = anthropic.AsyncAnthropic(api_key=ANTHROPIC_API_KEY)
-    results = {}
-    total = len(listings)
 
-    for batch_start in range(0, total, batch_size):
-        batch = listings[batch_start:batch_start + batch_size]
-        batch_end = min(batch_start + batch_size, total)
-        print(f"  [translator] Batch {batch_start+1}-{batch_end}/{total}...")
+def _is_translated(description: str) -> bool:
+    """True for descriptions that already carry the "Traduit de ..." prefix."""
+    return " Traduit de " in (description or "")[:40]
 
-        tasks = [_translate_one_async(client, listing) for listing in batch]
-        batch_results = await asyncio.gather(*tasks)
 
-        for listing_id, title, desc in batch_results:
-            if title and desc:
-                results[listing_id] = {"title": title, "description": desc}
+def source_text(listing: Listing) -> Optional[Tuple[str, str]]:
+    """(title, description) to translate.
 
-    return results
+    The kept original once a listing has been translated, its current text
+    otherwise. None for listings translated before originals were kept: their
+    source text is gone, and translating the French text again is pointless.
+    """
+    if listing.original_description is not None:
+        return listing.original_title or listing.title, listing.original_description
+    if _is_translated(listing.description):
+        return None
+    return listing.title, listing.description
 
 
-LANG_FLAGS = {"es": "\ud83c\uddea\ud83c\uddf8", "en": "\ud83c\uddec\ud83c\udde7", "nl": "\ud83c\uddf3\ud83c\uddf1", "pt": "\ud83c\uddf5\ud83c\uddf9"}
-LANG_NAMES = {"es": "l'espagnol", "en": "l'anglais", "nl": "le neerlandais", "pt": "le portugais"}
+def apply_translation(listing: Listing, content: dict):
+    """Replace title/description by their translation, keeping the source text."""
+    listing.original_title = content["original_title"]
+    listing.original_description = content["original_description"]
+    listing.translation_key = content["translation_key"]
+    listing.title = content["title"]
+    listing.description = content["description"]
 
 
-def translate_listings(listings: List[Listing]) -> Dict[str, dict]:
+def _content(listing: Listing, source: Tuple[str, str], key: str, title: str, description: str) -> dict:
+    # Prefix descriptions with language indicator
+    flag = LANG_FLAGS.get(listing.original_language, "🌐")
+    lang = LANG_NAMES.get(listing.original_language, listing.original_language)
+    return {
+        "title": title,
+        "description": f"{flag} Traduit de {lang}\n\n{description}",
+        "original_title": source[0],
+        "original_description": source[1],
+        "translation_key": key,
+    }
+
+
+def translate_listings(
+    listings: List[Listing],
+    strip_template: Optional[Callable[[str, Optional[str]], Optional[str]]] = None,
+) -> Dict[str, dict]:
     """Translate non-French listings to French.
 
+    Only listings whose source text changed since their last translation
+    reach the API; known source texts are answered by the translation memory.
+    `strip_template(source, description)` removes the source site's template
+    lines before translation (main.py passes BoilerplateModel.strip); the
+    kept original description is the text as scraped.
+
     Returns:
-        Dict mapping listing_id -> {"title": str, "description": str}
+        Dict mapping listing_id -> {"title", "description", "original_title",
+        "original_description", "translation_key"}; apply with apply_translation().
         The description is prefixed with a flag + "Traduit de ..." indicator.
     """
-    if not anthropic or not ANTHROPIC_API_KEY:
-        print("  [translator] Anthropic API not available, skipping")
-        return {}
-
     to_translate = [
         l for l in listings
         if l.original_language and l.original_language != "fr"
@@ -121,17 +293,73 @@ def translate_listings(listings: List[Listing]) -> Dict[str, dict]:
         print("  [translator] No listings need translation")
         return {}
 
-    print(f"  [translator] Translating {len(to_translate)} listings (async batches of 10)...")
-
-    results = asyncio.run(_translate_batch_async(to_translate, batch_size=10))
-
-    # Prefix descriptions with language indicator
-    for listing_id, content in results.items():
-        listing = next((l for l in to_translate if l.id == listing_id), None)
-        if listing and listing.original_language:
-            flag = LANG_FLAGS.get(listing.original_language, "🌐")
-            lang = LANG_NAMES.get(listing.original_language, listing.original_language)
-            content["description"] = f"{flag} Traduit de {lang}\n\n{content['description']}"
+    memory = get_translation_memory()
+    results = {}
+    sources: Dict[str, Tuple[str, str, str, str]] = {}  # title, description, text to translate, key
+    counts = Counter()
+    for listing in to_translate:
+        source = source_text(listing)
+        if source is None:
+            counts["legacy"] += 1
+            continue
+        title, description = source
+        text = strip_template(listing.source, description) if strip_template else description
+        # Nothing worth translating in near-empty descriptions
+        if not text or len(text.strip()) < 20:
+            counts["empty"] += 1
+            continue
+        key = translation_key(title, text, listing.original_language)
+        if key == listing.translation_key:
+            counts["current"] += 1
+            continue
+        known = memory.get(key)
+        if known:
+            results[listing.id] = _content(listing, source, key, known.title, known.description)
+            counts["memory"] += 1
+            continue
+        sources[listing.id] = (title, description, text, key)
+
+    print(f"  [translator] {len(to_translate)} non-French listings: {counts['current']} up to date, "
+          f"{counts['memory']} from translation memory, {counts['legacy']} translated before originals "
+          f"were kept, {len(sources)} to translate")
+
+    pending = [l for l in to_translate if l.id in sources]
+    if pending and (not anthropic or not ANTHROPIC_API_KEY):
+        print("  [translator] Anthropic API not available, skipping")
+        pending = []
+
+    chunks = [chunk for l in pending for chunk in make_chunks(l, sources[l.id][0], sources[l.id][2])]
+    if len(chunks) > len(pending):
+        print(f"  [translator] {len(pending)} listings split into {len(chunks)} parts")
+    parts: Dict[str, List[Optional[Tuple[Chunk, dict]]]] = {}
+    received = Counter()
+
+    def collect(chunk: Chunk, content: Optional[dict]):
+        listing = chunk.listing
+        parts.setdefault(listing.id, [None] * chunk.count)[chunk.index] = (chunk, content) if content else None
+        received[listing.id] += 1
+        if received[listing.id] < chunk.count:
+            return
+        translated = parts.pop(listing.id)
+        if any(not part or not part[1]["description"] for part in translated):
+            if chunk.count > 1:
+                print(f"  [translator] {listing.id}: a part failed, keeping original")
+            return
+        title, description, _, key = sources[listing.id]
+        text = "".join(part["description"].strip() + part_chunk.separator for part_chunk, part in translated)
+        if chunk.count > 1:
+            print(f"    {listing.id}: translated from {listing.original_language} ({chunk.count} parts)")
+        translated_title = (translated[0][1].get("title") or "").strip()
+        if translated_title:
+            memory.put(key, translated_title, text)
+        else:
+            # Not stored in the translation memory, so the title is asked again next run
+            print(f"  [translator] {listing.id}: no translated title, keeping the original title")
+            translated_title = title
+        results[listing.id] = _content(listing, (title, description), key, translated_title, text)
+
+    if chunks:
+        get_llm_executor().map("translator", chunks, _build_chunk_request, _parse_chunk, on_result=collect)
 
     print(f"  [translator] Completed: {len(results)} listings translated")
     return results
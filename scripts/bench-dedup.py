@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""Benchmark de la déduplication des lieux de retraite sur des venues synthétiques.
+
+Usage:
+    python scripts/bench-dedup.py [--sizes 1000 10000 100000] [--brute-max 2000] [--name-pairs 100000]
+
+Vérifie d'abord la grille sur des paires à la limite des 500 m (499,9 m le
+long d'un méridien ou d'un parallèle, à plusieurs latitudes), puis génère des
+venues réparties autour de villes de la péninsule ibérique, dont
+environ 2 % de doublons (même lieu à moins de 100 m, nom légèrement modifié),
+puis mesure pour chaque taille :
+  - la recherche des paires à moins de 500 m via la grille (nearby_pairs)
+  - deduplicate() complet
+  - jusqu'à --brute-max venues, l'ancienne comparaison de toutes les paires,
+    en vérifiant que la grille trouve exactement les mêmes paires.
+
+Puis compare, sur --name-pairs paires de noms différents puis de noms
+proches, l'ancienne vérification
+(normalize_name + levenshtein_distance complet à chaque paire) et NameMatcher,
+en vérifiant que les deux prennent les mêmes décisions.
+"""
+
+import argparse
+import contextlib
+import io
+import math
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scraper.deduplicator import (
+    EARTH_RADIUS_M, deduplicate, haversine_distance, levenshtein_distance, nearby_pairs, normalize_name,
+)
+from scraper.name_matching import NameMatcher
+from scraper.retreat_scrapers.retreat_models import RetreatVenueListing
+
+SYLLABLES = ["sol", "mar", "luz", "casa", "monte", "rio", "vida", "paz", "alma", "terra", "olivo", "agua", "flor", "cielo"]
+
+
+def synthetic_venues(n: int, seed: int = 42) -> list[RetreatVenueListing]:
+    rng = random.Random(seed)
+    towns = [(rng.uniform(36.5, 43.5), rng.uniform(-9.0, 3.0)) for _ in range(max(10, n // 200))]
+    venues = []
+    for i in range(n):
+        if venues and rng.random() < 0.02:
+            # Doublon d'une venue existante : autre source, quelques mètres plus loin
+            original = rng.choice(venues)
+            lat = original.latitude + rng.uniform(-0.0008, 0.0008)
+            lon = original.longitude + rng.uniform(-0.0008, 0.0008)
+            name = original.name + rng.choice(["", "s", " retreat"])
+        else:
+            town_lat, town_lon = rng.choice(towns)
+            # ~70 % des venues autour d'une ville, le reste dispersé dans la campagne
+            spread = 0.05 if rng.random() < 0.7 else 0.5
+            lat = town_lat + rng.gauss(0, spread)
+            lon = town_lon + rng.gauss(0, spread)
+            name = " ".join("".join(rng.sample(SYLLABLES, 2)) for _ in range(2))
+        venues.append(RetreatVenueListing(
+            id=f"v{i}", source="synthetic", source_url=f"https://example.org/{i}",
+            name=name, description="", latitude=lat, longitude=lon,
+        ))
+    return venues
+
+
+def brute_force_pairs(points, max_meters):
+    pairs = set()
+    for a in range(len(points)):
+        i, lat1, lon1 = points[a]
+        for j, lat2, lon2 in points[a + 1:]:
+            if haversine_distance(lat1, lon1, lat2, lon2) < max_meters:
+                pairs.add((min(i, j), max(i, j)))
+    return pairs
+
+
+def boundary_points(seed: int = 3) -> list:
+    """Paires à 499,9 m, le long d'un méridien puis d'un parallèle, à des positions quelconques dans la grille."""
+    rng = random.Random(seed)
+    angle = 499.9 / EARTH_RADIUS_M
+    points = []
+    for lat in (0.0, 20.0, 40.0, 60.0, 80.0):
+        for _ in range(50):
+            lat1 = lat + rng.uniform(0, 0.01)
+            lon1 = rng.uniform(-5, 5)
+            d_lon = math.degrees(2 * math.asin(math.sin(angle / 2) / math.cos(math.radians(lat1))))
+            points.append((len(points), lat1, lon1))
+            points.append((len(points), lat1 + math.degrees(angle), lon1))
+            points.append((len(points), lat1, lon1 + d_lon))
+    return points
+
+
+def check_boundaries():
+    points = boundary_points()
+    expected = brute_force_pairs(points, 500)
+    found = {(min(i, j), max(i, j)) for i, j, _ in nearby_pairs(points, 500)}
+    if expected != found:
+        print(f"ERREUR: {len(expected - found)} paires à la limite des 500 m manquées par la grille")
+        sys.exit(1)
+    print(f"Limite des 500 m : les {len(found)} paires de la comparaison exhaustive sont trouvées\n")
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--brute-max", type=int, default=2000,
+                        help="Taille maximale pour la comparaison de toutes les paires (O(n²))")
+    parser.add_argument("--name-pairs", type=int, default=100000)
+    args = parser.parse_args()
+
+    check_boundaries()
+    print(f"{'venues':>8} {'paires <500m':>13} {'grille':>9} {'deduplicate':>12} {'toutes paires':>14}")
+    for n in args.sizes:
+        venues = synthetic_venues(n)
+        points = [(i, v.latitude, v.longitude) for i, v in enumerate(venues)]
+
+        pairs, grid_time = timed(lambda: {(min(i, j), max(i, j)) for i, j, _ in nearby_pairs(points, 500)})
+        with contextlib.redirect_stdout(io.StringIO()):
+            result, dedup_time = timed(lambda: deduplicate(venues))
+
+        brute = "-"
+        if n <= args.brute_max:
+            expected, brute_time = timed(lambda: brute_force_pairs(points, 500))
+            if expected != pairs:
+                print(f"ERREUR: {len(expected ^ pairs)} paires diffèrent de la comparaison exhaustive")
+                sys.exit(1)
+            brute = f"{brute_time:.2f}s"
+        else:
+            # Estimation : le temps exhaustif croît comme n²
+            brute = f"~{_brute_estimate(n):.0f}s (est.)"
+
+        print(f"{n:>8} {len(pairs):>13} {grid_time:>8.2f}s {dedup_time:>11.2f}s {brute:>14}"
+              f"   ({n - len(result)} fusionnées)")
+
+    if args.name_pairs:
+        bench_names(args.name_pairs)
+
+
+def bench_names(count: int):
+    """Ancienne vérification des noms contre NameMatcher, sur des paires distinctes puis quasi-identiques."""
+    rng = random.Random(7)
+    names = [v.name for v in synthetic_venues(2000)]
+    variants = [(name, _mutate(rng, name)) for name in names]
+    samples = {
+        "noms différents": [(rng.choice(names), rng.choice(names)) for _ in range(count)],
+        # Quelques lettres modifiées : les paires qui vont jusqu'à la distance d'édition.
+        # Comme dans deduplicate(), chaque nom revient dans plusieurs paires.
+        "noms proches": [rng.choice(variants) for _ in range(count)],
+    }
+
+    for label, pairs in samples.items():
+        old, old_time = timed(lambda: [levenshtein_distance(normalize_name(a), normalize_name(b)) < 3 for a, b in pairs])
+        # Mêmes règles que l'ancien code (accents compris) pour comparer les décisions
+        matcher = NameMatcher(max_distance=2, normalize=normalize_name, accent_insensitive=False)
+        new, new_time = timed(lambda: [matcher.matches(a, b) for a, b in pairs])
+        if old != new:
+            print(f"ERREUR: {sum(o != n for o, n in zip(old, new))} décisions diffèrent")
+            sys.exit(1)
+
+        print(f"\n{count} paires, {label} ({sum(new)} correspondances)")
+        print(f"  normalize_name + levenshtein_distance : {old_time:.2f}s")
+        print(f"  NameMatcher                          : {new_time:.2f}s  (x{old_time / new_time:.0f})")
+        decided = ", ".join(f"{key} {value}" for key, value in matcher.stats.most_common())
+        print(f"  décidées par : {decided}")
+
+
+def _mutate(rng: random.Random, name: str) -> str:
+    chars = list(name)
+    for _ in range(rng.randint(1, 3)):
+        pos = rng.randrange(len(chars))
+        chars[pos] = rng.choice("aeiouéèsnrt")
+    return "".join(chars)
+
+
+_brute_rate = None
+
+
+def _brute_estimate(n: int) -> float:
+    """Temps estimé de la comparaison exhaustive, extrapolé depuis 1000 venues."""
+    global _brute_rate
+    if _brute_rate is None:
+        points = [(i, v.latitude, v.longitude) for i, v in enumerate(synthetic_venues(1000))]
+        _, seconds = timed(lambda: brute_force_pairs(points, 500))
+        _brute_rate = seconds / (1000 * 999 / 2)
+    return _brute_rate * n * (n - 1) / 2
+
+
+if __name__ == "__main__":
+    main()
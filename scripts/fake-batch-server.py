@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""Local stand-in for the Anthropic Messages and Message Batches endpoints.
+
+Usage:
+    python scripts/fake-batch-server.py [--port 8765] [--delay 5] [--reply-file reply.txt]
+    ANTHROPIC_BASE_URL=http://127.0.0.1:8765 ANTHROPIC_API_KEY=test \\
+        LLM_BATCH_POLL_SECONDS=2 python -m scraper.main --from evaluate --to tags --batch
+
+Every request is answered with the same canned text (by default a JSON
+object that the evaluator, tag extractor and content generator all accept).
+Batches report "in_progress" for --delay seconds, then "ended". Nothing is
+persisted: restarting the server forgets its batches, which is also a handy
+way to check how the pipeline copes with a batch that has disappeared.
+"""
+
+import argparse
+import json
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_REPLY = json.dumps({
+    "quality_score": 50,
+    "quality_summary": "Stand-in answer.",
+    "highlights": [],
+    "concerns": [],
+    "availability_status": "unknown",
+    "data_quality_score": 5,
+    "ai_title": "Stand-in title",
+    "ai_description": "Stand-in description.",
+})
+
+batches = {}
+lock = threading.Lock()
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _message(params: dict, reply: str) -> dict:
+    return {
+        "id": f"msg_{uuid.uuid4().hex[:24]}",
+        "type": "message",
+        "role": "assistant",
+        "model": params.get("model", "stand-in"),
+        "content": [{"type": "text", "text": reply}],
+        "stop_reason": "end_turn",
+        "stop_sequence": None,
+        "usage": {"input_tokens": 1, "output_tokens": 1},
+    }
+
+
+class Handler(BaseHTTPRequestHandler):
+    reply = DEFAULT_REPLY
+    delay = 5.0
+
+    def _send(self, status: int, body: str, content_type: str = "application/json"):
+        data = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _batch(self, batch_id: str) -> dict:
+        batch = batches[batch_id]
+        ended = time.time() - batch["submitted"] >= self.delay
+        n = len(batch["requests"])
+        host = self.headers.get("Host", "127.0.0.1")
+        return {
+            "id": batch_id,
+            "type": "message_batch",
+            "processing_status": "ended" if ended else "in_progress",
+            "request_counts": {
+                "processing": 0 if ended else n,
+                "succeeded": n if ended else 0,
+                "errored": 0,
+                "canceled": 0,
+                "expired": 0,
+            },
+            "created_at": batch["created_at"],
+            "expires_at": batch["created_at"],
+            "ended_at": _now() if ended else None,
+            "archived_at": None,
+            "cancel_initiated_at": None,
+            "results_url": f"http://{host}/v1/messages/batches/{batch_id}/results" if ended else None,
+        }
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        payload = json.loads(self.rfile.read(length) or b"{}")
+        if self.path.rstrip("/") == "/v1/messages":
+            self._send(200, json.dumps(_message(payload, self.reply)))
+        elif self.path.rstrip("/") == "/v1/messages/batches":
+            batch_id = f"msgbatch_{uuid.uuid4().hex[:24]}"
+            with lock:
+                batches[batch_id] = {
+                    "requests": payload.get("requests", []),
+                    "submitted": time.time(),
+                    "created_at": _now(),
+                }
+                self._send(200, json.dumps(self._batch(batch_id)))
+        else:
+            self._send(404, json.dumps({"type": "error", "error": {"type": "not_found_error", "message": self.path}}))
+
+    def do_GET(self):
+        parts = self.path.strip("/").split("/")
+        if parts[:3] != ["v1", "messages", "batches"] or len(parts) < 4 or parts[3] not in batches:
+            self._send(404, json.dumps({"type": "error", "error": {"type": "not_found_error", "message": self.path}}))
+            return
+        batch_id = parts[3]
+        if len(parts) == 4:
+            self._send(200, json.dumps(self._batch(batch_id)))
+        elif parts[4] == "results":
+            lines = [
+                json.dumps({
+                    "custom_id": request["custom_id"],
+                    "result": {"type": "succeeded", "message": _message(request["params"], self.reply)},
+                })
+                for request in batches[batch_id]["requests"]
+            ]
+            self._send(200, "\n".join(lines) + "\n", "application/binary")
+        else:
+            self._send(404, json.dumps({"type": "error", "error": {"type": "not_found_error", "message": self.path}}))
+
+    def log_message(self, format, *args):
+        print(f"  [fake-batch-server] {self.command} {self.path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in for the Anthropic Message Batches API")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--delay", type=float, default=5.0, help="Seconds before a batch reports 'ended'")
+    parser.add_argument("--reply-file", help="File whose content is returned as every answer's text")
+    args = parser.parse_args()
+
+    Handler.delay = args.delay
+    if args.reply_file:
+        with open(args.reply_file, "r", encoding="utf-8") as f:
+            Handler.reply = f.read()
+
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), Handler)
+    print(f"Listening on http://127.0.0.1:{args.port} (batches end after {args.delay:.0f}s)")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""Train the local quality pre-scorer from stored evaluations and print its calibration report."""
+
+import argparse
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from scraper.config import LISTINGS_FILE, EVALUATIONS_FILE, PRESCORER_MODEL_FILE
+from scraper.models import Listing
+from scraper.prescorer import LEGACY_LABELS, PreScorer, labelled_examples, print_calibration_report, train
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--report", action="store_true",
+                        help="Print the calibration report of the current model without retraining")
+    args = parser.parse_args()
+
+    if args.report:
+        scorer = PreScorer.load()
+        if scorer is None:
+            print(f"No model at {PRESCORER_MODEL_FILE}")
+            return
+        print_calibration_report(scorer)
+        return
+
+    with open(LISTINGS_FILE, "r", encoding="utf-8") as f:
+        listings = {item["id"]: Listing(**item) for item in json.load(f)}
+    # Raw records: evaluations stored by older versions do not all fit the current model
+    with open(EVALUATIONS_FILE, "r", encoding="utf-8") as f:
+        evaluations = json.load(f)
+
+    examples, targets, legacy = labelled_examples(listings, evaluations)
+    print(f"Training on {len(examples)} listings with stored evaluations")
+    if any(legacy.values()):
+        print("Skipped evaluations with legacy labels only: " + ", ".join(
+            f"{n} with {LEGACY_LABELS[target]} instead of {target}" for target, n in legacy.items() if n))
+    if len(examples) < 50:
+        print("Not enough evaluated listings to train a useful model")
+        return
+
+    scorer = train(examples, targets, legacy)
+    scorer.save()
+    print(f"Saved {PRESCORER_MODEL_FILE}\n")
+    print_calibration_report(scorer)
+
+
+if __name__ == "__main__":
+    main()